@@ -23,3 +23,10 @@ class ApiConfig(AppConfig):
     """
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        """
+        Connect the app's signal handlers and register the background job handlers
+        once the app registry is ready.
+        """
+        from api import signals, tasks  # noqa: F401
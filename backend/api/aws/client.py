@@ -0,0 +1,197 @@
+"""
+aws/client.py
+
+This module provides the shared S3 client used by every AWS helper in the API.
+
+Creating a `boto3` client resolves credentials, loads the service model and opens a new connection pool, so
+building one per upload or delete adds noticeable latency to every request. Instead a single client is created
+per process and reused: `boto3` clients are thread-safe, and the client's connection pool keeps TLS
+connections to S3 alive between requests.
+
+The client is recreated after a fork (gunicorn workers are forked from the master process), because sockets in
+a pool must never be shared between processes.
+
+Pool size, timeouts and retries come from the following settings:
+- AWS_S3_MAX_POOL_CONNECTIONS: Maximum number of pooled connections (default 50).
+- AWS_S3_CONNECT_TIMEOUT / AWS_S3_READ_TIMEOUT: Socket timeouts in seconds.
+- AWS_S3_MAX_ATTEMPTS / AWS_S3_RETRY_MODE: botocore retry policy ('standard' or 'adaptive').
+
+If AWS_S3_LOCAL_ROOT is set, a filesystem-backed stand-in (`api/aws/local.py`) is returned instead of a real client.
+
+Either client is wrapped in `TimedS3Client`, which times every call for the request timings
+(see api/services/instrumentation.py) and records it, with the uploaded bytes and failures, in the Prometheus
+metrics (see api/services/metrics.py).
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Functions:
+----------
+- get_s3_client()
+    Returns the process-wide S3 client, creating it on first use.
+- reset_s3_client()
+    Discards the current client so the next call builds a new one.
+- s3_key_from_url(file_url)
+    Extracts the S3 object key from a file URL.
+- s3_url_for_key(file_key)
+    Builds the public URL of an S3 object key.
+
+Classes:
+--------
+- TimedS3Client
+    Forwards calls to the S3 client and times them.
+"""
+import functools
+import os
+import threading
+import time
+
+import boto3
+from botocore.config import Config
+from django.conf import settings
+
+from api.services import instrumentation, metrics
+
+_lock = threading.Lock()
+_client = None
+_client_pid = None
+
+# Client methods that upload a body: method -> (position, name) of the body argument
+UPLOAD_ARGUMENTS = {
+    'put_object': (None, 'Body'),
+    'upload_part': (None, 'Body'),
+    'upload_fileobj': (0, 'Fileobj'),
+}
+
+
+def _body_size(body):
+    """
+    Get the size in bytes of an upload body (bytes or a seekable file), or None if it cannot be told.
+    """
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    size = getattr(body, 'size', None)  # Django files
+    if size is None and hasattr(body, 'seekable') and body.seekable():
+        position = body.tell()
+        size = body.seek(0, os.SEEK_END)
+        body.seek(position)
+        size -= position
+    return size
+
+
+class TimedS3Client:
+    """
+    Forwards attribute access to an S3 client, timing every call except the presigned URL builders (which do
+    not contact S3) as an 's3' operation of the current request, and recording it in the metrics.
+    """
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr) or name.startswith('generate_'):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            upload_bytes = None
+            if name in UPLOAD_ARGUMENTS:
+                position, keyword = UPLOAD_ARGUMENTS[name]
+                body = args[position] if position is not None and len(args) > position else kwargs.get(keyword)
+                upload_bytes = _body_size(body)
+
+            started = time.perf_counter()
+            failed = True
+            try:
+                result = attr(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                seconds = time.perf_counter() - started
+                instrumentation.record('s3', seconds)
+                metrics.observe_s3(name, seconds, failed, upload_bytes)
+        return call
+
+
+def _build_client():
+    """
+    Create a new S3 client with the configured connection pool, timeouts and retries.
+    """
+    if settings.AWS_S3_LOCAL_ROOT:
+        from api.aws.local import LocalS3Client
+        return LocalS3Client(settings.AWS_S3_LOCAL_ROOT)
+
+    config = Config(
+        region_name=settings.AWS_S3_REGION_NAME or None,
+        max_pool_connections=settings.AWS_S3_MAX_POOL_CONNECTIONS,
+        connect_timeout=settings.AWS_S3_CONNECT_TIMEOUT,
+        read_timeout=settings.AWS_S3_READ_TIMEOUT,
+        retries={
+            'max_attempts': settings.AWS_S3_MAX_ATTEMPTS,
+            'mode': settings.AWS_S3_RETRY_MODE,
+        },
+        tcp_keepalive=True,
+    )
+    # Use a dedicated session: the default boto3 session is not safe to share across threads
+    session = boto3.session.Session(
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID or None,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY or None,
+        region_name=settings.AWS_S3_REGION_NAME or None,
+    )
+    return session.client('s3', config=config)
+
+
+def get_s3_client():
+    """
+    Get the S3 client for the current process.
+
+    :return: A thread-safe boto3 S3 client (wrapped in `TimedS3Client`).
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _lock:
+            if _client is None or _client_pid != pid:
+                _client = TimedS3Client(_build_client())
+                _client_pid = pid
+    return _client
+
+
+def reset_s3_client():
+    """
+    Discard the current S3 client (e.g. after a fork or a settings change).
+
+    :return: None
+    """
+    global _client, _client_pid, _lock
+    _lock = threading.Lock()
+    _client = None
+    _client_pid = None
+
+
+# A forked child must not reuse the parent's pooled sockets or a lock held at fork time
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_s3_client)
+
+
+def s3_key_from_url(file_url):
+    """
+    Extract the S3 object key from the URL of a file in the bucket.
+
+    :param file_url: The URL of the file.
+    :return: The object key.
+    """
+    return file_url.split(f"{settings.AWS_S3_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/")[-1]
+
+
+def s3_url_for_key(file_key):
+    """
+    Build the public URL of an object in the bucket.
+
+    :param file_key: The object key.
+    :return: The URL of the file.
+    """
+    return f"https://{settings.AWS_S3_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/{file_key}"
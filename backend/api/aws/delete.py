@@ -9,13 +9,15 @@ function is particularly useful for cleaning up files in S3 when associated data
 
 Author: Chace Nielson
 Created: 2024-08-14
-Modified: 2024-08-15
+Modified: 2026-10-18
 @since 1.0
 
 Functions:
 ----------
 - delete_file_from_s3(file_url)
     Deletes a file from an S3 bucket based on the file's URL.
+- delete_files_from_s3(file_urls)
+    Deletes many files using batched `DeleteObjects` requests (up to 1000 keys each).
 
 Parameters:
 -----------
@@ -23,7 +25,8 @@ Parameters:
 
 Returns:
 --------
-- None: The function does not return anything. It performs the deletion operation directly.
+- None: `delete_file_from_s3` does not return anything. It performs the deletion operation directly.
+- `delete_files_from_s3` returns a list of the files that could not be deleted.
 
 Exceptions:
 -----------
@@ -31,8 +34,15 @@ Exceptions:
   may raise exceptions that should be handled by the calling code if needed.
 
 """
-import boto3
+import logging
 from django.conf import settings
+from botocore.exceptions import BotoCoreError, ClientError
+from api.aws.client import get_s3_client, s3_key_from_url
+
+logger = logging.getLogger(__name__)
+
+# S3 accepts at most 1000 keys per DeleteObjects request
+DELETE_BATCH_SIZE = 1000
 
 def delete_file_from_s3(file_url):
     """
@@ -42,12 +52,49 @@ def delete_file_from_s3(file_url):
     :return: None
     """
     # Extract the S3 object key from the file URL
-    file_key = file_url.split(f"{settings.AWS_S3_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/")[-1]
+    file_key = s3_key_from_url(file_url)
     
-    # Initialize the S3 client
-    s3_client = boto3.client('s3', region_name=settings.AWS_S3_REGION_NAME, 
-                             aws_access_key_id=settings.AWS_ACCESS_KEY_ID, 
-                             aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY)
+    # Use the shared S3 client (see api/aws/client.py)
+    s3_client = get_s3_client()
     
     # Delete the file from S3
     s3_client.delete_object(Bucket=settings.AWS_S3_BUCKET_NAME, Key=file_key)
+
+
+def delete_files_from_s3(file_urls):
+    """
+    Delete many files from an S3 bucket with batched `DeleteObjects` requests.
+
+    Empty URLs and duplicates are ignored. A failure to delete some keys (or a whole batch)
+    does not stop the remaining batches; the failures are returned instead.
+
+    :param file_urls: An iterable of file URLs to delete.
+    :return: A list of dicts with 'key', 'code' and 'message' for every file that was not deleted.
+    """
+    file_keys = list(dict.fromkeys(s3_key_from_url(url) for url in file_urls if url))
+    if not file_keys:
+        return []
+
+    s3_client = get_s3_client()
+    failures = []
+
+    for start in range(0, len(file_keys), DELETE_BATCH_SIZE):
+        batch = file_keys[start:start + DELETE_BATCH_SIZE]
+        try:
+            response = s3_client.delete_objects(
+                Bucket=settings.AWS_S3_BUCKET_NAME,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True},
+            )
+        except (BotoCoreError, ClientError) as e:
+            failures.extend({'key': key, 'code': type(e).__name__, 'message': str(e)} for key in batch)
+            continue
+
+        failures.extend(
+            {'key': error.get('Key'), 'code': error.get('Code'), 'message': error.get('Message')}
+            for error in response.get('Errors', [])
+        )
+
+    if failures:
+        logger.warning('Failed to delete %d of %d files from S3', len(failures), len(file_keys))
+    return failures
+
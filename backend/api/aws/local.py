@@ -0,0 +1,253 @@
+"""
+aws/local.py
+
+This module provides a local stand-in for S3, used in development and tests instead of a real bucket.
+
+When the `AWS_S3_LOCAL_ROOT` setting is set, `get_s3_client()` returns a `LocalS3Client`, which stores objects as
+files under that directory and implements the subset of the boto3 S3 client API used by the app (put, upload,
+head, get, copy, delete, multipart uploads and presigned URLs). Errors are raised as botocore `ClientError`s with the
+same codes S3 uses, so calling code behaves the same against both.
+
+Presigned URLs point at `AWS_S3_LOCAL_URL`, which is served by `api/views/upload/local_s3.py`. Instead of an AWS
+signature they carry a token signed with the Django `SECRET_KEY` that records the key, content type, size limit
+and expiry.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Classes:
+--------
+- LocalS3Client(root)
+    Filesystem-backed replacement for the boto3 S3 client.
+
+Functions:
+----------
+- make_presigned_token(payload, expires_in)
+    Signs the upload conditions of a presigned URL.
+- read_presigned_token(token)
+    Verifies a token and returns its upload conditions.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import quote
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core import signing
+
+TOKEN_SALT = 'api.aws.local.presigned'
+
+
+def make_presigned_token(payload, expires_in):
+    """
+    Sign the conditions of a presigned upload.
+
+    :param payload: A dict with 'bucket', 'key' and optionally 'content_type', 'cache_control' and 'max_size'.
+    :param expires_in: Seconds until the token expires.
+    :return: The token.
+    """
+    return signing.dumps({**payload, 'exp': int(time.time()) + int(expires_in)}, salt=TOKEN_SALT)
+
+
+def read_presigned_token(token):
+    """
+    Verify a presigned upload token.
+
+    :param token: The token from the presigned URL or form.
+    :return: The signed conditions, or None if the token is invalid or expired.
+    """
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        return None
+    if payload.get('exp', 0) < time.time():
+        return None
+    return payload
+
+
+def _client_error(code, message, operation):
+    return ClientError({'Error': {'Code': code, 'Message': message}}, operation)
+
+
+class LocalS3Client:
+    """
+    Stores S3 objects as files under `root/<bucket>/<key>`, with their metadata in `root/.meta`.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    # Paths
+
+    def _object_path(self, bucket, key):
+        path = (self.root / bucket / key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise _client_error('InvalidKey', 'Invalid key', 'PutObject')
+        return path
+
+    def _meta_path(self, bucket, key):
+        return self.root / '.meta' / bucket / f'{key}.json'
+
+    def _upload_dir(self, upload_id):
+        return self.root / '.multipart' / upload_id
+
+    # Objects
+
+    def _write(self, bucket, key, chunks, content_type=None, cache_control=None):
+        path = self._object_path(bucket, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.md5()
+        size = 0
+        with open(path, 'wb') as destination:
+            for chunk in chunks:
+                digest.update(chunk)
+                size += len(chunk)
+                destination.write(chunk)
+
+        meta_path = self._meta_path(bucket, key)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            'ContentType': content_type or 'binary/octet-stream',
+            'CacheControl': cache_control,
+            'ContentLength': size,
+            'ETag': f'"{digest.hexdigest()}"',
+        }
+        meta_path.write_text(json.dumps(meta))
+        return meta
+
+    def put_object(self, Bucket, Key, Body=b'', ContentType=None, CacheControl=None, **kwargs):
+        if isinstance(Body, (bytes, bytearray)):
+            chunks = [bytes(Body)]
+        elif isinstance(Body, str):
+            chunks = [Body.encode()]
+        else:
+            chunks = iter(lambda: Body.read(64 * 1024), b'')
+        meta = self._write(Bucket, Key, chunks, ContentType, CacheControl)
+        return {'ETag': meta['ETag']}
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, ExtraArgs=None, **kwargs):
+        extra_args = ExtraArgs or {}
+        self.put_object(Bucket=Bucket, Key=Key, Body=Fileobj, **extra_args)
+
+    def head_object(self, Bucket, Key, **kwargs):
+        meta_path = self._meta_path(Bucket, Key)
+        if not self._object_path(Bucket, Key).exists() or not meta_path.exists():
+            raise _client_error('404', 'Not Found', 'HeadObject')
+        return json.loads(meta_path.read_text())
+
+    def get_object(self, Bucket, Key, **kwargs):
+        try:
+            meta = self.head_object(Bucket, Key)
+        except ClientError:
+            raise _client_error('NoSuchKey', 'The specified key does not exist.', 'GetObject')
+        return {**meta, 'Body': open(self._object_path(Bucket, Key), 'rb')}
+
+    def copy_object(self, Bucket, Key, CopySource, ContentType=None, CacheControl=None, MetadataDirective='COPY', **kwargs):
+        try:
+            meta = self.head_object(CopySource['Bucket'], CopySource['Key'])
+        except ClientError:
+            raise _client_error('NoSuchKey', 'The specified key does not exist.', 'CopyObject')
+        if MetadataDirective != 'REPLACE':
+            ContentType, CacheControl = meta['ContentType'], meta['CacheControl']
+        with open(self._object_path(CopySource['Bucket'], CopySource['Key']), 'rb') as source:
+            meta = self._write(Bucket, Key, iter(lambda: source.read(64 * 1024), b''), ContentType, CacheControl)
+        return {'CopyObjectResult': {'ETag': meta['ETag']}}
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        for path in (self._object_path(Bucket, Key), self._meta_path(Bucket, Key)):
+            if path.exists():
+                path.unlink()
+        return {}
+
+    def delete_objects(self, Bucket, Delete, **kwargs):
+        deleted = []
+        for item in Delete['Objects']:
+            self.delete_object(Bucket=Bucket, Key=item['Key'])
+            deleted.append({'Key': item['Key']})
+        return {} if Delete.get('Quiet') else {'Deleted': deleted}
+
+    # Multipart uploads
+
+    def create_multipart_upload(self, Bucket, Key, ContentType=None, CacheControl=None, **kwargs):
+        upload_id = uuid.uuid4().hex
+        upload_dir = self._upload_dir(upload_id)
+        upload_dir.mkdir(parents=True)
+        (upload_dir / 'upload.json').write_text(json.dumps({
+            'Bucket': Bucket, 'Key': Key, 'ContentType': ContentType, 'CacheControl': CacheControl,
+        }))
+        return {'Bucket': Bucket, 'Key': Key, 'UploadId': upload_id}
+
+    def _upload(self, upload_id, operation):
+        upload_dir = self._upload_dir(upload_id)
+        if not (upload_dir / 'upload.json').exists():
+            raise _client_error('NoSuchUpload', 'The specified upload does not exist.', operation)
+        return upload_dir, json.loads((upload_dir / 'upload.json').read_text())
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, **kwargs):
+        upload_dir, _ = self._upload(UploadId, 'UploadPart')
+        data = Body if isinstance(Body, (bytes, bytearray)) else Body.read()
+        (upload_dir / f'{PartNumber:05d}').write_bytes(data)
+        return {'ETag': f'"{hashlib.md5(data).hexdigest()}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        upload_dir, upload = self._upload(UploadId, 'CompleteMultipartUpload')
+
+        def chunks():
+            for part in MultipartUpload['Parts']:
+                part_path = upload_dir / f"{part['PartNumber']:05d}"
+                if not part_path.exists():
+                    raise _client_error('InvalidPart', 'One or more of the specified parts could not be found.', 'CompleteMultipartUpload')
+                yield part_path.read_bytes()
+
+        meta = self._write(Bucket, Key, chunks(), upload['ContentType'], upload['CacheControl'])
+        shutil.rmtree(upload_dir)
+        return {'Bucket': Bucket, 'Key': Key, 'ETag': meta['ETag']}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        upload_dir, _ = self._upload(UploadId, 'AbortMultipartUpload')
+        shutil.rmtree(upload_dir)
+        return {}
+
+    # Presigned URLs
+
+    def generate_presigned_url(self, ClientMethod, Params=None, ExpiresIn=3600, HttpMethod=None):
+        params = Params or {}
+        url = f"{settings.AWS_S3_LOCAL_URL}{quote(params['Key'])}"
+        if ClientMethod != 'put_object':
+            return url
+        token = make_presigned_token({
+            'bucket': params['Bucket'],
+            'key': params['Key'],
+            'content_type': params.get('ContentType'),
+            'cache_control': params.get('CacheControl'),
+        }, ExpiresIn)
+        return f'{url}?token={quote(token)}'
+
+    def generate_presigned_post(self, Bucket, Key, Fields=None, Conditions=None, ExpiresIn=3600):
+        fields = dict(Fields or {})
+        max_size = None
+        for condition in Conditions or []:
+            if isinstance(condition, list) and condition[0] == 'content-length-range':
+                max_size = condition[2]
+        token = make_presigned_token({
+            'bucket': Bucket,
+            'key': Key,
+            'content_type': fields.get('Content-Type'),
+            'cache_control': fields.get('Cache-Control'),
+            'max_size': max_size,
+        }, ExpiresIn)
+        return {'url': settings.AWS_S3_LOCAL_URL, 'fields': {**fields, 'key': Key, 'token': token}}
+
+    def file_path(self, Bucket, Key):
+        """
+        Return the local path of an object (not part of the boto3 API; used to serve files in development).
+        """
+        path = self._object_path(Bucket, Key)
+        return path if path.exists() and os.path.isfile(path) else None
@@ -0,0 +1,257 @@
+"""
+aws/multipart.py
+
+This module streams uploads into S3 using multipart uploads, so large book files never have to be held in
+worker memory or written to a temporary file first.
+
+- `S3StreamingWriter` accepts data in arbitrary chunks, cuts it into parts of `AWS_S3_MULTIPART_PART_SIZE`
+  bytes and uploads up to `AWS_S3_MULTIPART_CONCURRENCY` parts in parallel. At most `concurrency + 1` parts are
+  held in memory at any time. Files smaller than one part are sent with a single `PutObject` instead.
+- `S3StreamingUploadHandler` is a Django upload handler that pipes a multipart/form-data file field straight
+  into an `S3StreamingWriter` while the request body is being read, and hands the view an `S3UploadedFile`
+  that carries the final S3 URL instead of the file contents.
+
+The helpers for resumable upload sessions (`start_multipart_upload`, `upload_part`, `complete_multipart_upload`,
+`abort_multipart_upload`) are thin wrappers used by `api/views/upload/upload_session.py`.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Classes:
+--------
+- S3StreamingWriter(file_key, content_type, part_size=None, concurrency=None)
+    File-like writer that uploads to S3 in parts.
+- S3UploadedFile(name, content_type, size, file_url)
+    Uploaded file object for files already stored in S3.
+- S3StreamingUploadHandler(request, field_name, owner_id, prefix, allowed_types=None)
+    Django upload handler streaming one form field into S3.
+"""
+import contextvars
+import mimetypes
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+
+from api.aws.client import get_s3_client, s3_url_for_key
+from api.aws.upload import build_file_key, upload_extra_args
+
+# S3 rejects parts smaller than 5 MiB (except the last one)
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+def start_multipart_upload(file_key, content_type):
+    """
+    Start a multipart upload and return its upload ID.
+    """
+    response = get_s3_client().create_multipart_upload(
+        Bucket=settings.AWS_S3_BUCKET_NAME,
+        Key=file_key,
+        **upload_extra_args(content_type),
+    )
+    return response['UploadId']
+
+
+def upload_part(file_key, upload_id, part_number, data):
+    """
+    Upload one part of a multipart upload and return its ETag.
+    """
+    response = get_s3_client().upload_part(
+        Bucket=settings.AWS_S3_BUCKET_NAME,
+        Key=file_key,
+        UploadId=upload_id,
+        PartNumber=part_number,
+        Body=data,
+    )
+    return response['ETag']
+
+
+def complete_multipart_upload(file_key, upload_id, parts):
+    """
+    Complete a multipart upload.
+
+    :param parts: A list of dicts with 'PartNumber' and 'ETag'.
+    :return: The URL of the uploaded file.
+    """
+    get_s3_client().complete_multipart_upload(
+        Bucket=settings.AWS_S3_BUCKET_NAME,
+        Key=file_key,
+        UploadId=upload_id,
+        MultipartUpload={'Parts': [
+            {'PartNumber': part['PartNumber'], 'ETag': part['ETag']}
+            for part in sorted(parts, key=lambda part: part['PartNumber'])
+        ]},
+    )
+    return s3_url_for_key(file_key)
+
+
+def abort_multipart_upload(file_key, upload_id):
+    """
+    Abort a multipart upload, discarding any parts already stored.
+    """
+    get_s3_client().abort_multipart_upload(
+        Bucket=settings.AWS_S3_BUCKET_NAME,
+        Key=file_key,
+        UploadId=upload_id,
+    )
+
+
+class S3StreamingWriter:
+    """
+    Write a file to S3 in parts as data arrives.
+
+    The multipart upload is only started once a full part is buffered, so small files cost a single request.
+    """
+
+    def __init__(self, file_key, content_type, part_size=None, concurrency=None):
+        self.file_key = file_key
+        self.content_type = content_type
+        self.part_size = max(part_size or settings.AWS_S3_MULTIPART_PART_SIZE, MIN_PART_SIZE)
+        self.concurrency = max(concurrency or settings.AWS_S3_MULTIPART_CONCURRENCY, 1)
+
+        self.buffer = bytearray()
+        self.size = 0
+        self.upload_id = None
+        self.parts = []
+        self.futures = []
+        self.executor = None
+        # Limits the parts held in memory while they are uploading
+        self.slots = threading.BoundedSemaphore(self.concurrency)
+
+    def write(self, data):
+        """
+        Buffer data and upload every full part.
+        """
+        self.buffer.extend(data)
+        self.size += len(data)
+        while len(self.buffer) >= self.part_size:
+            part = bytes(self.buffer[:self.part_size])
+            del self.buffer[:self.part_size]
+            self._submit_part(part)
+
+    def _submit_part(self, data):
+        if self.upload_id is None:
+            self.upload_id = start_multipart_upload(self.file_key, self.content_type)
+            self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='s3-part')
+
+        part_number = len(self.futures) + 1
+        self.slots.acquire()  # Wait here if `concurrency` parts are already in flight
+
+        def upload():
+            try:
+                return {'PartNumber': part_number, 'ETag': upload_part(self.file_key, self.upload_id, part_number, data)}
+            finally:
+                self.slots.release()
+
+        # Run in a copy of the request context, so the part uploads count in the request timings
+        self.futures.append(self.executor.submit(contextvars.copy_context().run, upload))
+
+    def close(self):
+        """
+        Upload the remaining data and finish the upload.
+
+        :return: The URL of the uploaded file.
+        """
+        try:
+            if self.upload_id is None:
+                # Everything fit in one part: a single PutObject is cheaper than a multipart upload
+                get_s3_client().put_object(
+                    Bucket=settings.AWS_S3_BUCKET_NAME,
+                    Key=self.file_key,
+                    Body=bytes(self.buffer),
+                    **upload_extra_args(self.content_type),
+                )
+                return s3_url_for_key(self.file_key)
+
+            if self.buffer:
+                self._submit_part(bytes(self.buffer))
+                self.buffer.clear()
+            self.parts = [future.result() for future in self.futures]
+            return complete_multipart_upload(self.file_key, self.upload_id, self.parts)
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False)
+
+    def abort(self):
+        """
+        Abort the upload and discard buffered data and uploaded parts.
+        """
+        self.buffer.clear()
+        if self.upload_id is not None:
+            for future in self.futures:
+                future.cancel()
+            abort_multipart_upload(self.file_key, self.upload_id)
+            self.upload_id = None
+
+
+class S3UploadedFile(UploadedFile):
+    """
+    An uploaded file whose contents were streamed to S3 rather than kept on the server.
+
+    Attributes:
+        file_url (str): The URL of the file in the S3 bucket.
+    """
+
+    def __init__(self, name, content_type, size, file_url):
+        super().__init__(file=None, name=name, content_type=content_type, size=size)
+        self.file_url = file_url
+
+    def open(self, mode=None):
+        raise ValueError('The contents of this file were streamed to S3 and are not available locally.')
+
+
+class S3StreamingUploadHandler(FileUploadHandler):
+    """
+    Upload handler that streams a single form field into S3 while the request is read.
+
+    Other fields, and files whose type is not in `allowed_types`, are left to the default handlers.
+    """
+    chunk_size = 64 * 1024
+
+    def __init__(self, request, field_name, owner_id, prefix, allowed_types=None):
+        super().__init__(request)
+        self.field_name = field_name
+        self.owner_id = owner_id
+        self.prefix = prefix
+        self.allowed_types = allowed_types
+        self.writer = None
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.writer = None
+        if field_name != self.field_name:
+            return
+
+        guessed_type = mimetypes.guess_type(file_name)[0]
+        if self.allowed_types is not None and guessed_type not in self.allowed_types:
+            return  # Let the default handlers take it so the view can reject it
+
+        file_key = build_file_key(self.owner_id, self.prefix, str(uuid.uuid4()), file_name)
+        self.writer = S3StreamingWriter(file_key, guessed_type or content_type or 'application/octet-stream')
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.writer is None:
+            return raw_data
+        self.writer.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.writer is None:
+            return None
+        writer, self.writer = self.writer, None
+        file_url = writer.close()
+        return S3UploadedFile(self.file_name, writer.content_type, writer.size, file_url)
+
+    def upload_interrupted(self):
+        if self.writer is not None:
+            self.writer.abort()
+            self.writer = None
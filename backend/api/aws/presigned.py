@@ -0,0 +1,97 @@
+"""
+aws/presigned.py
+
+This module lets clients upload files directly to S3 with presigned URLs, so the file bytes never pass through the
+API servers. The API only issues the URL and afterwards checks the stored object with a `HEAD` request.
+
+Objects uploaded this way get the same key layout and headers as `upload_file_to_s3` (see `api/aws/upload.py`).
+The presigned POST policy pins the key, content type and maximum size; a presigned PUT pins the key and content
+type, so its size can only be checked afterwards by `head_file`.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Functions:
+----------
+- presigned_post(file_key, content_type, max_size, expires_in=None)
+    Returns the URL and form fields for a browser POST upload.
+- presigned_put(file_key, content_type, expires_in=None)
+    Returns the URL and headers for a PUT upload.
+- head_file(file_key)
+    Returns the size, content type and ETag of a stored object, or None if it does not exist.
+"""
+from botocore.exceptions import ClientError
+from django.conf import settings
+
+from api.aws.client import get_s3_client
+from api.aws.upload import upload_extra_args
+
+
+def presigned_post(file_key, content_type, max_size, expires_in=None):
+    """
+    Create a presigned POST for uploading one file from a browser form.
+
+    :param file_key: The object key the file must be stored under.
+    :param content_type: The MIME type the file must be uploaded with.
+    :param max_size: The maximum file size in bytes.
+    :param expires_in: Seconds the URL stays valid (defaults to AWS_S3_PRESIGNED_EXPIRY).
+    :return: A dict with 'url' and 'fields'; the file must be sent as the last form field, named 'file'.
+    """
+    extra_args = upload_extra_args(content_type)
+    fields = {'Content-Type': extra_args['ContentType'], 'Cache-Control': extra_args['CacheControl']}
+    conditions = [
+        {'Content-Type': fields['Content-Type']},
+        {'Cache-Control': fields['Cache-Control']},
+        ['content-length-range', 1, max_size],
+    ]
+    return get_s3_client().generate_presigned_post(
+        Bucket=settings.AWS_S3_BUCKET_NAME,
+        Key=file_key,
+        Fields=fields,
+        Conditions=conditions,
+        ExpiresIn=expires_in or settings.AWS_S3_PRESIGNED_EXPIRY,
+    )
+
+
+def presigned_put(file_key, content_type, expires_in=None):
+    """
+    Create a presigned PUT URL for uploading one file.
+
+    :param file_key: The object key the file must be stored under.
+    :param content_type: The MIME type the file must be uploaded with.
+    :param expires_in: Seconds the URL stays valid (defaults to AWS_S3_PRESIGNED_EXPIRY).
+    :return: A dict with 'url' and the 'headers' the request must send.
+    """
+    extra_args = upload_extra_args(content_type)
+    url = get_s3_client().generate_presigned_url(
+        'put_object',
+        Params={'Bucket': settings.AWS_S3_BUCKET_NAME, 'Key': file_key, **extra_args},
+        ExpiresIn=expires_in or settings.AWS_S3_PRESIGNED_EXPIRY,
+        HttpMethod='PUT',
+    )
+    return {
+        'url': url,
+        'headers': {'Content-Type': extra_args['ContentType'], 'Cache-Control': extra_args['CacheControl']},
+    }
+
+
+def head_file(file_key):
+    """
+    Look up a stored object without downloading it.
+
+    :param file_key: The object key.
+    :return: A dict with 'size', 'content_type' and 'etag', or None if the object does not exist.
+    """
+    try:
+        response = get_s3_client().head_object(Bucket=settings.AWS_S3_BUCKET_NAME, Key=file_key)
+    except ClientError as error:
+        if error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+            return None
+        raise
+    return {
+        'size': response['ContentLength'],
+        'content_type': response.get('ContentType'),
+        'etag': response.get('ETag'),
+    }
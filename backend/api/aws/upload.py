@@ -3,19 +3,29 @@ aws/upload.py
 
 This module provides a utility function to upload files to an AWS S3 bucket.
 
-The function `upload_file_to_s3` is designed to handle the upload of various file types, such as text files and images, to an S3 bucket. The uploaded files are stored with a unique file key that includes the owner's ID, a custom prefix, and a unique string to ensure filename uniqueness. The function returns the URL of the uploaded file, which can be used to access the file directly from the S3 bucket.
+The function `upload_file_to_s3` is designed to handle the upload of various file types, such as text files and images, to an S3 bucket. The uploaded files are stored with a file key that includes the owner's ID, a custom prefix, and a hash of the file contents (a content-addressed key). The function returns the URL of the uploaded file, which can be used to access the file directly from the S3 bucket.
+
+Because a key is never written with different bytes, every object is uploaded with a long-lived, immutable
+`Cache-Control` header (`AWS_S3_CACHE_CONTROL`) and browsers and CDNs never need to revalidate it. Changing a file
+means uploading it under a new key and retiring the old one (see `edit_upload`).
 
 This module also retains some old code for reference, which shows the manual process of uploading files to S3 without the utility function.
 
 Author: Chace Nielson
 Created: 2024-08-14
-Modified: 2024-08-15
+Modified: 2026-10-18
 @since 1.0
 
 Functions:
 ----------
-- upload_file_to_s3(file, owner_id, prefix, file_type, unique_string)
+- upload_file_to_s3(file, owner_id, prefix, file_type, unique_string=None)
     Uploads a file to an S3 bucket and returns the file's URL.
+- edit_upload(new_file, existing_file_url=None, prefix='content', owner_id=None)
+    Uploads a replacement file under a new key and retires the old file.
+- retire_files(file_urls)
+    Queues the deletion of replaced files after `AWS_S3_RETIRE_DELAY` seconds.
+- content_hash(file)
+    Returns the hash of a file's contents used in content-addressed keys.
 
 Parameters:
 -----------
@@ -23,19 +33,98 @@ Parameters:
 - owner_id: The ID of the owner (user) to be included in the file key.
 - prefix: The prefix to be added to the file name (e.g., 'content_' or 'cover_art_').
 - file_type: The MIME type of the file (e.g., 'text/plain', 'image/png').
-- unique_string: A unique string to ensure filename uniqueness.
+- unique_string: Optional unique string for the key; defaults to the hash of the file contents.
 
 Returns:
 --------
 - file_url: The URL of the uploaded file in the S3 bucket.
 
 """
+import hashlib
+import logging
 import mimetypes
-import uuid
-import boto3
 from django.conf import settings
+from api.aws.client import get_s3_client, s3_url_for_key
+from api.services import jobs
+
+logger = logging.getLogger(__name__)
+
+# MIME types accepted for book content files
+BOOK_CONTENT_TYPES = [
+    'application/pdf',
+    'application/msword',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'application/json',
+    'text/html',
+    'text/plain',
+    'application/rtf',
+]
+
+# Hex digits of the SHA-256 digest used in content-addressed keys (128 bits)
+CONTENT_HASH_LENGTH = 32
+
+
+def content_hash(file):
+    """
+    Hash the contents of a file for a content-addressed key. The file is rewound afterwards.
+
+    :param file: A file-like object.
+    :return: The first CONTENT_HASH_LENGTH hex digits of its SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(1024 * 1024), b''):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()[:CONTENT_HASH_LENGTH]
+
+
+def get_folder(prefix):
+    """
+    Get the S3 folder for a file prefix.
+
+    :param prefix: The file prefix (e.g., 'content', 'cover_art', 'profile_image').
+    :return: The folder, including the trailing slash.
+    """
+    if prefix == 'content':
+        return 'books/'  # Content files go to the 'books/' folder
+    elif prefix == 'cover_art':
+        return 'bookArt/'  # Cover art goes to the 'bookArt/' folder
+    elif prefix == 'profile_image':
+        return 'profilePictures/'  # Profile pictures go to the 'profilePictures/' folder
+    return 'misc/'  # Default folder in case of unspecified prefix
+
+
+def build_file_key(owner_id, prefix, unique_string, file_name):
+    """
+    Build the S3 object key for an uploaded file.
+
+    :param owner_id: The ID of the owner (user) to be included in the file key.
+    :param prefix: The file prefix, which also selects the folder.
+    :param unique_string: A unique string to ensure filename uniqueness.
+    :param file_name: The original file name.
+    :return: The object key.
+    """
+    return f'{get_folder(prefix)}{owner_id}_{prefix}_{unique_string}_{file_name.replace(" ", "")}'
 
-def upload_file_to_s3(file, owner_id, prefix, file_type, unique_string):
+
+def upload_extra_args(content_type):
+    """
+    Get the extra S3 arguments (content type and caching) used for every uploaded object.
+
+    Object keys are never rewritten with different contents, so objects can be cached for a long time
+    without revalidation.
+
+    :param content_type: The MIME type of the object.
+    :return: A dict of S3 request arguments.
+    """
+    return {
+        'ContentType': content_type,
+        'CacheControl': settings.AWS_S3_CACHE_CONTROL,
+    }
+
+
+def upload_file_to_s3(file, owner_id, prefix, file_type, unique_string=None):
     """
     Upload a file to an S3 bucket.
 
@@ -43,37 +132,23 @@ def upload_file_to_s3(file, owner_id, prefix, file_type, unique_string):
     :param owner_id: The ID of the owner (user) to be included in the file key.
     :param prefix: The prefix to be added to the file name (e.g., 'content', 'cover_art', 'profile_image').
     :param file_type: The MIME type of the file (e.g., 'text/plain', 'image/png').
-    :param unique_string: A unique string to ensure filename uniqueness.
+    :param unique_string: Optional unique string for the key. Defaults to the hash of the file contents,
+        so uploading the same file again yields the same key.
     :return: The URL of the uploaded file.
     """
-    # Define the folder structure
-    if prefix == 'content':
-        folder = 'books/'  # Content files go to the 'books/' folder
-    elif prefix == 'cover_art':
-        folder = 'bookArt/'  # Cover art goes to the 'bookArt/' folder
-    elif prefix == 'profile_image':
-        folder = 'profilePictures/'  # Profile pictures go to the 'profilePictures/' folder
-    else:
-        folder = 'misc/'  # Default folder in case of unspecified prefix
-    
     # Create the file key with the folder structure
-    file_key = f'{folder}{owner_id}_{prefix}_{unique_string}_{file.name.replace(" ", "")}'
+    file_key = build_file_key(owner_id, prefix, unique_string or content_hash(file), file.name)
     content_type = mimetypes.guess_type(file.name)[0] or file_type
 
-    s3_client = boto3.client('s3', region_name=settings.AWS_S3_REGION_NAME, 
-                             aws_access_key_id=settings.AWS_ACCESS_KEY_ID, 
-                             aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY)
+    s3_client = get_s3_client()
     
     s3_client.upload_fileobj(
         file,
         settings.AWS_S3_BUCKET_NAME,
         file_key,
-        ExtraArgs={
-            'ContentType': content_type,
-            'CacheControl': 'no-cache'  # Prevent caching
-        }
+        ExtraArgs=upload_extra_args(content_type)
     )
-    file_url = f"https://{settings.AWS_S3_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/{file_key}"
+    file_url = s3_url_for_key(file_key)
     return file_url
 
 
@@ -81,45 +156,45 @@ def upload_file_to_s3(file, owner_id, prefix, file_type, unique_string):
 
 def edit_upload(new_file, existing_file_url=None, prefix='content', owner_id=None):
     """
-    Overwrite an existing file in S3 or upload a new file if no existing file is provided.
+    Upload a replacement for an existing file in S3, or upload a new file if no existing file is provided.
 
-    :param new_file: The new file to be uploaded or overwrite the existing file.
-    :param existing_file_url: The URL of the existing file to overwrite. If None, a new file will be uploaded.
+    The new file is stored under its own content-addressed key instead of overwriting the old object,
+    so cached copies of the old URL can never be served for the new contents. The old file is retired
+    by a background job after `AWS_S3_RETIRE_DELAY` seconds; the job skips files that are still
+    referenced, e.g. if saving the new URL failed.
+
+    :param new_file: The new file to be uploaded.
+    :param existing_file_url: The URL of the file being replaced, if any.
     :param prefix: The prefix for the new file key (default is 'content').
     :param owner_id: The ID of the file owner, used for generating new file keys.
-    :return: The URL of the uploaded (or overwritten) file.
+    :return: The URL of the uploaded file.
     """
-    s3_client = boto3.client('s3', region_name=settings.AWS_S3_REGION_NAME, 
-                             aws_access_key_id=settings.AWS_ACCESS_KEY_ID, 
-                             aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY)
-
-    if existing_file_url:
-        # Extract the existing file key from the URL
-        file_key = existing_file_url.split(f"{settings.AWS_S3_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/")[-1]
-    else:
-        # Generate a new file key if no existing file is provided
-        unique_string = str(uuid.uuid4())
-        file_key = f'{owner_id}_{prefix}_{unique_string}_{new_file.name.replace(" ", "")}'
-
     # Determine content type
     content_type = mimetypes.guess_type(new_file.name)[0] or 'application/octet-stream'
 
-    # Upload the file (overwrite if existing_file_url is provided)
     try:
-        s3_client.upload_fileobj(
-            new_file,
-            settings.AWS_S3_BUCKET_NAME,
-            file_key,
-            ExtraArgs={
-                'ContentType': content_type,
-                'CacheControl': 'no-cache'  # Prevent caching
-            }
-        )
-    except Exception as e:
-        # Handle exception (e.g., log it, raise a custom error, etc.)
-        print(f"Failed to upload file to S3: {str(e)}")
+        file_url = upload_file_to_s3(new_file, owner_id, prefix, content_type)
+    except Exception:
+        logger.exception('Failed to upload %s to S3', new_file.name)
         raise
 
-    # Return the file URL
-    file_url = f"https://{settings.AWS_S3_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/{file_key}"
-    return file_url
\ No newline at end of file
+    # Retire the old file once the new URL has been saved
+    if existing_file_url and existing_file_url != file_url:
+        retire_files([existing_file_url])
+
+    return file_url
+
+
+def retire_files(file_urls):
+    """
+    Queue the deletion of files that have been replaced by new uploads.
+
+    The files are deleted by a background job after `AWS_S3_RETIRE_DELAY` seconds, so responses cached
+    before the replacement keep working until they expire. The job skips files that are still referenced.
+
+    :param file_urls: The URLs of the replaced files; empty values are ignored.
+    """
+    urls = [url for url in file_urls if url]
+    if urls:
+        jobs.enqueue('s3.delete_files', {'urls': urls}, delay=settings.AWS_S3_RETIRE_DELAY)
+
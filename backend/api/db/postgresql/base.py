@@ -0,0 +1,31 @@
+"""
+db/postgresql/base.py
+
+PostgreSQL database engine for the API (`'ENGINE': 'api.db.postgresql'`).
+
+This is Django's PostgreSQL backend, including its optional psycopg connection pool, with one addition: the
+time spent getting a connection (opening a new one, or waiting for one from the pool) is recorded for the
+database stats endpoint (see `api/services/db_connections.py`).
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+import time
+
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresDatabaseWrapper
+
+from api.services import db_connections
+
+
+class DatabaseWrapper(PostgresDatabaseWrapper):
+    """
+    Django's PostgreSQL database wrapper, timing every new connection or pool checkout.
+    """
+
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        db_connections.record_connect_time(self.alias, time.perf_counter() - started)
+        return connection
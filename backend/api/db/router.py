@@ -0,0 +1,238 @@
+"""
+db/router.py
+
+Database router sending public catalog reads to read replicas.
+
+Replicas are the database aliases listed in `DATABASE_REPLICAS` (see the database settings). Only reads that
+are explicitly marked as safe go to them: the GET requests of the public viewsets (`ReplicaReadMixin`). Every
+write, every read inside a request that has already written, and everything outside a request (jobs,
+management commands, counter flushes) uses the primary ('default').
+
+Replicas trail the primary, so:
+
+- After a signed-in user writes (e.g. edits a book through `BookCRUDViewSet`), their reads are pinned to the
+  primary for `DB_REPLICA_PIN_SECONDS`, so they see their change immediately. The pin is stored in the Django
+  cache and set by `ReplicaRoutingMiddleware` at the end of the request. The next request of the user may reach
+  another worker, so the settings refuse replicas with a per-process cache backend.
+- The lag of each replica is checked at most every `DB_REPLICA_LAG_CHECK_INTERVAL` seconds per process. A
+  replica that is more than `DB_REPLICA_MAX_LAG` seconds behind, or cannot be reached, is skipped until the
+  next check; with no usable replica, reads go to the primary.
+- The response cache does not store responses read from a replica within `DB_REPLICA_MAX_LAG` seconds of an
+  invalidation, so a stale replica read cannot outlive the lag (see `api/services/response_cache.py`).
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Classes:
+--------
+- ReplicaRouter
+    The router (listed in `DATABASE_ROUTERS`).
+- ReplicaReadMixin
+    Viewset mixin that lets the GET requests of a viewset read from replicas.
+- ReplicaRoutingMiddleware
+    Tracks writes per request and pins the user to the primary after them (sync and async).
+
+Functions:
+----------
+- pin_user(user_id) / is_pinned(user_id)
+    Pin a user's reads to the primary / check whether they are pinned.
+- reading_from_replicas()
+    Returns True while the current request may read from replicas.
+- enable_replica_reads(user)
+    Lets the reads of the current request go to replicas, unless the user is pinned.
+"""
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+PIN_KEY = 'db_replica:pin:{}'
+
+# Seconds the primary has been ahead of a replica (0 when the replica has replayed everything it received)
+POSTGRES_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+# Routing state of the current request: {'replica_reads': bool, 'wrote': bool}, or None outside a request
+_request_state = ContextVar('replica_routing_state', default=None)
+
+# Per-process replica health: alias -> (checked_at, usable)
+_replica_health = {}
+_health_lock = threading.Lock()
+
+
+def pin_user(user_id):
+    """
+    Send a user's reads to the primary for `DB_REPLICA_PIN_SECONDS`.
+
+    :param user_id: The ID of the user who wrote.
+    :return: None
+    """
+    if settings.DATABASE_REPLICAS and settings.DB_REPLICA_PIN_SECONDS > 0:
+        cache.set(PIN_KEY.format(user_id), True, settings.DB_REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    """
+    Check whether a user's reads are pinned to the primary after a recent write.
+
+    :param user_id: The ID of the user.
+    :return: True if their reads must go to the primary.
+    """
+    return bool(settings.DATABASE_REPLICAS) and cache.get(PIN_KEY.format(user_id), False)
+
+
+def reading_from_replicas():
+    """
+    Check whether reads of the current request may go to a replica.
+
+    :return: True inside a replica-enabled GET request that has not written yet.
+    """
+    state = _request_state.get()
+    return bool(state and state['replica_reads'] and not state['wrote'] and settings.DATABASE_REPLICAS)
+
+
+def enable_replica_reads(user):
+    """
+    Let the reads of the current request go to replicas, unless the user wrote recently.
+
+    Call it once the user is authenticated, and only for requests that do not write.
+
+    :param user: The authenticated user, or an anonymous user.
+    :return: None
+    """
+    state = _request_state.get()
+    if state is not None:
+        state['replica_reads'] = not (user.is_authenticated and is_pinned(user.pk))
+
+
+def _measure_lag(alias):
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0  # Local SQLite copies used for testing do not replicate
+    with connection.cursor() as cursor:
+        cursor.execute(POSTGRES_LAG_SQL)
+        lag = cursor.fetchone()[0]
+    return float(lag or 0)
+
+
+def _is_usable(alias):
+    """
+    Check (or reuse the recent check of) whether a replica is reachable and within the allowed lag.
+    """
+    now = time.monotonic()
+    with _health_lock:
+        checked = _replica_health.get(alias)
+    if checked and now - checked[0] < settings.DB_REPLICA_LAG_CHECK_INTERVAL:
+        return checked[1]
+
+    try:
+        lag = _measure_lag(alias)
+        usable = lag <= settings.DB_REPLICA_MAX_LAG
+        if not usable:
+            logger.warning('Replica %s is %.1f s behind, reading from the primary', alias, lag)
+    except DatabaseError:
+        logger.warning('Replica %s is unavailable, reading from the primary', alias, exc_info=True)
+        usable = False
+    with _health_lock:
+        _replica_health[alias] = (now, usable)
+    return usable
+
+
+class ReplicaRouter:
+    """
+    Routes the reads of replica-enabled requests to a usable replica and everything else to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not reading_from_replicas():
+            return DEFAULT_DB_ALIAS
+        replicas = [alias for alias in settings.DATABASE_REPLICAS if _is_usable(alias)]
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['wrote'] = True  # Later reads of this request must see the write
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+
+class ReplicaReadMixin:
+    """
+    Viewset mixin letting GET/HEAD/OPTIONS requests read from replicas, unless the user is pinned to the primary.
+
+    The user is authenticated (on the primary) before replica reads are enabled.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            enable_replica_reads(request.user)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Gives every request its routing state and pins signed-in users to the primary after they write.
+
+    Works under WSGI and ASGI. Sync views run by the ASGI handler get a copy of the request context, which
+    shares the same state dict, so their writes are seen here too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        state = {'replica_reads': False, 'wrote': False}
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        if state['wrote']:
+            self._pin_writer(request)
+        return response
+
+    async def __acall__(self, request):
+        state = {'replica_reads': False, 'wrote': False}
+        token = _request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        if state['wrote']:
+            # The session user is loaded lazily, which needs the database
+            await sync_to_async(self._pin_writer)(request)
+        return response
+
+    def _pin_writer(self, request):
+        # DRF copies the user it authenticated (e.g. from a JWT) onto the Django request
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin_user(user.pk)
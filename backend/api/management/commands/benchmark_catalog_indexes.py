@@ -0,0 +1,245 @@
+"""
+benchmark_catalog_indexes.py
+
+Management command to check that every catalog query shape is answered from an index.
+
+It runs the queries behind the public catalog (each sort, first page and a cursor page, and the genre/language
+filters), the top books lists, book details, comment threads and favorites against the current database. For
+each one it prints whether the query plan (`EXPLAIN`) reads an index or scans the whole table, and the median
+time over a few runs.
+
+Query plans depend on the table size, so seed a realistic dataset first. Seeded rows belong to a dedicated
+'catalog-benchmark' user, are inserted with `bulk_create` (no search entries or S3 files) and can be
+removed again with `--cleanup`.
+
+Usage:
+    python manage.py benchmark_catalog_indexes --seed 1000000   # Add 1M books (plus comments and favorites)
+    python manage.py benchmark_catalog_indexes                  # Explain and time every query shape
+    python manage.py benchmark_catalog_indexes -v 2             # Also print the query plans
+    python manage.py benchmark_catalog_indexes --fail-on-scan   # Exit with an error if a shape scans a table
+    python manage.py benchmark_catalog_indexes --cleanup        # Remove the seeded rows
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+import random
+import re
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from api.models.book import Book
+from api.models.comment import Comment
+from api.models.favoriteBooks import FavoriteBook
+from api.services import catalog_terms, response_cache, search, site_statistics
+from api.services.pagination import encode_cursor, keyset_queryset, with_tiebreaker
+from api.views.book.book_public import SORT_OPTIONS
+from api.views.favorites.fav_crud import FAVORITES_ORDERING
+
+BENCHMARK_USERNAME = 'catalog-benchmark'
+GENRES = ['Fantasy', 'Science Fiction', 'Mystery', 'Romance', 'History', 'Biography', 'Poetry', 'Horror', 'Travel', 'Children']
+LANGUAGES = ['English', 'French', 'Spanish', 'German', 'Japanese', 'Portuguese']
+PAGE_SIZE = 10
+
+# Plan lines that mean an index was used, and lines that mean a whole api_* table was read
+INDEX_PATTERNS = {
+    'postgresql': re.compile(r'Index (Only )?Scan|Bitmap Index Scan'),
+    'sqlite': re.compile(r'USING (COVERING )?INDEX|USING INTEGER PRIMARY KEY'),
+}
+SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on api_\w+'),
+    'sqlite': re.compile(r'\bSCAN api_\w+\s*$', re.MULTILINE),
+}
+
+
+class Command(BaseCommand):
+    help = 'Explain and time the catalog, comment and favorites queries to check that they use indexes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Add this many synthetic books before benchmarking.')
+        parser.add_argument('--comment-books', type=int, default=1000, help='Number of seeded books that get comments.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query used for the median time.')
+        parser.add_argument('--fail-on-scan', action='store_true', help='Fail if any query scans a whole table.')
+        parser.add_argument('--cleanup', action='store_true', help='Remove the seeded rows and exit.')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            self.cleanup()
+            return
+        if options['seed']:
+            self.seed(options['seed'], options['comment_books'])
+
+        if not Book.objects.exists():
+            raise CommandError('There are no books to benchmark. Seed some with --seed.')
+
+        self.stdout.write(f'{Book.objects.count()} books, {Comment.objects.count()} comments ({connection.vendor})')
+        scans = []
+        for name, queryset in self.query_shapes():
+            plan = queryset.explain()
+            uses_index = self.uses_index(plan)
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                list(queryset.all())  # A fresh clone, so the rows are fetched again
+                timings.append((time.perf_counter() - start) * 1000)
+
+            status = self.style.SUCCESS('index') if uses_index else self.style.ERROR('scan ')
+            self.stdout.write(f'{name:<45} {status} {statistics.median(timings):9.2f} ms')
+            if options['verbosity'] >= 2:
+                self.stdout.write('    ' + plan.replace('\n', '\n    '))
+            if not uses_index:
+                scans.append(name)
+
+        if scans and options['fail_on_scan']:
+            raise CommandError(f"Queries that scan a whole table: {', '.join(scans)}")
+
+    def uses_index(self, plan):
+        """
+        Check whether a query plan reads indexes instead of scanning whole api_* tables.
+        """
+        index_pattern = INDEX_PATTERNS.get(connection.vendor)
+        scan_pattern = SCAN_PATTERNS.get(connection.vendor)
+        if index_pattern is None:
+            return True  # Unknown plan format: nothing to check
+        return bool(index_pattern.search(plan)) and not scan_pattern.search(plan)
+
+    def query_shapes(self):
+        """
+        Yield (name, queryset) for each query the catalog endpoints run.
+        """
+        books = Book.objects.with_owner()
+        for sort_name, ordering in SORT_OPTIONS.items():
+            if sort_name == 'relevance':
+                continue  # Needs a search query, served by the full-text index
+            ordering = with_tiebreaker(ordering)
+            first_page = keyset_queryset(books, sort_name, ordering)
+            yield f'catalog {sort_name}', first_page[:PAGE_SIZE + 1]
+
+            # A cursor from deep in the catalog, where offset pagination would be slow
+            middle = first_page[Book.objects.count() // 2]
+            cursor = encode_cursor(sort_name, [getattr(middle, field) for field, _ in ordering])
+            yield f'catalog {sort_name} (cursor)', keyset_queryset(books, sort_name, ordering, cursor)[:PAGE_SIZE + 1]
+
+        newest_first = keyset_queryset(books, 'most_recent', with_tiebreaker(SORT_OPTIONS['most_recent']))
+        genre, language = Book.objects.values_list('genre', 'language').first()
+        yield 'catalog genre filter', catalog_terms.filter_books(newest_first, 'genre', genre)[:PAGE_SIZE]
+        yield 'catalog language filter', catalog_terms.filter_books(newest_first, 'language', language)[:PAGE_SIZE]
+
+        yield 'top n most viewed', books.order_by('-views')[:5]
+        yield 'top n most recent', books.order_by('-created_at')[:5]
+        yield 'book details', books.filter(pk=Book.objects.values_list('pk', flat=True).first())
+
+        book_id = (
+            Comment.objects.values('book_id').annotate(total=Count('id')).order_by('-total')
+            .values_list('book_id', flat=True).first()
+        )
+        if book_id is not None:
+            yield 'comment thread', (
+                Comment.objects.filter(book_id=book_id)
+                .select_related('user', 'user__profile_picture')
+                .order_by('created_at', 'id')
+            )
+            yield 'top-level comments', Comment.objects.filter(book_id=book_id, parent_comment__isnull=True).order_by('created_at')
+            parent_id = Comment.objects.filter(book_id=book_id, parent_comment__isnull=True).values_list('pk', flat=True).first()
+            yield 'comment replies', Comment.objects.filter(book_id=book_id, parent_comment_id=parent_id)
+
+        user_id = FavoriteBook.objects.values_list('user_id', flat=True).first()
+        if user_id is not None:
+            favorites = (
+                FavoriteBook.objects.filter(user_id=user_id)
+                .select_related('book__owner', 'book__owner__profile_picture')
+            )
+            first_page = keyset_queryset(favorites, 'favorited', with_tiebreaker(FAVORITES_ORDERING))
+            yield 'favorites', first_page[:PAGE_SIZE + 1]
+            middle = first_page[PAGE_SIZE:PAGE_SIZE + 1].first()
+            if middle is not None:
+                cursor = encode_cursor('favorited', [middle.created_at, middle.pk])
+                yield 'favorites (cursor)', keyset_queryset(
+                    favorites, 'favorited', with_tiebreaker(FAVORITES_ORDERING), cursor
+                )[:PAGE_SIZE + 1]
+
+    def seed(self, count, comment_books):
+        """
+        Insert synthetic books, comments and favorites owned by the benchmark user.
+        """
+        owner, created = User.objects.get_or_create(username=BENCHMARK_USERNAME)
+        if created:
+            owner.set_unusable_password()
+            owner.save()
+
+        rng = random.Random(count)
+        batch_size = 10000
+        for start in range(0, count, batch_size):
+            Book.objects.bulk_create([
+                Book(
+                    title=f'Benchmark book {rng.getrandbits(40):010x}',
+                    description='Synthetic book for the index benchmark.',
+                    author=f'Author {rng.randrange(50000)}',
+                    genre=rng.choice(GENRES),
+                    language=rng.choice(LANGUAGES),
+                    views=rng.randrange(100000),
+                    downloads=rng.randrange(20000),
+                    favorites_count=rng.randrange(500),
+                    trending_score=rng.random() * 1000 if rng.random() < 0.1 else 0.0,
+                    content_url='https://example.invalid/benchmark',
+                    owner=owner,
+                )
+                for _ in range(start, min(start + batch_size, count))
+            ])
+            self.stdout.write(f'Seeded {min(start + batch_size, count)}/{count} books', ending='\r')
+        self.stdout.write('')
+
+        book_ids = list(Book.objects.filter(owner=owner).order_by('-id').values_list('pk', flat=True)[:comment_books])
+        with transaction.atomic():
+            roots = Comment.objects.bulk_create([
+                Comment(book_id=book_id, user=owner, content='Benchmark comment')
+                for book_id in book_ids for _ in range(10)
+            ])
+            Comment.objects.bulk_create([
+                Comment(book_id=root.book_id, user=owner, content='Benchmark reply', parent_comment=root)
+                for root in roots
+            ])
+            FavoriteBook.objects.bulk_create(
+                [FavoriteBook(user=owner, book_id=book_id) for book_id in book_ids],
+                ignore_conflicts=True,
+            )
+
+        self.invalidate()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')  # Refresh the planner statistics for the new rows
+        self.stdout.write(self.style.SUCCESS(f'Seeded {count} books and comments on {len(book_ids)} of them.'))
+
+    def cleanup(self):
+        """
+        Delete the benchmark user and everything it owns.
+        """
+        owner = User.objects.filter(username=BENCHMARK_USERNAME).first()
+        if owner is None:
+            self.stdout.write('Nothing to clean up.')
+            return
+
+        books = Book.objects.filter(owner=owner)
+        with transaction.atomic():
+            # Raw deletes skip collecting millions of rows for signals; seeded rows have no files or search entries
+            favorites = FavoriteBook.objects.filter(book__in=books) | FavoriteBook.objects.filter(user=owner)
+            favorites._raw_delete(connection.alias)
+            Comment.objects.filter(book__in=books)._raw_delete(connection.alias)
+            deleted = books._raw_delete(connection.alias)
+            owner.delete()
+
+        if search.is_supported():
+            search.rebuild_index()
+        self.invalidate()
+        self.stdout.write(self.style.SUCCESS(f'Removed {deleted} benchmark books.'))
+
+    def invalidate(self):
+        # Bulk inserts and raw deletes skip the signals that keep these up to date
+        catalog_terms.rebuild()
+        site_statistics.mark_stale()
+        response_cache.bump('books')
@@ -0,0 +1,148 @@
+"""
+benchmark_db_connections.py
+
+Management command to measure how much of the request time goes into getting database connections.
+
+It sends requests to an API path through the full Django request handler, closing connections at the start and
+end of each request exactly like a WSGI server does (`close_old_connections`, which honours `CONN_MAX_AGE` and
+the health checks), with the response cache turned off so every request reaches the database. Worker threads
+stand in for gunicorn threads.
+
+Two runs are compared:
+- 'per request': `CONN_MAX_AGE=0` without a pool, i.e. a new connection for every request (the old setup).
+- 'configured': the current database settings (persistent connections, or the psycopg pool with `DB_POOL`).
+
+For each run it prints the throughput, the latency percentiles, how many connections were opened (or checked
+out of the pool) and, on PostgreSQL, the time spent getting them. With connection reuse working, 'configured'
+should open about one connection per thread and spend no connection time per request. The pool cannot be
+turned off inside a running process, so with `DB_POOL=True` only the configured run is measured.
+
+Usage:
+    python manage.py benchmark_db_connections
+    python manage.py benchmark_db_connections --requests 2000 --threads 8
+    python manage.py benchmark_db_connections --path "/api/public/books/?sort_by=trending"
+    python manage.py benchmark_db_connections --conn-max-age 60   # Try persistent connections without the setting
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, connections
+from django.test import Client, override_settings
+
+from api.services import db_connections
+
+
+class Command(BaseCommand):
+    help = 'Compare request latency with a new database connection per request and with the configured reuse.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Number of requests per run.')
+        parser.add_argument('--threads', type=int, default=4, help='Number of concurrent request threads.')
+        parser.add_argument('--path', default='/api/public/books/', help='API path to request.')
+        parser.add_argument(
+            '--conn-max-age', type=int, default=None,
+            help='Use this CONN_MAX_AGE for the configured run instead of the setting (e.g. to try it on SQLite).',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['threads'] < 1:
+            raise CommandError('--requests and --threads must be at least 1.')
+
+        pooled = connection.settings_dict['OPTIONS'].get('pool')
+        self.stdout.write(
+            f"{connection.vendor}, CONN_MAX_AGE={connection.settings_dict['CONN_MAX_AGE']}, "
+            f"pool={'on' if pooled else 'off'}, {options['threads']} threads, {options['requests']} requests"
+        )
+
+        runs = [('configured', options['conn_max_age'])]
+        if not pooled:
+            runs.insert(0, ('per request', 0))
+        with override_settings(RESPONSE_CACHE_TIMEOUT=0):
+            for name, conn_max_age in runs:
+                self.report(name, self.run(options['path'], options['requests'], options['threads'], conn_max_age))
+
+        if connection.vendor != 'postgresql':
+            self.stdout.write('Connection times are only recorded by the api.db.postgresql engine.')
+
+    def run(self, path, total, thread_count, conn_max_age):
+        """
+        Send `total` requests from `thread_count` threads and collect the latencies and connection counters.
+        """
+        original = connection.settings_dict['CONN_MAX_AGE']
+        if conn_max_age is not None:
+            connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+        connections.close_all()
+        db_connections.reset()
+
+        host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '') and not host.startswith('.')), 'localhost')
+        latencies, errors = [], []
+        remaining = iter(range(total))
+        lock = threading.Lock()
+
+        def worker():
+            client = Client(SERVER_NAME=host)
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    started = time.perf_counter()
+                    close_old_connections()  # request_started
+                    response = client.get(path)
+                    close_old_connections()  # request_finished
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        latencies.append(elapsed * 1000)
+                        if response.status_code >= 400:
+                            errors.append(response.status_code)
+            finally:
+                connections.close_all()  # Thread-local connections would otherwise leak
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(thread_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - started
+
+        connection.settings_dict['CONN_MAX_AGE'] = original
+        return {
+            'duration': duration,
+            'latencies': sorted(latencies),
+            'errors': errors,
+            'stats': db_connections.stats()['databases'][connection.alias],
+        }
+
+    def report(self, name, result):
+        latencies = result['latencies']
+        count = len(latencies)
+        stats = result['stats']
+        p95 = latencies[min(count - 1, int(count * 0.95))]
+        self.stdout.write(
+            f"{name:<12} {count / result['duration']:8.1f} req/s   "
+            f"p50 {statistics.median(latencies):7.2f} ms   p95 {p95:7.2f} ms   "
+            f"{stats['connects']:5d} connections"
+        )
+        if stats['connect_ms']:
+            per_request = stats['connect_ms']['total'] / count
+            self.stdout.write(
+                f"{'':<12} connecting: {stats['connect_ms']['mean']:.2f} ms each, {per_request:.2f} ms per request "
+                f"({per_request / statistics.mean(latencies):.1%} of the request time)"
+            )
+        if stats['pool']:
+            pool = stats['pool']
+            self.stdout.write(
+                f"{'':<12} pool: {pool['checkouts']} checkouts, {pool['wait_ms_mean']:.2f} ms mean wait, "
+                f"{pool['timeouts']} timeouts, {pool['connections_opened']} connections opened"
+            )
+        if result['errors']:
+            self.stdout.write(self.style.WARNING(f"{'':<12} {len(result['errors'])} error responses ({result['errors'][0]} first)"))
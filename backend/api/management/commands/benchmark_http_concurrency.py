@@ -0,0 +1,207 @@
+"""
+benchmark_http_concurrency.py
+
+Management command to compare the public read API served by a WSGI server and by an ASGI server with the async
+views, under many concurrent clients.
+
+For each server it starts gunicorn on a local port with the same number of worker processes:
+- 'wsgi': `backend.wsgi` with `--threads` threads per worker and the DRF viewsets.
+- 'asgi': `backend.asgi` with uvicorn workers and `ASYNC_PUBLIC_VIEWS=True`.
+
+It then opens `--concurrency` keep-alive connections that send `--requests` GET requests in total and prints the
+throughput, the latency percentiles and the errors. The response cache is turned off in the servers (unless
+`--cache` is given), so every request reaches the database. With `--url` it measures an already running server
+instead.
+
+A WSGI worker serves at most `--threads` requests at a time and the other clients wait for a free thread; an
+async worker keeps serving while requests wait on the database, so the difference shows in the tail latency at
+high concurrency. Both use the configured database, so run it against PostgreSQL for numbers close to production.
+
+Usage:
+    python manage.py benchmark_http_concurrency
+    python manage.py benchmark_http_concurrency --concurrency 200 --requests 5000 --workers 2 --threads 4
+    python manage.py benchmark_http_concurrency --path "/api/public-comments/1/" --server asgi
+    python manage.py benchmark_http_concurrency --url http://127.0.0.1:8000/api/public/books/
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+import asyncio
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SERVERS = {
+    'wsgi': ['backend.wsgi:application'],
+    'asgi': ['backend.asgi:application', '--worker-class', 'uvicorn.workers.UvicornWorker'],
+}
+
+# Seconds to wait for a started server to accept connections
+STARTUP_TIMEOUT = 30
+
+
+class Command(BaseCommand):
+    help = 'Compare the public API under a WSGI server and an ASGI server (async views) with many concurrent clients.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/public/books/', help='API path to request.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Number of concurrent client connections.')
+        parser.add_argument('--requests', type=int, default=1000, help='Number of requests per server.')
+        parser.add_argument('--server', choices=['wsgi', 'asgi', 'both'], default='both', help='Server(s) to start.')
+        parser.add_argument('--workers', type=int, default=2, help='Worker processes per server.')
+        parser.add_argument('--threads', type=int, default=4, help='Threads per WSGI worker.')
+        parser.add_argument('--port', type=int, default=8765, help='Local port for the started servers.')
+        parser.add_argument('--timeout', type=float, default=30, help='Seconds to wait for a response.')
+        parser.add_argument('--cache', action='store_true', help='Keep the response cache on in the servers.')
+        parser.add_argument('--url', help='Measure the server at this URL instead of starting servers.')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be at least 1.')
+
+        if options['url']:
+            url = urlsplit(options['url'])
+            if url.scheme != 'http' or not url.hostname:
+                raise CommandError('--url must be an http:// URL.')
+            path = (url.path or '/') + (f'?{url.query}' if url.query else '')
+            result = self.load(url.hostname, url.port or 80, url.netloc, path, options)
+            self.report(url.netloc, result)
+            return
+
+        names = ['wsgi', 'asgi'] if options['server'] == 'both' else [options['server']]
+        if 'asgi' in names and importlib.util.find_spec('uvicorn') is None:
+            raise CommandError('The ASGI server needs uvicorn (pip install -r requirements.txt).')
+
+        host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '') and not host.startswith('.')), 'localhost')
+        self.stdout.write(
+            f"{options['path']}: {options['workers']} workers ({options['threads']} threads for WSGI), "
+            f"{options['concurrency']} connections, {options['requests']} requests, "
+            f"response cache {'on' if options['cache'] else 'off'}"
+        )
+        for name in names:
+            server = self.start_server(name, options)
+            try:
+                self.report(name, self.load('127.0.0.1', options['port'], host, options['path'], options))
+            finally:
+                server.terminate()
+                server.wait(timeout=STARTUP_TIMEOUT)
+
+    def start_server(self, name, options):
+        """
+        Start gunicorn for one server type and wait until it accepts connections.
+        """
+        env = dict(os.environ, ASYNC_PUBLIC_VIEWS=str(name == 'asgi'))
+        if not options['cache']:
+            env['RESPONSE_CACHE_TIMEOUT'] = '0'
+        command = [
+            sys.executable, '-m', 'gunicorn', *SERVERS[name],
+            '--bind', f"127.0.0.1:{options['port']}",
+            '--workers', str(options['workers']),
+            '--log-level', 'warning',
+        ]
+        if name == 'wsgi':
+            command += ['--threads', str(options['threads'])]
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'The {name} server exited with code {server.returncode}.')
+            try:
+                socket.create_connection(('127.0.0.1', options['port']), timeout=1).close()
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError(f'The {name} server did not start within {STARTUP_TIMEOUT} seconds.')
+
+    def load(self, address, port, host, path, options):
+        """
+        Send the requests from concurrent connections and collect the latencies and errors.
+        """
+        request = (
+            f'GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: application/json\r\nConnection: keep-alive\r\n\r\n'
+        ).encode()
+        return asyncio.run(_run_load(address, port, request, options['requests'], options['concurrency'], options['timeout']))
+
+    def report(self, name, result):
+        latencies = result['latencies']
+        count = len(latencies)
+        if not count:
+            self.stdout.write(self.style.ERROR(f"{name:<6} no successful requests ({dict(result['errors'])})"))
+            return
+        p95 = latencies[min(count - 1, int(count * 0.95))]
+        p99 = latencies[min(count - 1, int(count * 0.99))]
+        self.stdout.write(
+            f"{name:<6} {count / result['duration']:8.1f} req/s   p50 {statistics.median(latencies):8.2f} ms   "
+            f"p95 {p95:8.2f} ms   p99 {p99:8.2f} ms   max {latencies[-1]:8.2f} ms"
+        )
+        if result['errors']:
+            self.stdout.write(self.style.WARNING(f"{'':<6} errors: {dict(result['errors'])}"))
+
+
+async def _run_load(address, port, request, total, concurrency, timeout):
+    latencies, errors = [], Counter()
+    remaining = total
+
+    async def client():
+        nonlocal remaining
+        reader = writer = None
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(address, port)
+                writer.write(request)
+                status, keep_alive = await asyncio.wait_for(_read_response(reader), timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                errors[type(e).__name__] += 1
+                keep_alive = False
+            else:
+                latencies.append((time.perf_counter() - started) * 1000)
+                if status >= 400:
+                    errors[status] += 1
+            if not keep_alive and writer is not None:
+                writer.close()
+                writer = None
+        if writer is not None:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(min(concurrency, total))))
+    return {'duration': time.perf_counter() - started, 'latencies': sorted(latencies), 'errors': errors}
+
+
+async def _read_response(reader):
+    """
+    Read one HTTP/1.1 response. Returns the status code and whether the connection can be reused.
+    """
+    status_line = await reader.readuntil(b'\r\n')
+    status = int(status_line.split()[1])
+    headers = {}
+    while (line := await reader.readuntil(b'\r\n')) != b'\r\n':
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip().lower()
+
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while size := int((await reader.readuntil(b'\r\n')).split(b';')[0], 16):
+            await reader.readexactly(size + 2)
+        await reader.readuntil(b'\r\n')  # The end of the last chunk (no trailers are sent)
+    else:
+        await reader.read()  # The body ends when the server closes the connection
+        return status, False
+    return status, headers.get('connection') != 'close'
@@ -0,0 +1,38 @@
+"""
+decay_trending_scores.py
+
+Management command to apply one interval of decay to the trending scores of books.
+
+The decay normally runs as a recurring background job (`books.decay_trending`, see `api/services/trending.py`)
+that is queued automatically once books get views or downloads. Use `--schedule` to queue it by hand, e.g. after
+clearing the job table, or run the command from cron instead of the job worker.
+
+Usage:
+    python manage.py decay_trending_scores             # Decay the scores now
+    python manage.py decay_trending_scores --schedule  # Queue the recurring decay job
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+from django.core.management.base import BaseCommand
+
+from api.services import response_cache, trending
+
+
+class Command(BaseCommand):
+    help = 'Decay the trending scores of books by one interval, or queue the recurring decay job.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schedule', action='store_true', help='Queue the recurring decay job instead.')
+
+    def handle(self, *args, **options):
+        if options['schedule']:
+            trending.schedule_decay()
+            self.stdout.write(self.style.SUCCESS('Trending decay job queued.'))
+            return
+
+        updated = trending.decay()
+        response_cache.bump('books')
+        self.stdout.write(self.style.SUCCESS(f'Decayed the trending scores of {updated} books.'))
@@ -0,0 +1,52 @@
+"""
+generate_image_variants.py
+
+Management command to create the resized copies of cover art and profile pictures that do not have them yet
+(e.g. images uploaded before variants existed, or after IMAGE_VARIANT_WIDTHS changed).
+
+Usage:
+    python manage.py generate_image_variants          # Queue jobs for the background worker
+    python manage.py generate_image_variants --now    # Process the images in this process
+    python manage.py generate_image_variants --force  # Also redo images that already have variants
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+from django.core.management.base import BaseCommand
+
+from api.models.book import Book
+from api.models.userProfilePicture import UserProfilePicture
+from api.services import images, jobs
+
+
+class Command(BaseCommand):
+    help = 'Create resized copies of cover art and profile pictures that are missing them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--now', action='store_true', help='Process the images now instead of queueing jobs.')
+        parser.add_argument('--force', action='store_true', help='Regenerate variants that already exist.')
+
+    def handle(self, *args, **options):
+        targets = [
+            (Book, 'cover_art_url', 'cover_art_variants', 'images.book_cover_variants', 'book_id'),
+            (UserProfilePicture, 'profile_image_url', 'variants', 'images.profile_picture_variants', 'profile_picture_id'),
+        ]
+        for model, url_field, variants_field, job_name, payload_key in targets:
+            count = 0
+            rows = model.objects.exclude(**{f'{url_field}__isnull': True}).exclude(**{url_field: ''})
+            for pk, image_url, variants in rows.values_list('pk', url_field, variants_field).iterator():
+                if not options['force'] and not images.needs_variants(image_url, variants):
+                    continue
+                if options['now']:
+                    try:
+                        jobs.registry[job_name](**{payload_key: pk, 'force': options['force']})
+                    except Exception as error:
+                        self.stderr.write(f'{model.__name__} {pk}: {error}')
+                        continue
+                else:
+                    jobs.enqueue(job_name, {payload_key: pk, 'force': options['force']})
+                count += 1
+            self.stdout.write(f'{model.__name__}: {count} images {"processed" if options["now"] else "queued"}.')
+        self.stdout.write(self.style.SUCCESS('Done.'))
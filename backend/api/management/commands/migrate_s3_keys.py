@@ -0,0 +1,121 @@
+"""
+migrate_s3_keys.py
+
+Management command to move existing files to content-addressed keys with long-lived caching.
+
+Files uploaded before content-addressed keys (see `api/aws/upload.py`) were stored under random keys with
+`Cache-Control: no-cache`, and some were overwritten in place. This command hashes each such file, copies it
+server-side to its content-addressed key with the current `AWS_S3_CACHE_CONTROL` header and points the row at the
+new URL. Saving the row also queues new image variants.
+
+The old objects are kept by default so existing links (bookmarks, cached pages, shared URLs) keep working.
+Pass `--retire-old` to queue their deletion once the rows have moved.
+
+Usage:
+    python manage.py migrate_s3_keys --dry-run
+    python manage.py migrate_s3_keys [--limit N] [--retire-old]
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+import hashlib
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.aws.client import get_s3_client, s3_key_from_url, s3_url_for_key
+from api.aws.upload import CONTENT_HASH_LENGTH, build_file_key, retire_files, upload_extra_args
+from api.models.book import Book
+from api.models.userProfilePicture import UserProfilePicture
+
+# '<owner>_<prefix>_<hash>_<name>' file names are already content-addressed
+CONTENT_ADDRESSED_NAME = re.compile(rf'^\d+_(content|cover_art|profile_image)_[0-9a-f]{{{CONTENT_HASH_LENGTH}}}_')
+# '<owner>_<prefix>_<uuid>_<name>' file names from random keys
+RANDOM_NAME = re.compile(r'^\d+_(content|cover_art|profile_image)_[0-9a-f-]{36}_(?P<name>.+)$')
+
+
+def original_file_name(file_key):
+    """
+    Recover the uploaded file name from an object key.
+    """
+    base_name = posixpath.basename(file_key)
+    match = RANDOM_NAME.match(base_name)
+    return match.group('name') if match else base_name
+
+
+def object_hash(file_key):
+    """
+    Stream an object from S3 and return its content hash and content type.
+    """
+    response = get_s3_client().get_object(Bucket=settings.AWS_S3_BUCKET_NAME, Key=file_key)
+    digest = hashlib.sha256()
+    with response['Body'] as body:
+        for chunk in iter(lambda: body.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:CONTENT_HASH_LENGTH], response.get('ContentType')
+
+
+class Command(BaseCommand):
+    help = 'Copy files with random keys to content-addressed keys with immutable caching, and update their URLs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the files that would be moved.')
+        parser.add_argument('--limit', type=int, default=None, help='Move at most this many files.')
+        parser.add_argument('--retire-old', action='store_true', help='Queue the deletion of the old objects.')
+
+    def targets(self):
+        """
+        Yield (row, url field, owner ID, key prefix) for every stored file.
+        """
+        for book in Book.objects.iterator():
+            yield book, 'content_url', book.owner_id, 'content'
+            yield book, 'cover_art_url', book.owner_id, 'cover_art'
+        for picture in UserProfilePicture.objects.iterator():
+            yield picture, 'profile_image_url', picture.user_id, 'profile_image'
+
+    def handle(self, *args, **options):
+        moved, failed = 0, 0
+        for row, field, owner_id, prefix in self.targets():
+            if options['limit'] is not None and moved >= options['limit']:
+                break
+
+            old_url = getattr(row, field)
+            if not old_url or not old_url.startswith(s3_url_for_key('')):
+                continue  # No file, or not a file in our bucket
+            old_key = s3_key_from_url(old_url)
+            if CONTENT_ADDRESSED_NAME.match(posixpath.basename(old_key)):
+                continue
+
+            if options['dry_run']:
+                self.stdout.write(f'Would move {old_key}')
+                moved += 1
+                continue
+
+            try:
+                digest, content_type = object_hash(old_key)
+                new_key = build_file_key(owner_id, prefix, digest, original_file_name(old_key))
+                get_s3_client().copy_object(
+                    Bucket=settings.AWS_S3_BUCKET_NAME,
+                    Key=new_key,
+                    CopySource={'Bucket': settings.AWS_S3_BUCKET_NAME, 'Key': old_key},
+                    MetadataDirective='REPLACE',
+                    **upload_extra_args(content_type or 'application/octet-stream'),
+                )
+            except Exception as error:
+                self.stderr.write(f'Failed to move {old_key}: {error}')
+                failed += 1
+                continue
+
+            setattr(row, field, s3_url_for_key(new_key))
+            row.save(update_fields=[field])
+            if options['retire_old']:
+                retire_files([old_url])
+            self.stdout.write(f'Moved {old_key} -> {new_key}')
+            moved += 1
+
+        verb = 'would be moved' if options['dry_run'] else 'moved'
+        self.stdout.write(self.style.SUCCESS(f'{moved} files {verb}, {failed} failed.'))
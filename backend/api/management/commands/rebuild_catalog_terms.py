@@ -0,0 +1,33 @@
+"""
+rebuild_catalog_terms.py
+
+Management command to relink every book to its normalized genre and language and recount their books.
+
+The links and counts are kept up to date when books are saved or deleted through the ORM. Run this after bulk
+imports, raw SQL edits or anything else that bypasses the model signals.
+
+Usage:
+    python manage.py rebuild_catalog_terms
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+from django.core.management.base import BaseCommand
+
+from api.models.catalogTerm import Genre, Language
+from api.services import catalog_terms, response_cache, site_statistics
+
+
+class Command(BaseCommand):
+    help = 'Relink books to their normalized genre and language and recompute the book counts.'
+
+    def handle(self, *args, **options):
+        catalog_terms.rebuild()
+        site_statistics.mark_stale()
+        response_cache.bump('books')
+        self.stdout.write(self.style.SUCCESS(
+            f'{Genre.objects.filter(book_count__gt=0).count()} genres and '
+            f'{Language.objects.filter(book_count__gt=0).count()} languages in use.'
+        ))
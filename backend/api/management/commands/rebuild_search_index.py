@@ -0,0 +1,32 @@
+"""
+rebuild_search_index.py
+
+Management command to rebuild the full-text search index for books.
+
+Usage:
+    python manage.py rebuild_search_index
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.models.book import Book
+from api.services import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over book titles, authors and descriptions.'
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            self.stdout.write(self.style.WARNING(
+                f"The '{connection.vendor}' database has no search index; searches use icontains filters."
+            ))
+            return
+
+        search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {Book.objects.count()} books.'))
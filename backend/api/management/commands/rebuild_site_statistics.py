@@ -0,0 +1,26 @@
+"""
+rebuild_site_statistics.py
+
+Management command to rebuild the site statistics snapshot.
+
+Usage:
+    python manage.py rebuild_site_statistics
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+from django.core.management.base import BaseCommand
+
+from api.services import site_statistics
+
+
+class Command(BaseCommand):
+    help = 'Recompute the site statistics snapshot served by the site_statistics endpoint.'
+
+    def handle(self, *args, **options):
+        snapshot = site_statistics.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt site statistics for {snapshot['total_books']} books."
+        ))
@@ -0,0 +1,67 @@
+"""
+run_jobs.py
+
+Management command that runs the background job worker.
+
+Run one or more worker processes next to the web server (see infrastructure/README.md). On SIGTERM (e.g. a
+deploy or restart) the worker finishes the jobs it has claimed before it exits.
+
+Usage:
+    python manage.py run_jobs               # Run until interrupted
+    python manage.py run_jobs --once        # Run the jobs that are due now and exit
+    python manage.py run_jobs --purge-days 7  # Also delete succeeded jobs older than 7 days
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+import signal
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from api.models.backgroundJob import BackgroundJob
+from api.services import jobs
+
+
+class Command(BaseCommand):
+    help = 'Run the database-backed background job worker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run all due jobs once and exit.')
+        parser.add_argument('--batch-size', type=int, default=10, help='Jobs claimed per poll (default 10).')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when no jobs are due (default 1).')
+        parser.add_argument('--purge-days', type=int, default=None, help='Delete succeeded jobs older than this many days.')
+
+    def handle(self, *args, **options):
+        if options['purge_days'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['purge_days'])
+            purged, _ = BackgroundJob.objects.filter(
+                status=BackgroundJob.STATUS_SUCCEEDED, updated_at__lt=cutoff
+            ).delete()
+            self.stdout.write(f'Purged {purged} succeeded jobs.')
+
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+
+        self.stdout.write(f"Job worker started ({', '.join(sorted(jobs.registry)) or 'no handlers'}).")
+        try:
+            while not self.stopping:
+                close_old_connections()
+                ran = jobs.run_pending(options['batch_size'])
+                if ran:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write('Job worker stopped.')
+
+    def stop(self, signum, frame):
+        # Let the current batch finish; the loop exits before claiming more jobs
+        self.stopping = True
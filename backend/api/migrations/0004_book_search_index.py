@@ -0,0 +1,41 @@
+# Full-text search index for the public book catalog (see api/services/search.py)
+
+from django.db import migrations
+
+from api.services.search import POSTGRES_SEARCH_VECTOR
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("ALTER TABLE api_book ADD COLUMN search_vector tsvector")
+        schema_editor.execute(f"UPDATE api_book SET search_vector = {POSTGRES_SEARCH_VECTOR}")
+        schema_editor.execute("CREATE INDEX api_book_search_vector_gin ON api_book USING GIN (search_vector)")
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE api_book_fts USING fts5(title, author, description, prefix='2 3')"
+        )
+        schema_editor.execute(
+            "INSERT INTO api_book_fts (rowid, title, author, description) "
+            "SELECT id, title, author, description FROM api_book"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS api_book_search_vector_gin")
+        schema_editor.execute("ALTER TABLE api_book DROP COLUMN IF EXISTS search_vector")
+    elif vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS api_book_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_comment_is_deleted'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
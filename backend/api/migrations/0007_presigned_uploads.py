@@ -0,0 +1,33 @@
+# Generated by Django 5.1 on 2026-10-18 19:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='expected_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='uploadsession',
+            name='mode',
+            field=models.CharField(choices=[('multipart', 'Multipart through the API'), ('presigned', 'Presigned direct to S3')], default='multipart', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='uploadsession',
+            name='size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='part_size',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
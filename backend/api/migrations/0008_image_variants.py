@@ -0,0 +1,23 @@
+# Generated by Django 5.1 on 2026-10-18 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_presigned_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='cover_art_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='userprofilepicture',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.1 on 2026-10-18 19:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+TERM_FIELDS = {'genre': ('genre_ref', 'Genre'), 'language': ('language_ref', 'Language')}
+
+
+def link_books(apps, schema_editor):
+    # Same normalization as api/services/catalog_terms.py
+    Book = apps.get_model('api', 'Book')
+    for field, (link_field, model_name) in TERM_FIELDS.items():
+        Term = apps.get_model('api', model_name)
+        for value in Book.objects.order_by().values_list(field, flat=True).distinct():
+            key = ' '.join((value or '').split()).casefold()
+            if not key:
+                continue
+            term, _ = Term.objects.get_or_create(key=key[:255], defaults={'name': ' '.join(value.split())[:255]})
+            Book.objects.filter(**{field: value}).update(**{link_field: term})
+
+        counts = Book.objects.order_by().filter(**{f'{link_field}__isnull': False}).values_list(link_field).annotate(total=Count('id'))
+        for term_id, total in counts:
+            Term.objects.filter(pk=term_id).update(book_count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_catalog_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('book_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Language',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('book_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='genre_ref',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='books', to='api.genre'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='language_ref',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='books', to='api.language'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['genre_ref', 'created_at', 'id'], name='api_book_genre_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['language_ref', 'created_at', 'id'], name='api_book_language_created_idx'),
+        ),
+        migrations.RunPython(link_books, migrations.RunPython.noop),
+    ]
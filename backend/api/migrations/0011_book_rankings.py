@@ -0,0 +1,46 @@
+# Generated by Django 5.1 on 2026-10-18 19:48
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_favorites(apps, schema_editor):
+    Book = apps.get_model('api', 'Book')
+    FavoriteBook = apps.get_model('api', 'FavoriteBook')
+    favorites = (
+        FavoriteBook.objects.filter(book=OuterRef('pk')).order_by()
+        .values('book').annotate(total=Count('id')).values('total')
+    )
+    Book.objects.update(favorites_count=Coalesce(Subquery(favorites, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_catalog_terms'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='trending_score',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['favorites_count', 'id'], name='api_book_favorites_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['trending_score', 'id'], name='api_book_trending_id_idx'),
+        ),
+        migrations.RunPython(count_favorites, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1 on 2026-10-18 20:31
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_book_rankings'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Existing favorites get the time of the migration (the original time was not recorded)
+        migrations.AddField(
+            model_name='favoritebook',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='favoritebook',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='api_favbook_user_created_idx'),
+        ),
+    ]
@@ -1,3 +1,6 @@
 from .book import Book
+from .catalogTerm import Genre, Language
 from .comment import Comment
-from .userProfilePicture import UserProfilePicture
\ No newline at end of file
+from .userProfilePicture import UserProfilePicture
+from .backgroundJob import BackgroundJob, DeadLetterJob
+from .uploadSession import UploadSession
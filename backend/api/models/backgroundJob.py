@@ -0,0 +1,101 @@
+"""
+backgroundJob.py
+
+Models for the database-backed background job queue.
+
+This file defines the 'BackgroundJob' model, which stores work (such as S3 deletes) that views hand off so
+the request does not wait on it, and the 'DeadLetterJob' model, which keeps jobs that failed on every attempt
+so they can be inspected and replayed. Jobs are enqueued and executed by `api.services.jobs`.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+from django.db import models
+from django.utils import timezone
+
+
+class BackgroundJob(models.Model):
+    """
+    Represents a unit of work waiting for (or handled by) the job worker.
+
+    Attributes:
+        name (str): The registered name of the job handler (e.g. 's3.delete_files').
+        payload (dict): JSON arguments passed to the handler.
+        status (str): One of 'pending', 'running' or 'succeeded'.
+        idempotency_key (str): Optional unique key; enqueuing a job with an existing key is a no-op.
+        attempts (int): How many times the job has been started.
+        max_attempts (int): How many attempts are allowed before the job is dead-lettered.
+        run_after (datetime): The job is not started before this time (used for retry backoff).
+        locked_at (datetime): When a worker claimed the job (None while pending).
+        last_error (str): The error from the most recent failed attempt.
+        created_at (datetime): Timestamp for when the job was enqueued (auto-managed).
+        updated_at (datetime): Timestamp for when the job was last updated (auto-managed).
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    idempotency_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # The worker polls for due jobs by status and run_after
+            models.Index(fields=['status', 'run_after'], name='api_job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the job.
+
+        Returns:
+            str: The job name, ID and status.
+        """
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class DeadLetterJob(models.Model):
+    """
+    Represents a job that failed on every allowed attempt.
+
+    Attributes:
+        name (str): The registered name of the job handler.
+        payload (dict): The JSON arguments the job was run with.
+        idempotency_key (str): The idempotency key of the original job (if any).
+        attempts (int): How many times the job was attempted.
+        last_error (str): The error from the final attempt.
+        enqueued_at (datetime): When the original job was enqueued.
+        failed_at (datetime): When the job was moved to the dead-letter table (auto-managed).
+    """
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    enqueued_at = models.DateTimeField(null=True, blank=True)
+    failed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        """
+        Returns a string representation of the dead-lettered job.
+
+        Returns:
+            str: The job name and ID.
+        """
+        return f"{self.name} #{self.pk} (dead)"
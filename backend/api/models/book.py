@@ -8,12 +8,48 @@ the title, timestamps, cover art, content URL, and statistics such as downloads
 
 Author: Chace Nielson
 Created: 2024-08-14
-Modified: 2024-09-20
+Modified: 2026-10-18
 @since 1.0
 """
 
 from django.db import models
 from django.contrib.auth.models import User
+from .catalogTerm import Genre, Language
+
+class BookQuerySet(models.QuerySet):
+    """
+    Custom queryset for books.
+    """
+
+    def with_owner(self):
+        """
+        Load each book's owner and the owner's profile picture in the same query, so serializing
+        `owner_username` and `owner_profile_pic` does not cost extra queries per book.
+
+        Returns:
+            QuerySet: The queryset with the owner relations joined in.
+        """
+        return self.select_related('owner', 'owner__profile_picture')
+
+    def with_favorited(self, user):
+        """
+        Add an `is_favorited` flag telling whether the user has favorited each book, computed in the same
+        query with an EXISTS subquery on the (user, book) index of the favorites.
+
+        Args:
+            user (User): The user to check, or an anonymous user (the flag is then always False).
+
+        Returns:
+            QuerySet: The queryset with the `is_favorited` annotation.
+        """
+        from api.models.favoriteBooks import FavoriteBook  # favoriteBooks imports this module
+
+        if not user.is_authenticated:
+            return self.annotate(is_favorited=models.Value(False, output_field=models.BooleanField()))
+        return self.annotate(
+            is_favorited=models.Exists(FavoriteBook.objects.filter(user=user, book=models.OuterRef('pk')))
+        )
+
 
 class Book(models.Model):
     """
@@ -26,12 +62,17 @@ class Book(models.Model):
         genre (str): The genre of the book.
         published_date (date): The date the book was published.
         language (str): The language the book is written in (default is English).
+        genre_ref (ForeignKey): The normalized genre (kept in sync with `genre`, see api/services/catalog_terms.py).
+        language_ref (ForeignKey): The normalized language (kept in sync with `language`).
         updated_at (datetime): Timestamp for when the book was last updated (auto-managed).
         created_at (datetime): Timestamp for when the book was created (auto-managed).
         cover_art_url (str): URL of the book's cover art (optional).
+        cover_art_variants (dict): URLs of resized copies of the cover art (see api/services/images.py).
         content_url (str): URL of the book's content (optional).
         downloads (int): Number of times the book has been downloaded (default is 0).
         views (int): Number of times the book has been viewed (default is 0).
+        favorites_count (int): Number of users who favorited the book (kept in sync with FavoriteBook rows).
+        trending_score (float): Time-decayed activity score (see api/services/trending.py).
     """
     title = models.CharField(max_length=255)
     description = models.CharField(max_length=1000)  # Set a default and increase max_length
@@ -39,16 +80,39 @@ class Book(models.Model):
     genre = models.CharField(max_length=255, default="Unknown Genre")
     published_date = models.DateField(null=True, blank=True)  # Allow null and blank for optional dates
     language = models.CharField(max_length=100, default="English")
+    # Normalized copies of genre and language for filtering (indexed together with created_at below)
+    genre_ref = models.ForeignKey(Genre, null=True, blank=True, on_delete=models.SET_NULL, related_name='books', db_index=False)
+    language_ref = models.ForeignKey(Language, null=True, blank=True, on_delete=models.SET_NULL, related_name='books', db_index=False)
 
     downloads = models.IntegerField(default=0)
     views = models.IntegerField(default=0)
+    favorites_count = models.PositiveIntegerField(default=0)
+    trending_score = models.FloatField(default=0.0)
 
     content_url = models.URLField(max_length=200)
     cover_art_url = models.URLField(max_length=200, blank=True, null=True)
+    cover_art_variants = models.JSONField(default=dict, blank=True)  # Filled in by a background job
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, default=1)  # Example default value
 
+    objects = BookQuerySet.as_manager()
+
+    class Meta:
+        # One index per catalog sort (see SORT_OPTIONS in api/views/book/book_public.py). The ID is the
+        # pagination tiebreaker, so each sort is a single index scan (read backwards for descending sorts).
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='api_book_created_id_idx'),
+            models.Index(fields=['views', 'id'], name='api_book_views_id_idx'),
+            models.Index(fields=['downloads', 'id'], name='api_book_downloads_id_idx'),
+            models.Index(fields=['title', 'id'], name='api_book_title_id_idx'),
+            models.Index(fields=['favorites_count', 'id'], name='api_book_favorites_id_idx'),
+            models.Index(fields=['trending_score', 'id'], name='api_book_trending_id_idx'),
+            # Genre/language filters, newest first by default
+            models.Index(fields=['genre_ref', 'created_at', 'id'], name='api_book_genre_created_idx'),
+            models.Index(fields=['language_ref', 'created_at', 'id'], name='api_book_language_created_idx'),
+        ]
+
     def __str__(self):
         """
         Returns a string representation of the book.
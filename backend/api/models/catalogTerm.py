@@ -0,0 +1,56 @@
+"""
+catalogTerm.py
+
+Models for the genres and languages books are filed under.
+
+Books keep their free-text `genre` and `language` strings (the API reads and writes them unchanged), and each one
+is also linked to a 'Genre' and a 'Language' row that holds the normalized value. Catalog filters match on these
+links with an indexed equality lookup instead of `icontains` scans, and the rows keep a count of their books so
+the filter dropdowns and site statistics can list the values without scanning the book table. The links and
+counts are maintained by `api/services/catalog_terms.py`.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+from django.db import models
+
+
+class CatalogTerm(models.Model):
+    """
+    A normalized value of a free-text book field.
+
+    Attributes:
+        name (str): The value as it is displayed (the first spelling that was used).
+        key (str): The normalized value used for lookups (see `catalog_terms.normalize`).
+        book_count (int): The number of books filed under the value.
+    """
+    name = models.CharField(max_length=255)
+    key = models.CharField(max_length=255, unique=True)
+    book_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+        ordering = ['name']
+
+    def __str__(self):
+        """
+        Returns a string representation of the term.
+
+        Returns:
+            str: The display name.
+        """
+        return self.name
+
+
+class Genre(CatalogTerm):
+    """
+    A genre books are filed under.
+    """
+
+
+class Language(CatalogTerm):
+    """
+    A language books are written in.
+    """
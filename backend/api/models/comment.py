@@ -8,7 +8,7 @@ It includes fields for timestamps, content, associations with books and users, a
 
 Author: Chace Nielson
 Created: 2024-08-14
-Modified: 2024-08-14
+Modified: 2026-10-18
 @since 1.0
 """
 
@@ -38,6 +38,20 @@ class Comment(models.Model):
     user = models.ForeignKey(User, related_name='comments', on_delete=models.CASCADE)  # Reference to Django's User model
     parent_comment = models.ForeignKey('self', null=True, blank=True, related_name='replies', on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            # A book's whole thread, oldest first (see api/services/comment_tree.py)
+            models.Index(fields=['book', 'created_at', 'id'], name='api_comment_book_created_idx'),
+            # Replies of a comment within a book
+            models.Index(fields=['book', 'parent_comment'], name='api_comment_book_parent_idx'),
+            # Top-level comments of a book only
+            models.Index(
+                fields=['book', 'created_at'],
+                condition=models.Q(parent_comment__isnull=True),
+                name='api_comment_book_roots_idx',
+            ),
+        ]
+
     def __str__(self):
         """
         Returns a string representation of the comment.
@@ -6,9 +6,14 @@ from api.models.book import Book  # Assuming Book model is in api.models.book
 class FavoriteBook(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='favorite_books')
     book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='favorited_by')
+    created_at = models.DateTimeField(auto_now_add=True)  # When the book was favorited
 
     class Meta:
         unique_together = ('user', 'book')  # Ensure a user cannot favorite the same book twice
+        indexes = [
+            # A user's favorites, most recently favorited first (ID as the tiebreaker for cursor pages)
+            models.Index(fields=['user', 'created_at', 'id'], name='api_favbook_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.book.title}"
@@ -0,0 +1,106 @@
+"""
+uploadSession.py
+
+Models for resumable uploads.
+
+This file defines the 'UploadSession' model, which tracks a file that a client uploads to S3. In 'multipart' mode
+the file is sent through the API in several requests; if an upload is interrupted the client can ask which parts
+were stored and send only the rest. In 'presigned' mode the client uploads straight to S3 with a presigned URL.
+Once completed, the session's file URL can be attached to a book or profile picture.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+import uuid
+
+from django.contrib.auth.models import User
+from django.db import models
+
+from api.aws.client import s3_url_for_key
+
+
+class UploadSession(models.Model):
+    """
+    Represents a (possibly unfinished) upload of a file to S3.
+
+    Attributes:
+        id (UUID): Unguessable identifier of the session.
+        user (ForeignKey): The user who owns the upload.
+        purpose (str): What the file is for ('content', 'cover_art' or 'profile_image').
+        mode (str): How the file is uploaded ('multipart' through the API, or 'presigned' directly to S3).
+        file_name (str): The original file name.
+        content_type (str): The MIME type of the file.
+        file_key (str): The S3 object key the file is uploaded to.
+        upload_id (str): The S3 multipart upload ID.
+        part_size (int): The size in bytes of every part except the last (multipart mode).
+        parts (list): The uploaded parts as dicts with 'PartNumber', 'ETag' and 'Size'.
+        expected_size (int): The file size announced by the client, if any.
+        size (int): The verified size of the stored file, set once the session is finalized.
+        status (str): One of 'active', 'completed', 'consumed' or 'aborted'.
+        created_at (datetime): Timestamp for when the session was created (auto-managed).
+        updated_at (datetime): Timestamp for when the session was last updated (auto-managed).
+    """
+    STATUS_ACTIVE = 'active'
+    STATUS_COMPLETED = 'completed'
+    STATUS_CONSUMED = 'consumed'  # The file has been attached to a record
+    STATUS_ABORTED = 'aborted'
+    STATUS_CHOICES = [
+        (STATUS_ACTIVE, 'Active'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_CONSUMED, 'Consumed'),
+        (STATUS_ABORTED, 'Aborted'),
+    ]
+
+    PURPOSE_CHOICES = [
+        ('content', 'Book content'),
+        ('cover_art', 'Book cover art'),
+        ('profile_image', 'Profile picture'),
+    ]
+
+    MODE_MULTIPART = 'multipart'
+    MODE_PRESIGNED = 'presigned'
+    MODE_CHOICES = [
+        (MODE_MULTIPART, 'Multipart through the API'),
+        (MODE_PRESIGNED, 'Presigned direct to S3'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    purpose = models.CharField(max_length=20, choices=PURPOSE_CHOICES)
+    mode = models.CharField(max_length=20, choices=MODE_CHOICES, default=MODE_MULTIPART)
+    file_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    file_key = models.CharField(max_length=512)
+    upload_id = models.CharField(max_length=255, blank=True, default='')
+    part_size = models.PositiveBigIntegerField(default=0)
+    parts = models.JSONField(default=list, blank=True)
+    expected_size = models.PositiveBigIntegerField(null=True, blank=True)
+    size = models.PositiveBigIntegerField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_ACTIVE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """
+        Returns a string representation of the upload session.
+
+        Returns:
+            str: The file name and status.
+        """
+        return f"{self.file_name} ({self.status})"
+
+    @property
+    def uploaded_size(self):
+        """
+        Returns the number of bytes uploaded so far.
+        """
+        return sum(part.get('Size', 0) for part in self.parts)
+
+    @property
+    def file_url(self):
+        """
+        Returns the URL the file has (or will have) in the S3 bucket.
+        """
+        return s3_url_for_key(self.file_key)
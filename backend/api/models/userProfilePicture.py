@@ -6,26 +6,31 @@ It includes functionality for automatically deleting the associated image from A
 user profile picture record is deleted.
 
 The model has a one-to-one relationship with the Django User model and stores the image's URL as a field. 
-It ensures that when a profile picture is deleted, the associated image in the S3 bucket is also removed.
+It ensures that when a profile picture is deleted, the associated image in the S3 bucket is also removed
+(by a background job, so the delete does not wait on S3). Resized copies of the image are stored in `variants`
+(see api/services/images.py) and are removed with it.
 
 Author: Chace Nielson
 Created: 2024-10-10
-Updated: 2024-10-10
+Updated: 2026-10-18
 """
 from django.db import models
 from django.contrib.auth.models import User
-from api.aws.delete import delete_file_from_s3  # Ensure you have this method to delete from S3
 
 class UserProfilePicture(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile_picture')
     profile_image_url = models.URLField(max_length=255, null=True, blank=True)  # URL of the S3 profile image
+    variants = models.JSONField(default=dict, blank=True)  # Resized copies, filled in by a background job
 
     def __str__(self):
         return self.user.username
 
     def delete(self, *args, **kwargs):
-        # Extract the file key from the S3 URL
-        if self.profile_image_url:
-            delete_file_from_s3(self.profile_image_url)
+        from api.services import images, jobs  # Imported here to avoid a circular import with api.models
+        urls = [url for url in [self.profile_image_url] + images.variant_urls(self.variants) if url]
         # Call the superclass delete method to remove the record from the database
-        super().delete(*args, **kwargs)
\ No newline at end of file
+        result = super().delete(*args, **kwargs)
+        # Queue the removal of the image and its resized copies from S3 (skipped if another row still uses them)
+        if urls:
+            jobs.enqueue('s3.delete_files', {'urls': urls})
+        return result
\ No newline at end of file
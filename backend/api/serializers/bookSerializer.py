@@ -8,48 +8,86 @@ It is used for serializing book data for API responses and requests.
 
 Author: Chace Nielson
 Created: 2024-08-14
-Modified: 2024-10-10
+Modified: 2026-10-18
 @since 1.1
 """
 from rest_framework import serializers
 from api.models.book import Book
 from django.core.exceptions import ObjectDoesNotExist  # To handle missing related objects
 from django.conf import settings  # Import settings for default profile pic
+from api.services.images import public_variants
+from api.services.instrumentation import TimedListSerializer, TimedSerializerMixin
 
-class BookSerializer(serializers.ModelSerializer):
-    content = serializers.FileField(write_only=True, required=True)
+class BookSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    content = serializers.FileField(write_only=True, required=False)
+    # A completed upload session (see api/views/upload/upload_session.py) can be used instead of `content`
+    content_upload_session = serializers.UUIDField(write_only=True, required=False)
     cover_art = serializers.ImageField(write_only=True, required=False)
     
     # Add the owner's username and profile picture
     owner_username = serializers.CharField(source='owner.username', read_only=True)
     owner_profile_pic = serializers.SerializerMethodField()
+    owner_profile_pic_variants = serializers.SerializerMethodField()
+
+    # Resized copies of the cover art: {'webp': {width: url}, 'jpeg': {width: url}}
+    cover_art_variants = serializers.SerializerMethodField()
+
+    # Only present when the queryset is annotated with `Book.objects.with_favorited(user)`
+    is_favorited = serializers.BooleanField(read_only=True)
 
     class Meta:
         model = Book
+        list_serializer_class = TimedListSerializer  # Serializing time shows in the request timings
         fields = [
             'id', 'title', 'description', 'author', 'genre', 'published_date', 
-            'language', 'content', 'cover_art', 'content_url', 'cover_art_url', 
-            'owner', 'owner_username', 'owner_profile_pic', 'created_at', 
-            'updated_at', 'downloads', 'views'
+            'language', 'content', 'content_upload_session', 'cover_art', 'content_url', 'cover_art_url',
+            'cover_art_variants', 'owner', 'owner_username', 'owner_profile_pic', 'owner_profile_pic_variants', 'created_at', 
+            'updated_at', 'downloads', 'views', 'favorites_count', 'is_favorited'
         ]
-        read_only_fields = ['id', 'content_url', 'cover_art_url', 'owner', 'owner_username', 'owner_profile_pic', 'created_at', 'updated_at', 'downloads', 'views']
+        read_only_fields = ['id', 'content_url', 'cover_art_url', 'cover_art_variants', 'owner', 'owner_username', 'owner_profile_pic', 'owner_profile_pic_variants', 'created_at', 'updated_at', 'downloads', 'views', 'favorites_count', 'is_favorited']
 
     def get_owner_profile_pic(self, obj):
         """
         Get the profile picture URL for the owner of the book. 
         If no profile picture exists, return the default profile picture URL.
+
+        Use `Book.objects.with_owner()` when serializing many books so the owner and
+        profile picture are already loaded instead of being fetched per book.
         """
         try:
             # Check if the owner has a profile picture
             if obj.owner.profile_picture and obj.owner.profile_picture.profile_image_url:
                 return obj.owner.profile_picture.profile_image_url
         except ObjectDoesNotExist:
-            # If the profile picture or related object does not exist, return a default image
-            return settings.DEFAULT_PROFILE_PIC_URL
+            # If the profile picture or related object does not exist, fall through to the default image
+            pass
+        return settings.DEFAULT_PROFILE_PIC_URL
+
+    def get_owner_profile_pic_variants(self, obj):
+        """
+        Get the resized copies of the owner's profile picture (empty until they have been generated).
+        """
+        try:
+            return public_variants(obj.owner.profile_picture.profile_image_url, obj.owner.profile_picture.variants)
+        except ObjectDoesNotExist:
+            return {}
+
+    def get_cover_art_variants(self, obj):
+        """
+        Get the resized copies of the cover art (empty until they have been generated).
+        """
+        return public_variants(obj.cover_art_url, obj.cover_art_variants)
+
+    def validate(self, attrs):
+        # New books need their content, either uploaded with the request or through an upload session
+        if self.instance is None and not attrs.get('content') and not attrs.get('content_upload_session'):
+            raise serializers.ValidationError({'content': 'A content file or a content upload session is required.'})
+        return attrs
 
     def create(self, validated_data):
         # Pop content and cover_art from the validated data as they are handled separately
         validated_data.pop('content', None)
+        validated_data.pop('content_upload_session', None)
         validated_data.pop('cover_art', None)
 
         # Create and return the Book instance
@@ -64,6 +102,10 @@ class BookSerializer(serializers.ModelSerializer):
         instance.genre = validated_data.get('genre', instance.genre)
         instance.published_date = validated_data.get('published_date', instance.published_date)
         instance.language = validated_data.get('language', instance.language)
+        instance.content_url = validated_data.get('content_url', instance.content_url)
+        instance.cover_art_url = validated_data.get('cover_art_url', instance.cover_art_url)
+
+        validated_data.pop('content_upload_session', None)
 
         # Handle content file if provided
         if 'content' in validated_data:
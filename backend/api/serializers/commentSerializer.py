@@ -8,32 +8,49 @@ It is used for serializing comment data for API responses and requests, includin
 
 Author: Chace Nielson
 Created: 2024-08-14
-Modified: 2024-10-10
+Modified: 2026-10-18
 @since 1.0
 """
 from rest_framework import serializers
 from api.models.comment import Comment
 from django.contrib.auth.models import User
 from django.conf import settings  # Import settings to access the default profile picture
+from api.services.images import public_variants
+from api.services.instrumentation import TimedListSerializer, TimedSerializerMixin
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     replies = serializers.SerializerMethodField()  # To handle nested comments
     user_username = serializers.CharField(source='user.username', read_only=True)  # Add the username field
     user_profile_pic = serializers.SerializerMethodField()  # Add the profile picture field
+    user_profile_pic_variants = serializers.SerializerMethodField()  # Resized copies of the profile picture
+    reply_count = serializers.SerializerMethodField()  # Total direct replies (set by the comment tree loader)
 
     class Meta:
         model = Comment
-        fields = ['id', 'created_at', 'updated_at', 'is_edited', "is_deleted", 'content', 'book', 'user', 'user_username', 'user_profile_pic', 'parent_comment', 'replies']
-        read_only_fields = ['id', 'created_at', 'updated_at', 'is_edited', 'user', 'user_username', 'user_profile_pic']
+        list_serializer_class = TimedListSerializer  # Serializing time shows in the request timings
+        fields = ['id', 'created_at', 'updated_at', 'is_edited', "is_deleted", 'content', 'book', 'user', 'user_username', 'user_profile_pic', 'user_profile_pic_variants', 'parent_comment', 'replies', 'reply_count']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'is_edited', 'user', 'user_username', 'user_profile_pic', 'user_profile_pic_variants', 'reply_count']
 
     def get_replies(self, obj):
         """
         Recursively serialize all replies to a comment.
+
+        Comments loaded with `api.services.comment_tree.load_comment_tree` already carry their
+        replies, so no queries are made for them.
         """
+        if hasattr(obj, 'loaded_replies'):
+            return CommentSerializer(obj.loaded_replies, many=True, context=self.context).data
         if obj.replies.exists():
             return CommentSerializer(obj.replies.all(), many=True).data
         return []
 
+    def get_reply_count(self, obj):
+        """
+        Get the total number of direct replies, which may be more than the replies returned
+        when the thread was loaded with a reply limit. None if the comment was not loaded as a tree.
+        """
+        return getattr(obj, 'reply_count', None)
+
     def get_user_profile_pic(self, obj):
         """
         Get the profile picture URL for the user who made the comment.
@@ -44,8 +61,18 @@ class CommentSerializer(serializers.ModelSerializer):
             if obj.user.profile_picture and obj.user.profile_picture.profile_image_url:
                 return obj.user.profile_picture.profile_image_url
         except User.profile_picture.RelatedObjectDoesNotExist:
-            # If no profile picture exists, return the default profile picture
-            return settings.DEFAULT_PROFILE_PIC_URL
+            # If no profile picture exists, fall through to the default profile picture
+            pass
+        return settings.DEFAULT_PROFILE_PIC_URL
+
+    def get_user_profile_pic_variants(self, obj):
+        """
+        Get the resized copies of the commenter's profile picture (empty until they have been generated).
+        """
+        try:
+            return public_variants(obj.user.profile_picture.profile_image_url, obj.user.profile_picture.variants)
+        except User.profile_picture.RelatedObjectDoesNotExist:
+            return {}
 
     def create(self, validated_data):
         """
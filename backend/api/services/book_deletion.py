@@ -0,0 +1,70 @@
+"""
+services/book_deletion.py
+
+Bulk deletion of books and user content together with their files in S3.
+
+Deleting a user's books one at a time costs two S3 round-trips and several queries per book. These helpers
+collect every file URL first, remove the files with batched `DeleteObjects` requests and then delete the
+database rows with a single queryset delete. Files that other rows still use are kept. S3 failures do not stop
+the database cleanup; they are logged and returned so callers can report them.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Functions:
+----------
+- delete_books(queryset)
+    Deletes the books in a queryset and their content/cover art files (including resized copies).
+- delete_user_content(user)
+    Deletes all of a user's books and their profile picture, including the files.
+"""
+from api.aws.delete import delete_files_from_s3
+from api.models.book import Book
+from api.models.userProfilePicture import UserProfilePicture
+from api.services.file_references import unreferenced_urls
+from api.services.images import variant_urls
+
+
+def _book_file_urls(queryset):
+    urls = []
+    for content_url, cover_art_url, cover_art_variants in queryset.values_list('content_url', 'cover_art_url', 'cover_art_variants'):
+        urls.extend(url for url in (content_url, cover_art_url) if url)
+        urls.extend(variant_urls(cover_art_variants))
+    return urls
+
+
+def delete_books(queryset):
+    """
+    Delete every book in the queryset along with its files in S3.
+
+    :param queryset: A Book queryset.
+    :return: A tuple of (number of books deleted, list of S3 failures).
+    """
+    failures = delete_files_from_s3(unreferenced_urls(_book_file_urls(queryset), exclude_books=queryset))
+    _, deleted = queryset.delete()
+    return deleted.get(Book._meta.label, 0), failures
+
+
+def delete_user_content(user):
+    """
+    Delete all books owned by a user and the user's profile picture, including their files in S3.
+
+    The files are removed in one batched pass and the user row itself is left for the caller to delete.
+
+    :param user: The User whose content should be deleted.
+    :return: A list of S3 failures.
+    """
+    books = Book.objects.filter(owner=user)
+    profile_pictures = UserProfilePicture.objects.filter(user=user)
+
+    file_urls = _book_file_urls(books)
+    for profile_image_url, variants in profile_pictures.values_list('profile_image_url', 'variants'):
+        file_urls.extend(url for url in [profile_image_url] + variant_urls(variants) if url)
+    failures = delete_files_from_s3(unreferenced_urls(file_urls, exclude_books=books, exclude_profile_pictures=profile_pictures))
+
+    books.delete()
+    # Queryset delete skips UserProfilePicture.delete(), which would remove the image from S3 a second time
+    profile_pictures.delete()
+    return failures
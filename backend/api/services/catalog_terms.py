@@ -0,0 +1,246 @@
+"""
+services/catalog_terms.py
+
+Keeps the normalized genre and language of each book (see `api/models/catalogTerm.py`) in sync with its text.
+
+When a book is saved, its `genre` and `language` strings are normalized (surrounding and repeated whitespace
+removed, case folded) and linked to the matching 'Genre' and 'Language' rows, which are created on first use.
+The `book_count` of the old and new rows is adjusted with atomic `F()` updates, so the counts stay correct when
+several workers save books at the same time. Bulk inserts and updates skip this; run
+`python manage.py rebuild_catalog_terms` afterwards to relink the books and recount.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Functions:
+----------
+- normalize(value)
+    Returns the lookup key of a genre or language string.
+- filter_books(queryset, field, value) / afilter_books(...)
+    Filters books to one genre or language with an indexed equality lookup.
+- sync_book(book, update_fields=None)
+    Links a saved book to its genre and language and updates their counts.
+- book_deleted(book)
+    Removes a deleted book from the counts.
+- facets()
+    Returns the genres and languages that have books, with their counts.
+- result_facets(queryset) / aresult_facets(queryset)
+    Counts the books of a (filtered) catalog queryset per genre, language, decade and cover art.
+- rebuild()
+    Relinks every book and recomputes every count.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import BooleanField, Case, Count, ExpressionWrapper, F, IntegerField, Q, Value, When
+from django.db.models.functions import ExtractYear, Mod
+
+from api.models.book import Book
+from api.models.catalogTerm import Genre, Language
+
+# Book text field -> (link field, term model)
+TERM_FIELDS = {
+    'genre': ('genre_ref', Genre),
+    'language': ('language_ref', Language),
+}
+
+
+def normalize(value):
+    """
+    Get the lookup key of a genre or language, so 'Science  Fiction ' and 'science fiction' match.
+
+    :param value: The text entered for the book.
+    :return: The normalized key ('' for an empty value).
+    """
+    return ' '.join((value or '').split()).casefold()
+
+
+def _get_or_create_term(model, value):
+    key = normalize(value)
+    if not key:
+        return None
+    term, _ = model.objects.get_or_create(key=key[:255], defaults={'name': ' '.join(value.split())[:255]})
+    return term
+
+
+def _adjust_count(model, term_id, amount):
+    if term_id is None:
+        return
+    terms = model.objects.filter(pk=term_id)
+    if amount < 0:
+        terms = terms.filter(book_count__gte=-amount)  # Never below 0 if the counts have drifted
+    terms.update(book_count=F('book_count') + amount)
+
+
+def filter_books(queryset, field, value):
+    """
+    Keep only the books filed under a genre or language (case and whitespace are ignored).
+
+    :param queryset: A Book queryset.
+    :param field: 'genre' or 'language'.
+    :param value: The genre or language to filter by.
+    :return: The filtered queryset (empty if no book uses the value).
+    """
+    link_field, model = TERM_FIELDS[field]
+    term_id = model.objects.filter(key=normalize(value)).values_list('pk', flat=True).first()
+    return _filter_by_term(queryset, link_field, term_id)
+
+
+async def afilter_books(queryset, field, value):
+    """
+    Async version of `filter_books` for async views.
+    """
+    link_field, model = TERM_FIELDS[field]
+    term_id = await model.objects.filter(key=normalize(value)).values_list('pk', flat=True).afirst()
+    return _filter_by_term(queryset, link_field, term_id)
+
+
+def _filter_by_term(queryset, link_field, term_id):
+    if term_id is None:
+        return queryset.none()
+    return queryset.filter(**{f'{link_field}_id': term_id})
+
+
+def sync_book(book, update_fields=None):
+    """
+    Link a saved book to the terms matching its genre and language, and move it between their counts.
+
+    :param book: The saved Book instance (its links are updated in place).
+    :param update_fields: The fields that were saved, or None if all were.
+    :return: None
+    """
+    changes = {}
+    with transaction.atomic():
+        for field, (link_field, model) in TERM_FIELDS.items():
+            if update_fields is not None and field not in update_fields:
+                continue  # The text was not saved, so it cannot have changed
+            term = _get_or_create_term(model, getattr(book, field))
+            old_id, new_id = getattr(book, f'{link_field}_id'), term.pk if term else None
+            if old_id == new_id:
+                continue
+            _adjust_count(model, old_id, -1)
+            _adjust_count(model, new_id, 1)
+            changes[link_field] = term
+
+        if changes:
+            # An update, so saving the links does not send post_save again
+            Book.objects.filter(pk=book.pk).update(**changes)
+    for link_field, term in changes.items():
+        setattr(book, link_field, term)
+
+
+def book_deleted(book):
+    """
+    Remove a deleted book from the counts of its genre and language.
+
+    :param book: The deleted Book instance.
+    :return: None
+    """
+    for link_field, model in TERM_FIELDS.values():
+        _adjust_count(model, getattr(book, f'{link_field}_id'), -1)
+
+
+def facets():
+    """
+    Get the genres and languages that have at least one book, most used first.
+
+    :return: A dict with 'genres' and 'languages' lists of {'name': str, 'count': int}.
+    """
+    def terms(model):
+        rows = model.objects.filter(book_count__gt=0).order_by('-book_count', 'name').values_list('name', 'book_count')
+        return [{'name': name, 'count': count} for name, count in rows]
+
+    return {'genres': terms(Genre), 'languages': terms(Language)}
+
+
+def result_facets(queryset):
+    """
+    Count the books of a catalog result set per genre, language, publication decade and cover art.
+
+    Everything comes from a single grouped query over the filtered books (one row per combination of the four
+    values), which is then summed per facet, so the counts always match the results they are shown with.
+
+    :param queryset: The filtered Book queryset (search, genre and language filters applied).
+    :return: A dict with 'genre' and 'language' lists of {'name', 'count'} (most books first), a
+        'published_decade' list of {'decade', 'count'} (oldest first, None for books without a date) and
+        'has_cover_art' as {'true': count, 'false': count}.
+    """
+    return _summarize_facets(_facet_rows(queryset))
+
+
+async def aresult_facets(queryset):
+    """
+    Async version of `result_facets` for async views.
+    """
+    return _summarize_facets([row async for row in _facet_rows(queryset)])
+
+
+def _facet_rows(queryset):
+    """
+    Build the grouped query: one row of (genre, language, decade, has cover art, count) per combination.
+    """
+    # year - year % 10 rather than year / 10 * 10: EXTRACT returns a numeric on PostgreSQL, so '/' would not truncate
+    year = ExtractYear('published_date')
+    decade = ExpressionWrapper(year - Mod(year, 10), output_field=IntegerField())
+    has_cover_art = Case(
+        When(Q(cover_art_url__isnull=False) & ~Q(cover_art_url=''), then=Value(True)),
+        default=Value(False),
+        output_field=BooleanField(),
+    )
+    return (
+        queryset.order_by()
+        .annotate(facet_decade=decade, facet_cover=has_cover_art)
+        .values_list('genre_ref__name', 'language_ref__name', 'facet_decade', 'facet_cover')
+        .annotate(total=Count('id'))
+    )
+
+
+def _summarize_facets(rows):
+    """
+    Sum the grouped rows per facet.
+    """
+    genres, languages, decades, covers = Counter(), Counter(), Counter(), Counter()
+    for genre, language, book_decade, cover, total in rows:
+        genres[genre] += total
+        languages[language] += total
+        decades[book_decade] += total
+        covers[bool(cover)] += total
+
+    def by_count(counts):
+        return [
+            {'name': name, 'count': count}
+            for name, count in sorted(counts.items(), key=lambda item: (-item[1], item[0] or ''))
+            if name is not None
+        ]
+
+    return {
+        'genre': by_count(genres),
+        'language': by_count(languages),
+        'published_decade': [
+            {'decade': book_decade, 'count': count}
+            for book_decade, count in sorted(decades.items(), key=lambda item: (item[0] is None, item[0] or 0))
+        ],
+        'has_cover_art': {'true': covers[True], 'false': covers[False]},
+    }
+
+
+def rebuild():
+    """
+    Link every book to the terms matching its text and recompute every count.
+
+    :return: None
+    """
+    for field, (link_field, model) in TERM_FIELDS.items():
+        for value in Book.objects.order_by().values_list(field, flat=True).distinct():
+            term = _get_or_create_term(model, value)
+            Book.objects.filter(**{field: value}).exclude(**{link_field: term}).update(**{link_field: term})
+
+        counts = dict(
+            Book.objects.order_by().filter(**{f'{link_field}__isnull': False})
+            .values_list(link_field).annotate(total=Count('id'))
+        )
+        for term in model.objects.all():
+            if term.book_count != counts.get(term.pk, 0):
+                model.objects.filter(pk=term.pk).update(book_count=counts.get(term.pk, 0))
@@ -0,0 +1,88 @@
+"""
+services/comment_tree.py
+
+Loader for threaded book comments.
+
+Serializing a comment thread one level at a time costs several queries per comment (replies, user and
+profile picture). `load_comment_tree` instead fetches every comment of a book, together with its user and
+profile picture, in a single query and assembles the nested structure in memory.
+
+Each returned comment gets two extra attributes that `CommentSerializer` uses instead of querying:
+- `loaded_replies`: the list of (possibly truncated) child comments.
+- `reply_count`: the total number of direct replies, including any that were cut off by the limits.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Functions:
+----------
+- load_comment_tree(book_id, max_depth=None, max_replies=None)
+    Returns the top-level comments of a book with their replies attached.
+- aload_comment_tree(book_id, max_depth=None, max_replies=None)
+    Async version of `load_comment_tree` for async views.
+"""
+from collections import defaultdict
+
+from api.models.comment import Comment
+
+
+def load_comment_tree(book_id, max_depth=None, max_replies=None):
+    """
+    Load all comments for a book and assemble them into a tree.
+
+    :param book_id: The ID of the book whose comments are loaded.
+    :param max_depth: How many levels of replies to include (0 returns only top-level comments).
+                      None includes every level.
+    :param max_replies: The maximum number of replies kept per comment (oldest first). None keeps all.
+    :return: A list of top-level comments, oldest first, with `loaded_replies` and `reply_count` set.
+    """
+    return _build_tree(_thread(book_id), max_depth, max_replies)
+
+
+async def aload_comment_tree(book_id, max_depth=None, max_replies=None):
+    """
+    Load all comments for a book with the async ORM and assemble them into a tree.
+
+    Takes the same arguments and returns the same comments as `load_comment_tree`.
+    """
+    comments = [comment async for comment in _thread(book_id)]
+    return _build_tree(comments, max_depth, max_replies)
+
+
+def _thread(book_id):
+    return (
+        Comment.objects.filter(book_id=book_id)
+        .select_related('user', 'user__profile_picture')
+        .order_by('created_at', 'id')
+    )
+
+
+def _build_tree(comments, max_depth, max_replies):
+    """
+    Attach the replies of each comment and return the top-level comments.
+    """
+    children = defaultdict(list)
+    for comment in comments:
+        children[comment.parent_comment_id].append(comment)
+
+    roots = children[None]
+
+    # Walk the tree iteratively so very deep threads cannot hit the recursion limit
+    stack = [(root, 0) for root in roots]
+    while stack:
+        comment, depth = stack.pop()
+        replies = children.get(comment.id, [])
+        comment.reply_count = len(replies)
+
+        if max_depth is not None and depth >= max_depth:
+            comment.loaded_replies = []
+            continue
+
+        if max_replies is not None:
+            replies = replies[:max_replies]
+        comment.loaded_replies = replies
+        stack.extend((reply, depth + 1) for reply in replies)
+
+    return roots
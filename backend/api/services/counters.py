@@ -0,0 +1,228 @@
+"""
+services/counters.py
+
+Write-behind buffer for the book view and download counters.
+
+Incrementing a counter with `book.views += 1; book.save()` rewrites every column, bumps `updated_at` and
+loses increments when two workers read the same value. Instead, increments are added to an in-process buffer
+and flushed in batches with a single atomic statement per flush:
+
+    UPDATE api_book SET views = views + CASE id WHEN ... END, downloads = downloads + CASE ... END,
+        trending_score = trending_score + CASE ... END
+    WHERE id IN (...)
+
+Because the statement is additive, every gunicorn worker can keep its own buffer and flush independently
+without losing increments or holding row locks between requests. A flush happens when the buffer is older
+than `BOOK_COUNTER_FLUSH_INTERVAL` seconds, when it holds more than `BOOK_COUNTER_MAX_PENDING` increments,
+and when the process exits. Setting the interval to 0 writes every increment straight through.
+
+Listeners of `counters_flushed` receive the flushed deltas as `{book_id: {'views': n, 'downloads': m}}`. The
+increments are already written when they run, so a failing listener is logged and does not stop the others (or
+the request or flusher thread that flushed).
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Functions:
+----------
+- increment(book_id, field, amount=1)
+    Buffers an increment and returns the pending delta for that book and field.
+- pending(book_id, field)
+    Returns the buffered (not yet flushed) delta for a book and field.
+- flush()
+    Writes all buffered increments to the database.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+from django.dispatch import Signal
+
+from api.models.book import Book
+from api.services import metrics, trending
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ('views', 'downloads')
+
+# Sent after buffered increments are written; kwargs: deltas={book_id: {field: amount}}
+counters_flushed = Signal()
+
+
+class CounterBuffer:
+    """
+    Thread-safe buffer of counter deltas for the current process.
+
+    Attributes:
+        deltas (dict): Pending increments keyed by (book_id, field).
+        started_at (float): Monotonic time the oldest pending increment was buffered.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.deltas = defaultdict(int)
+        self.started_at = None
+        self.flusher_pid = None
+
+    def ensure_flusher(self):
+        """
+        Start a daemon thread that flushes the buffer every interval, so increments are written
+        even if no further requests arrive. Restarted after a fork (e.g. in each gunicorn worker).
+        """
+        interval = settings.BOOK_COUNTER_FLUSH_INTERVAL
+        if interval <= 0 or self.flusher_pid == os.getpid():
+            return
+        self.flusher_pid = os.getpid()
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.flush()
+                except Exception:
+                    # The thread is never restarted in this process, so it must outlive any failure
+                    logger.exception('Book counter flush failed')
+                finally:
+                    close_old_connections()
+
+        threading.Thread(target=run, name='book-counter-flusher', daemon=True).start()
+
+    def add(self, book_id, field, amount):
+        """
+        Add an increment and flush the buffer if it is due.
+
+        Returns:
+            int: The delta still pending for this book and field after any flush.
+        """
+        self.ensure_flusher()
+        with self.lock:
+            self.deltas[(book_id, field)] += amount
+            if self.started_at is None:
+                self.started_at = time.monotonic()
+            due = (
+                time.monotonic() - self.started_at >= settings.BOOK_COUNTER_FLUSH_INTERVAL
+                or sum(self.deltas.values()) >= settings.BOOK_COUNTER_MAX_PENDING
+            )
+        if due:
+            self.flush()
+        return self.pending(book_id, field)
+
+    def pending(self, book_id, field):
+        with self.lock:
+            return self.deltas.get((book_id, field), 0)
+
+    def take(self):
+        """
+        Remove and return all pending deltas.
+        """
+        with self.lock:
+            deltas, self.deltas = self.deltas, defaultdict(int)
+            self.started_at = None
+        return deltas
+
+    def flush(self):
+        """
+        Write all pending deltas to the database in one UPDATE statement. Deltas of books that no longer
+        exist are dropped.
+
+        If the write fails the deltas are put back so they are retried on the next flush.
+        """
+        deltas = self.take()
+        if not deltas:
+            return
+
+        by_book = defaultdict(dict)
+        for (book_id, field), amount in deltas.items():
+            by_book[book_id][field] = amount
+
+        # Books deleted since the increment was buffered are dropped, so their deltas do not reach
+        # the listeners (e.g. the site statistics totals)
+        try:
+            existing = set(Book.objects.filter(pk__in=by_book.keys()).values_list('pk', flat=True))
+        except Exception:
+            logger.exception('Failed to flush book counters; keeping %d pending deltas', len(deltas))
+            self.restore(deltas)
+            return
+        by_book = {book_id: amounts for book_id, amounts in by_book.items() if book_id in existing}
+        if not by_book:
+            return
+
+        updates = {}
+        for field in COUNTER_FIELDS:
+            whens = [When(pk=book_id, then=Value(amounts[field])) for book_id, amounts in by_book.items() if field in amounts]
+            if whens:
+                updates[field] = F(field) + Case(*whens, default=Value(0), output_field=IntegerField())
+        # The trending score earns the weighted increments in the same statement (see api.services.trending)
+        whens = [When(pk=book_id, then=Value(trending.activity_delta(amounts))) for book_id, amounts in by_book.items()]
+        updates['trending_score'] = F('trending_score') + Case(*whens, default=Value(0.0), output_field=FloatField())
+
+        try:
+            Book.objects.filter(pk__in=by_book.keys()).update(**updates)
+        except Exception:
+            logger.exception('Failed to flush book counters; keeping %d pending deltas', len(deltas))
+            self.restore(deltas)
+            return
+
+        # The increments are written: a failing listener does not stop the others (send_robust logs the
+        # error to 'django.dispatch')
+        counters_flushed.send_robust(sender=Book, deltas=by_book)
+
+    def restore(self, deltas):
+        """
+        Put deltas that could not be written back into the buffer, so they are retried on the next flush.
+        """
+        with self.lock:
+            for key, amount in deltas.items():
+                self.deltas[key] += amount
+            if self.started_at is None:
+                self.started_at = time.monotonic()
+
+
+buffer = CounterBuffer()
+
+
+def increment(book_id, field, amount=1):
+    """
+    Buffer an increment of a book counter.
+
+    :param book_id: The ID of the book.
+    :param field: 'views' or 'downloads'.
+    :param amount: How much to add (default 1).
+    :return: The delta for this book and field that has not been written yet.
+    """
+    if field not in COUNTER_FIELDS:
+        raise ValueError(f'Unknown counter field: {field}')
+    metrics.BOOK_COUNTER_INCREMENTS.labels(field).inc(amount)
+    return buffer.add(book_id, field, amount)
+
+
+def pending(book_id, field):
+    """
+    Get the increments buffered for a book counter that are not in the database yet.
+    """
+    return buffer.pending(book_id, field)
+
+
+def flush():
+    """
+    Write all buffered increments to the database.
+    """
+    buffer.flush()
+
+
+def _flush_at_exit():
+    try:
+        buffer.flush()
+    except Exception:
+        logger.exception('Failed to flush book counters at exit')
+
+
+atexit.register(_flush_at_exit)
@@ -0,0 +1,137 @@
+"""
+services/db_connections.py
+
+Statistics about how the current worker process gets its database connections.
+
+Opening a PostgreSQL connection (TCP, TLS and authentication) costs several milliseconds, so it should not
+happen on every request. Production reuses connections either by keeping them open between requests
+(`CONN_MAX_AGE` with health checks) or through a psycopg pool (`DB_POOL`); see the database settings. These
+statistics show whether that works:
+
+- `connects` counts the connections handed to Django (a new connection, or a checkout from the pool). With
+  persistent connections it should stay close to the number of worker threads.
+- `connect_ms` is the time spent getting them. It is recorded by the `api.db.postgresql` engine, so it is
+  empty for other databases (e.g. SQLite in development).
+- `pool` holds the psycopg pool statistics when pooling is enabled: checkouts, time spent waiting for a free
+  connection, requests waiting right now, timeouts, and the saturation (share of the maximum pool size in use).
+
+The numbers are per process and reset when the worker restarts. The same counts are also exported as
+Prometheus metrics added up over all workers (see api/services/metrics.py).
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Functions:
+----------
+- record_connect(alias)
+    Counts a connection handed to Django.
+- record_connect_time(alias, seconds)
+    Adds the time spent getting a connection.
+- stats()
+    Returns the statistics of every configured database.
+- reset()
+    Clears the counters (used by the connection benchmark).
+"""
+import os
+import threading
+from collections import defaultdict
+
+from django.db import connections
+
+from api.services import metrics
+
+_lock = threading.Lock()
+_counters = defaultdict(lambda: {'connects': 0, 'timed': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+
+
+def record_connect(alias):
+    """
+    Count a connection handed to Django (called from the `connection_created` signal).
+
+    :param alias: The database alias, e.g. 'default'.
+    :return: None
+    """
+    with _lock:
+        _counters[alias]['connects'] += 1
+    metrics.DB_CONNECTIONS.labels(alias).inc()
+
+
+def record_connect_time(alias, seconds):
+    """
+    Add the time spent opening a connection or waiting for one from the pool.
+
+    :param alias: The database alias.
+    :param seconds: The time it took.
+    :return: None
+    """
+    with _lock:
+        counters = _counters[alias]
+        counters['timed'] += 1
+        counters['total_seconds'] += seconds
+        counters['max_seconds'] = max(counters['max_seconds'], seconds)
+    metrics.DB_CONNECT_DURATION.labels(alias).observe(seconds)
+
+
+def _pool_stats(pool):
+    # See https://www.psycopg.org/psycopg3/docs/advanced/pool.html#pool-stats (counters are since the pool opened)
+    raw = pool.get_stats()
+    checkouts = raw.get('requests_num', 0)
+    in_use = raw.get('pool_size', 0) - raw.get('pool_available', 0)
+    return {
+        'min_size': raw.get('pool_min'),
+        'max_size': raw.get('pool_max'),
+        'size': raw.get('pool_size'),
+        'available': raw.get('pool_available'),
+        'in_use': in_use,
+        'saturation': round(in_use / raw['pool_max'], 3) if raw.get('pool_max') else None,
+        'checkouts': checkouts,
+        'queued': raw.get('requests_queued', 0),
+        'waiting': raw.get('requests_waiting', 0),
+        'wait_ms_total': raw.get('requests_wait_ms', 0),
+        'wait_ms_mean': round(raw.get('requests_wait_ms', 0) / checkouts, 3) if checkouts else 0,
+        'timeouts': raw.get('requests_errors', 0),
+        'connections_opened': raw.get('connections_num', 0),
+        'connections_lost': raw.get('connections_lost', 0),
+    }
+
+
+def stats():
+    """
+    Get the connection statistics of this process for every configured database.
+
+    :return: A dict with the process ID and, per database alias, its vendor, reuse settings, connection
+        counters and (when pooled) pool statistics.
+    """
+    with _lock:
+        counters = {alias: dict(values) for alias, values in _counters.items()}
+
+    databases = {}
+    for alias in connections:
+        connection = connections[alias]
+        values = counters.get(alias, {'connects': 0, 'timed': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+        pool = getattr(connection, 'pool', None)
+        databases[alias] = {
+            'vendor': connection.vendor,
+            'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+            'health_checks': connection.settings_dict.get('CONN_HEALTH_CHECKS'),
+            'connects': values['connects'],
+            'connect_ms': {
+                'total': round(values['total_seconds'] * 1000, 3),
+                'mean': round(values['total_seconds'] * 1000 / values['timed'], 3) if values['timed'] else None,
+                'max': round(values['max_seconds'] * 1000, 3),
+            } if values['timed'] else None,
+            'pool': _pool_stats(pool) if pool is not None else None,
+        }
+    return {'pid': os.getpid(), 'databases': databases}
+
+
+def reset():
+    """
+    Clear the connection counters of this process (the pool keeps its own statistics).
+
+    :return: None
+    """
+    with _lock:
+        _counters.clear()
@@ -0,0 +1,109 @@
+"""
+services/favorites.py
+
+Adds and removes favorite books in sets, with a fixed number of queries however many books are involved.
+
+- `add()` finds the user's existing favorites among the books with one query and inserts the rest with a single
+  `bulk_create(ignore_conflicts=True)`.
+- `remove()` deletes the favorites with a single set delete.
+- Both then move the `favorites_count` and trending score of all affected books with one UPDATE
+  (see `trending.add_favorites` and `trending.remove_favorites`) and invalidate the user's cached responses once.
+
+The user's row is locked for the duration of the change, so two requests of the same user cannot both count
+the same favorite. Favorites deleted any other way (e.g. when a user or book is deleted) are still counted by
+the `post_delete` signal; `handles_counts()` tells that signal to skip the deletes made here.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Functions:
+----------
+- add(user, book_ids)
+    Adds books to a user's favorites and returns the IDs that were added.
+- remove(user, book_ids)
+    Removes books from a user's favorites and returns the IDs that were removed.
+- handles_counts()
+    Returns True while this module is deleting favorites and updating their counts itself.
+"""
+from contextvars import ContextVar
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from api.models.book import Book
+from api.models.favoriteBooks import FavoriteBook
+from api.services import response_cache, trending
+
+# The most books that can be added or removed in one request
+MAX_BULK_FAVORITES = 100
+
+# Set while remove() deletes favorites, so the post_delete signal does not count them a second time
+_handling_counts = ContextVar('favorites_handling_counts', default=False)
+
+
+def handles_counts():
+    """
+    Check whether favorites are being deleted by `remove()`, which updates the book counts itself.
+
+    :return: True inside `remove()`.
+    """
+    return _handling_counts.get()
+
+
+def _lock_user(user):
+    # Serializes the favorite changes of one user (a no-op on SQLite, which allows a single writer anyway)
+    User.objects.select_for_update().filter(pk=user.pk).exists()
+
+
+def _invalidate(user, book_ids):
+    if book_ids:
+        response_cache.favorites_changed(user.pk, book_ids)
+
+
+def add(user, book_ids):
+    """
+    Add books to a user's favorites. Books that do not exist or are already favorites are skipped.
+
+    :param user: The user adding the favorites.
+    :param book_ids: The IDs of the books to add.
+    :return: The sorted list of IDs that were added.
+    """
+    book_ids = set(book_ids)
+    with transaction.atomic():
+        _lock_user(user)
+        existing = set(
+            FavoriteBook.objects.filter(user=user, book_id__in=book_ids).values_list('book_id', flat=True)
+        )
+        # Unknown IDs are dropped here rather than failing the insert on the foreign key
+        added = set(Book.objects.filter(pk__in=book_ids - existing).values_list('pk', flat=True))
+        FavoriteBook.objects.bulk_create(
+            [FavoriteBook(user=user, book_id=book_id) for book_id in added],
+            ignore_conflicts=True,
+        )
+        trending.add_favorites(added)
+    _invalidate(user, added)
+    return sorted(added)
+
+
+def remove(user, book_ids):
+    """
+    Remove books from a user's favorites. Books that are not favorites are skipped.
+
+    :param user: The user removing the favorites.
+    :param book_ids: The IDs of the books to remove.
+    :return: The sorted list of IDs that were removed.
+    """
+    token = _handling_counts.set(True)
+    try:
+        with transaction.atomic():
+            _lock_user(user)
+            favorites = FavoriteBook.objects.filter(user=user, book_id__in=set(book_ids))
+            removed = dict(favorites.values_list('book_id', 'created_at'))
+            favorites.delete()
+            trending.remove_favorites(removed)
+    finally:
+        _handling_counts.reset(token)
+    _invalidate(user, removed)
+    return sorted(removed)
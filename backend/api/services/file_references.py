@@ -0,0 +1,95 @@
+"""
+services/file_references.py
+
+Checks whether files in S3 are still used before they are deleted.
+
+With content-addressed keys (see `api/aws/upload.py`) the same object can belong to several rows, e.g. when a user
+uploads the same cover for two books or uploads their current profile picture again. Deleting a file because one
+row no longer needs it must not break the others, so every S3 delete goes through `unreferenced_urls` first.
+
+A file counts as referenced while any book's content or cover art URL, or any profile picture URL, points at it.
+Resized variants (see `api/services/images.py`) are referenced while their original is.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Functions:
+----------
+- unreferenced_urls(urls, exclude_books=None, exclude_profile_pictures=None)
+    Returns the URLs that no remaining row uses.
+"""
+import re
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+from api.models.book import Book
+from api.models.userProfilePicture import UserProfilePicture
+
+# Variant keys look like '<folder>/variants/<original stem>_w<width>q<quality>.<ext>'
+VARIANT_KEY = re.compile(r'^(?P<base>.*/)variants/(?P<stem>[^/]+)_w\d+(?:q\d+)?\.[a-z]+$')
+
+# Prefix lookups are OR-ed together in chunks of this size
+CHUNK_SIZE = 100
+
+
+def _original_prefix(url):
+    """
+    Get the URL prefix of the original image of a variant URL (everything up to the extension), or None.
+    """
+    match = VARIANT_KEY.match(url)
+    if match is None:
+        return None
+    return f"{match.group('base')}{match.group('stem')}."
+
+
+def _chunks(items):
+    items = list(items)
+    for start in range(0, len(items), CHUNK_SIZE):
+        yield items[start:start + CHUNK_SIZE]
+
+
+def _referenced(books, profile_pictures, exact_urls, prefixes):
+    referenced = set()
+    for chunk in _chunks(exact_urls):
+        rows = books.filter(Q(content_url__in=chunk) | Q(cover_art_url__in=chunk)).values_list('content_url', 'cover_art_url')
+        referenced.update(url for row in rows for url in row if url)
+        referenced.update(profile_pictures.filter(profile_image_url__in=chunk).values_list('profile_image_url', flat=True))
+
+    for chunk in _chunks(prefixes):
+        cover_lookup = reduce(or_, (Q(cover_art_url__startswith=prefix) for prefix in chunk))
+        picture_lookup = reduce(or_, (Q(profile_image_url__startswith=prefix) for prefix in chunk))
+        originals = set(books.filter(cover_lookup).values_list('cover_art_url', flat=True))
+        originals.update(profile_pictures.filter(picture_lookup).values_list('profile_image_url', flat=True))
+        referenced.update(prefix for prefix in chunk if any(url and url.startswith(prefix) for url in originals))
+    return referenced
+
+
+def unreferenced_urls(urls, exclude_books=None, exclude_profile_pictures=None):
+    """
+    Filter a list of file URLs down to the ones that are safe to delete.
+
+    :param urls: The file URLs to check.
+    :param exclude_books: Optional Book queryset to ignore (rows that are about to be deleted).
+    :param exclude_profile_pictures: Optional UserProfilePicture queryset to ignore.
+    :return: The URLs (in their original order) that are not referenced by any other row.
+    """
+    urls = [url for url in dict.fromkeys(urls) if url]
+    if not urls:
+        return []
+
+    books = Book.objects.all()
+    if exclude_books is not None:
+        books = books.exclude(pk__in=exclude_books.values('pk'))
+    profile_pictures = UserProfilePicture.objects.all()
+    if exclude_profile_pictures is not None:
+        profile_pictures = profile_pictures.exclude(pk__in=exclude_profile_pictures.values('pk'))
+
+    prefixes = {url: _original_prefix(url) for url in urls}
+    exact_urls = [url for url, prefix in prefixes.items() if prefix is None]
+    referenced = _referenced(books, profile_pictures, exact_urls, set(filter(None, prefixes.values())))
+
+    return [url for url in urls if url not in referenced and (prefixes[url] is None or prefixes[url] not in referenced)]
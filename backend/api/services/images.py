@@ -0,0 +1,159 @@
+"""
+services/images.py
+
+Resized derivatives ("variants") of cover art and profile pictures.
+
+Catalog pages show small cards, yet they used to download every full-size original. After an image is uploaded,
+a background job (see `api/tasks.py`) uses Pillow to create WebP and JPEG copies at the widths in
+`IMAGE_VARIANT_WIDTHS` and stores them next to the original in a `variants/` folder. Their URLs are saved on the
+row as a dict:
+
+    {'source': <original URL>, 'webp': {'160': <URL>, ...}, 'jpeg': {'160': <URL>, ...}}
+
+Variant keys are derived from the original key, so generating variants twice overwrites the same objects, and
+the 'source' entry lets the job skip images that are already processed. Widths larger than the original are
+skipped (the original width is used instead), so images are never upscaled.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Functions:
+----------
+- variant_key(original_key, width, extension)
+    Returns the S3 key of one variant of an image.
+- generate_variants(image_url)
+    Creates and uploads the variants of an image and returns the variants dict.
+- needs_variants(image_url, variants)
+    Checks whether the stored variants are missing or belong to a different image.
+- public_variants(image_url, variants)
+    Returns the variants of the current image without the internal 'source' entry, for API responses.
+- variant_urls(variants)
+    Returns every variant URL in a variants dict (to delete them).
+"""
+import io
+import posixpath
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+from api.aws.client import get_s3_client, s3_key_from_url, s3_url_for_key
+from api.aws.upload import upload_extra_args
+
+# Output formats: name -> (Pillow format, MIME type, file extension)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'image/webp', 'webp'),
+    'jpeg': ('JPEG', 'image/jpeg', 'jpg'),
+}
+
+
+def variant_key(original_key, width, extension):
+    """
+    Get the S3 key of a variant, e.g. 'bookArt/variants/5_cover_art_<hash>_cover_w320q80.webp'.
+
+    The encoding quality is part of the key, so changing IMAGE_VARIANT_QUALITY never rewrites an existing
+    object (objects are cached as immutable).
+
+    :param original_key: The key of the original image.
+    :param width: The width of the variant in pixels.
+    :param extension: The file extension of the variant.
+    :return: The variant key.
+    """
+    folder, file_name = posixpath.split(original_key)
+    stem = posixpath.splitext(file_name)[0]
+    return posixpath.join(folder, 'variants', f'{stem}_w{width}q{settings.IMAGE_VARIANT_QUALITY}.{extension}')
+
+
+def _target_widths(original_width):
+    widths = sorted({width for width in settings.IMAGE_VARIANT_WIDTHS if width < original_width})
+    if len(widths) < len(settings.IMAGE_VARIANT_WIDTHS):
+        widths.append(original_width)  # Some widths were too large: include the original size instead
+    return widths
+
+
+def _encode(image, pillow_format):
+    buffer = io.BytesIO()
+    if pillow_format == 'JPEG':
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # JPEG has no transparency: flatten onto white
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            rgba = image.convert('RGBA')
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            image = background
+        else:
+            image = image.convert('RGB')
+        image.save(buffer, 'JPEG', quality=settings.IMAGE_VARIANT_QUALITY, optimize=True, progressive=True)
+    else:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        image.save(buffer, pillow_format, quality=settings.IMAGE_VARIANT_QUALITY, method=4)
+    buffer.seek(0)
+    return buffer
+
+
+def generate_variants(image_url):
+    """
+    Download an image from S3, create its resized variants and upload them.
+
+    :param image_url: The URL of the original image in the bucket.
+    :return: The variants dict.
+    """
+    s3_client = get_s3_client()
+    original_key = s3_key_from_url(image_url)
+    response = s3_client.get_object(Bucket=settings.AWS_S3_BUCKET_NAME, Key=original_key)
+    with response['Body'] as body:
+        image = Image.open(io.BytesIO(body.read()))
+        image.load()
+    image = ImageOps.exif_transpose(image)  # Apply camera rotation before resizing
+
+    variants = {'source': image_url}
+    for width in _target_widths(image.width):
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+        for name, (pillow_format, content_type, extension) in VARIANT_FORMATS.items():
+            key = variant_key(original_key, width, extension)
+            s3_client.upload_fileobj(
+                _encode(resized, pillow_format),
+                settings.AWS_S3_BUCKET_NAME,
+                key,
+                ExtraArgs=upload_extra_args(content_type),
+            )
+            variants.setdefault(name, {})[str(width)] = s3_url_for_key(key)
+    return variants
+
+
+def needs_variants(image_url, variants):
+    """
+    Check whether variants have to be (re)generated for an image.
+
+    :param image_url: The current image URL (may be empty).
+    :param variants: The stored variants dict.
+    :return: True if the image has no variants yet or they were made from another image.
+    """
+    return bool(image_url) and (variants or {}).get('source') != image_url
+
+
+def public_variants(image_url, variants):
+    """
+    Get the variants to include in API responses (formats mapped to {width: URL}).
+
+    Variants that were made from a previous image (the job for the new one has not run yet) are hidden.
+
+    :param image_url: The current image URL.
+    :param variants: The stored variants dict.
+    :return: The dict without the 'source' entry, or an empty dict.
+    """
+    if not image_url or needs_variants(image_url, variants):
+        return {}
+    return {name: urls for name, urls in variants.items() if name != 'source'}
+
+
+def variant_urls(variants):
+    """
+    Get every variant URL in a variants dict.
+
+    :param variants: The stored variants dict.
+    :return: A list of URLs.
+    """
+    return [url for name, urls in (variants or {}).items() if name != 'source' for url in urls.values()]
@@ -0,0 +1,255 @@
+"""
+services/instrumentation.py
+
+Per-request timing: where the time of each request goes.
+
+`RequestTimingMiddleware` gives every request a `RequestTimings` collector and, once the response is ready,
+reports the wall time and, for each kind of work, how often it happened and how long it took:
+
+- 'db': database queries, timed by a wrapper added to every connection (`install_query_timer`, called from
+  the `connection_created` signal). Replicas are included.
+- 's3': S3 client calls, timed by the shared client (see api/aws/client.py). A whole `upload_fileobj` counts as
+  one call; the parts of a streamed multipart upload are counted one by one.
+- 'serialize': building the `data` of `BookSerializer` and `CommentSerializer` (nested serializers are part of
+  the outer one). Queries made while serializing count as 'db' as well, so an N+1 regression shows up as
+  'serialize' time together with a high query count.
+
+The results go out two ways:
+- A `Server-Timing` header on every response (`SERVER_TIMING_HEADER`), shown in the browser's network panel
+  (`Timing-Allow-Origin` lets the frontend origins in `CORS_ALLOWED_ORIGINS` see it).
+- One JSON log line per request on the 'api.requests' logger, for a sample of the requests
+  (`REQUEST_LOG_SAMPLE_RATE`). Requests slower than `REQUEST_SLOW_MS` or with more than
+  `REQUEST_SLOW_QUERIES` queries are always logged, as warnings.
+
+The request latency and the connection pool usage also go to the Prometheus metrics (see api/services/metrics.py).
+
+The collector lives in a context variable, so it follows the request into `sync_to_async` threads (async views)
+and into the threads of a streamed upload. Work done outside a request (jobs, management commands) is not timed.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Classes:
+--------
+- RequestTimings
+    Thread-safe counts and times of one request.
+- RequestTimingMiddleware
+    Times every request and reports the results (sync and async).
+- TimedSerializerMixin / TimedListSerializer
+    Add the time spent serializing to the request timings.
+
+Functions:
+----------
+- record(name, seconds)
+    Adds one timed operation to the current request.
+- timed(name)
+    Context manager timing a block of the current request.
+- install_query_timer(connection)
+    Adds the query timer to a database connection.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from rest_framework import serializers
+
+from api.services import metrics
+
+logger = logging.getLogger('api.requests')
+
+# Kinds of work reported for every request, in Server-Timing order
+TIMED_OPERATIONS = ('db', 's3', 'serialize')
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """
+    Counts and total times of the work done for one request.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.counts = dict.fromkeys(TIMED_OPERATIONS, 0)
+        self.seconds = dict.fromkeys(TIMED_OPERATIONS, 0.0)
+        self.active = set()  # Names being timed by `timed`, so nested blocks are not counted twice
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.counts[name] += 1
+            self.seconds[name] += seconds
+
+    def milliseconds(self, name):
+        return round(self.seconds[name] * 1000, 2)
+
+
+def record(name, seconds):
+    """
+    Add one operation to the timings of the current request (nothing happens outside a request).
+
+    :param name: One of TIMED_OPERATIONS.
+    :param seconds: How long it took.
+    :return: None
+    """
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def timed(name):
+    """
+    Time a block as one operation of the current request. A block nested in another one of the same name is
+    part of the outer block and not counted again.
+
+    :param name: One of TIMED_OPERATIONS.
+    """
+    timings = _current.get()
+    if timings is None or name in timings.active:
+        yield
+        return
+    timings.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.active.discard(name)
+        timings.add(name, time.perf_counter() - started)
+
+
+def _time_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add('db', time.perf_counter() - started)
+
+
+def install_query_timer(connection):
+    """
+    Time the queries of a database connection for the request timings.
+
+    The wrapper stays on the connection for its lifetime (it does nothing outside a request), so it is added
+    once when the connection is created instead of around every request.
+
+    :param connection: The Django database connection.
+    :return: None
+    """
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    """
+    List serializer adding the time spent building `data` to the request timings.
+    """
+
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+
+class TimedSerializerMixin:
+    """
+    Serializer mixin adding the time spent building `data` to the request timings. Set
+    `list_serializer_class = TimedListSerializer` in the Meta to time `many=True` as well.
+    """
+
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+
+class RequestTimingMiddleware:
+    """
+    Times every request and reports the results in a `Server-Timing` header and in the request log.
+
+    Listed first in MIDDLEWARE, so the time of the other middleware is included.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.report(request, response, timings)
+        return response
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.report(request, response, timings)
+        return response
+
+    def report(self, request, response, timings):
+        """
+        Record the request metrics, add the Server-Timing header and log the request if it is sampled, slow or
+        makes too many queries.
+        """
+        elapsed = time.perf_counter() - timings.started
+        total_ms = round(elapsed * 1000, 2)
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match else None
+
+        metrics.observe_request(route, request.method, response.status_code, elapsed)
+        metrics.update_pool_gauges()
+
+        if settings.SERVER_TIMING_HEADER:
+            entries = [f'total;dur={total_ms}']
+            entries += [
+                f'{name};dur={timings.milliseconds(name)};desc="{timings.counts[name]}"'
+                for name in TIMED_OPERATIONS if timings.counts[name]
+            ]
+            response['Server-Timing'] = ', '.join(entries)
+            if settings.CORS_ALLOWED_ORIGINS:
+                # Lets the frontend's browser show the timings of cross-origin API requests
+                response['Timing-Allow-Origin'] = ', '.join(settings.CORS_ALLOWED_ORIGINS)
+
+        slow = total_ms >= settings.REQUEST_SLOW_MS or timings.counts['db'] > settings.REQUEST_SLOW_QUERIES
+        if not slow and random.random() >= settings.REQUEST_LOG_SAMPLE_RATE:
+            return
+
+        line = {
+            'method': request.method,
+            'path': request.path,
+            'route': route,
+            'status': response.status_code,
+            'duration_ms': total_ms,
+            'db_queries': timings.counts['db'],
+            'db_ms': timings.milliseconds('db'),
+            's3_calls': timings.counts['s3'],
+            's3_ms': timings.milliseconds('s3'),
+            'serialize_ms': timings.milliseconds('serialize'),
+            'slow': slow,
+        }
+        logger.log(logging.WARNING if slow else logging.INFO, json.dumps(line))
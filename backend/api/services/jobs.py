@@ -0,0 +1,244 @@
+"""
+services/jobs.py
+
+A small, database-backed background job queue.
+
+Views use it to move slow side effects (S3 deletes, copies and image post-processing) off the request thread.
+Jobs are rows in the 'BackgroundJob' table, so no external broker is needed; `python manage.py run_jobs` starts
+a worker that executes them.
+
+- Handlers are registered by name with the `@job('name')` decorator (see `api/tasks.py`) and receive the
+  job payload as keyword arguments. Handlers must be idempotent: a job can run more than once if a worker dies.
+- `enqueue()` accepts an optional idempotency key; enqueuing a second job with the same key is a no-op.
+- A failed job is retried with exponential backoff (`JOB_RETRY_BACKOFF` seconds, doubled per attempt) and is
+  moved to the 'DeadLetterJob' table after `JOB_MAX_ATTEMPTS` attempts.
+- Jobs that stay 'running' for longer than `JOB_LOCK_TIMEOUT` seconds (e.g. the worker was killed) are picked
+  up again.
+
+The backend is pluggable through the `JOB_QUEUE_BACKEND` setting (a dotted path):
+- 'api.services.jobs.DatabaseBackend' (default): stores jobs for the worker.
+- 'api.services.jobs.ImmediateBackend': runs jobs in-process once the current transaction commits, which is
+  handy for development without a worker. Failures are written to the dead-letter table.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Functions:
+----------
+- job(name)
+    Decorator registering a job handler.
+- enqueue(name, payload=None, idempotency_key=None, delay=0, max_attempts=None)
+    Queues a job with the configured backend.
+- claim_jobs(limit)
+    Marks up to `limit` due jobs as running and returns them (used by the worker).
+- run_job(job)
+    Executes a claimed job and records the outcome.
+- run_pending(limit=10)
+    Claims and runs one batch of due jobs.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from api.models.backgroundJob import BackgroundJob, DeadLetterJob
+
+logger = logging.getLogger(__name__)
+
+# Registered job handlers: name -> callable(**payload)
+registry = {}
+
+
+class UnknownJob(LookupError):
+    """
+    Raised when a job name has no registered handler.
+    """
+
+
+def job(name):
+    """
+    Register a function as the handler for a job name.
+
+    :param name: The job name used with `enqueue()`.
+    :return: The decorator.
+    """
+    def decorator(func):
+        registry[name] = func
+        return func
+    return decorator
+
+
+class DatabaseBackend:
+    """
+    Stores jobs in the 'BackgroundJob' table for `manage.py run_jobs`.
+    """
+
+    def enqueue(self, name, payload, idempotency_key, delay, max_attempts):
+        fields = {
+            'name': name,
+            'payload': payload,
+            'idempotency_key': idempotency_key,
+            'max_attempts': max_attempts,
+            'run_after': timezone.now() + timedelta(seconds=delay),
+        }
+        if idempotency_key is None:
+            return BackgroundJob.objects.create(**fields)
+
+        try:
+            # Savepoint so a duplicate key does not break the caller's transaction
+            with transaction.atomic():
+                return BackgroundJob.objects.create(**fields)
+        except IntegrityError:
+            return BackgroundJob.objects.get(idempotency_key=idempotency_key)
+
+
+class ImmediateBackend:
+    """
+    Runs jobs in-process after the current transaction commits (no worker required).
+    """
+
+    def enqueue(self, name, payload, idempotency_key, delay, max_attempts):
+        if name not in registry:
+            raise UnknownJob(name)
+
+        def run():
+            try:
+                registry[name](**payload)
+            except Exception:
+                logger.exception('Job %s failed', name)
+                DeadLetterJob.objects.create(
+                    name=name,
+                    payload=payload,
+                    idempotency_key=idempotency_key,
+                    attempts=1,
+                    last_error=traceback.format_exc(),
+                    enqueued_at=timezone.now(),
+                )
+
+        transaction.on_commit(run)
+        return None
+
+
+def get_backend():
+    """
+    Return an instance of the configured job backend.
+    """
+    return import_string(settings.JOB_QUEUE_BACKEND)()
+
+
+def enqueue(name, payload=None, idempotency_key=None, delay=0, max_attempts=None):
+    """
+    Queue a background job.
+
+    :param name: The registered job name.
+    :param payload: A JSON-serializable dict passed to the handler as keyword arguments.
+    :param idempotency_key: Optional key; if a job with this key already exists, no new job is queued.
+    :param delay: Seconds to wait before the job may run.
+    :param max_attempts: Attempts allowed before dead-lettering (defaults to JOB_MAX_ATTEMPTS).
+    :return: The BackgroundJob (database backend) or None (immediate backend).
+    """
+    return get_backend().enqueue(
+        name,
+        payload or {},
+        idempotency_key,
+        delay,
+        max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def claim_jobs(limit):
+    """
+    Claim up to `limit` due jobs for this worker by marking them as running.
+
+    Uses SELECT ... FOR UPDATE SKIP LOCKED where the database supports it so several
+    workers can poll the same table without picking the same job.
+
+    :param limit: The maximum number of jobs to claim.
+    :return: A list of claimed BackgroundJob instances.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    due = Q(status=BackgroundJob.STATUS_PENDING, run_after__lte=now) | Q(
+        status=BackgroundJob.STATUS_RUNNING, locked_at__lt=stale
+    )
+
+    with transaction.atomic():
+        queryset = BackgroundJob.objects.filter(due).order_by('run_after', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        jobs = list(queryset[:limit])
+        if jobs:
+            BackgroundJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status=BackgroundJob.STATUS_RUNNING, locked_at=now
+            )
+    return jobs
+
+
+def run_job(job):
+    """
+    Execute a claimed job and record its outcome (success, retry or dead-letter).
+
+    :param job: A BackgroundJob returned by `claim_jobs()`.
+    :return: True if the job succeeded.
+    """
+    attempts = job.attempts + 1
+    try:
+        handler = registry.get(job.name)
+        if handler is None:
+            raise UnknownJob(job.name)
+        handler(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Job %s #%s failed (attempt %d of %d)', job.name, job.pk, attempts, job.max_attempts)
+
+        if attempts >= job.max_attempts:
+            with transaction.atomic():
+                DeadLetterJob.objects.create(
+                    name=job.name,
+                    payload=job.payload,
+                    idempotency_key=job.idempotency_key,
+                    attempts=attempts,
+                    last_error=error,
+                    enqueued_at=job.created_at,
+                )
+                job.delete()
+            return False
+
+        backoff = settings.JOB_RETRY_BACKOFF * (2 ** (attempts - 1))
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            status=BackgroundJob.STATUS_PENDING,
+            attempts=attempts,
+            last_error=error,
+            locked_at=None,
+            run_after=timezone.now() + timedelta(seconds=backoff),
+            updated_at=timezone.now(),
+        )
+        return False
+
+    BackgroundJob.objects.filter(pk=job.pk).update(
+        status=BackgroundJob.STATUS_SUCCEEDED,
+        attempts=attempts,
+        locked_at=None,
+        updated_at=timezone.now(),
+    )
+    return True
+
+
+def run_pending(limit=10):
+    """
+    Claim and run one batch of due jobs.
+
+    :param limit: The maximum number of jobs to run.
+    :return: The number of jobs that were run.
+    """
+    jobs = claim_jobs(limit)
+    for claimed in jobs:
+        run_job(claimed)
+    return len(jobs)
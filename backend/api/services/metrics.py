@@ -0,0 +1,140 @@
+"""
+services/metrics.py
+
+Prometheus metrics of the API, served at /metrics (see api/views/admin/metrics.py).
+
+- library_http_request_duration_seconds{route, method, status}: request latency per URL name, e.g.
+  'public_books_list', 'site_statistics' or 'update_profile_picture' ('unmatched' for unknown URLs). Recorded by
+  `RequestTimingMiddleware`.
+- library_book_counter_increments_total{field}: book view and download increments (see api/services/counters.py).
+- library_throttled_requests_total{scope}: requests rejected by a rate limit, e.g. 'increments'.
+- library_s3_operations_total{operation, outcome} and library_s3_operation_duration_seconds{operation}: S3 client
+  calls ('success' or 'failure') and their latency, recorded by the shared client (see api/aws/client.py).
+- library_s3_upload_bytes_total{operation}: bytes sent to S3 by put_object, upload_part and upload_fileobj.
+- library_db_connections_total{alias} and library_db_connect_duration_seconds{alias}: connections handed to
+  Django and, on PostgreSQL, the time it took to get them (see api/services/db_connections.py).
+- library_db_pool_connections{alias, state}: pooled connections 'in_use' and 'available' (with `DB_POOL`), as of
+  each worker's latest request.
+
+Gunicorn runs several worker processes and a scrape reaches only one of them, so the metrics use the
+prometheus_client multiprocess mode: every worker writes its values to files in `PROMETHEUS_MULTIPROC_DIR`
+(named after its pid), and /metrics adds up the files of all workers. `gunicorn.conf.py` sets the directory,
+empties it on startup and drops the pool gauges of workers that exit. Without the directory (e.g. runserver),
+the metrics of the single process are served.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Functions:
+----------
+- observe_request(route, method, status, seconds)
+    Records the latency of a request.
+- observe_s3(operation, seconds, failed, upload_bytes=None)
+    Records an S3 client call.
+- update_pool_gauges()
+    Copies the pool usage of this worker into the pool gauges.
+- render()
+    Returns the metrics of every worker in the Prometheus text format, and its content type.
+"""
+import os
+
+from django.db import connections
+from django.views.generic.base import View
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+REQUEST_DURATION = Histogram(
+    'library_http_request_duration_seconds', 'Time taken to answer a request.', ['route', 'method', 'status'],
+)
+BOOK_COUNTER_INCREMENTS = Counter(
+    'library_book_counter_increments_total', 'Book view and download increments.', ['field'],
+)
+THROTTLED_REQUESTS = Counter(
+    'library_throttled_requests_total', 'Requests rejected by a rate limit.', ['scope'],
+)
+S3_OPERATIONS = Counter(
+    'library_s3_operations_total', 'S3 client calls.', ['operation', 'outcome'],
+)
+S3_OPERATION_DURATION = Histogram(
+    'library_s3_operation_duration_seconds', 'Time taken by an S3 client call.', ['operation'],
+)
+S3_UPLOAD_BYTES = Counter(
+    'library_s3_upload_bytes_total', 'Bytes uploaded to S3.', ['operation'],
+)
+DB_CONNECTIONS = Counter(
+    'library_db_connections_total', 'Database connections handed to Django (new, or from the pool).', ['alias'],
+)
+DB_CONNECT_DURATION = Histogram(
+    'library_db_connect_duration_seconds', 'Time taken to open a connection or get one from the pool.', ['alias'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10),
+)
+# 'livesum': the values of all running workers are added up, and those of exited workers are dropped
+DB_POOL_CONNECTIONS = Gauge(
+    'library_db_pool_connections', 'Pooled database connections per state.', ['alias', 'state'],
+    multiprocess_mode='livesum',
+)
+
+
+def observe_request(route, method, status, seconds):
+    """
+    Record the latency of a request.
+
+    :param route: The URL name of the view, or None if the URL did not match.
+    :param method: The HTTP method.
+    :param status: The response status code.
+    :param seconds: The time taken to answer it.
+    :return: None
+    """
+    if method.lower() not in View.http_method_names:
+        method = 'OTHER'  # Clients can send any method name, which must not create new series
+    REQUEST_DURATION.labels(route or 'unmatched', method, str(status)).observe(seconds)
+
+
+def observe_s3(operation, seconds, failed, upload_bytes=None):
+    """
+    Record an S3 client call.
+
+    :param operation: The client method, e.g. 'put_object'.
+    :param seconds: The time the call took.
+    :param failed: Whether it raised an error.
+    :param upload_bytes: The size of the uploaded body, if the call uploads one.
+    :return: None
+    """
+    S3_OPERATIONS.labels(operation, 'failure' if failed else 'success').inc()
+    S3_OPERATION_DURATION.labels(operation).observe(seconds)
+    if upload_bytes and not failed:
+        S3_UPLOAD_BYTES.labels(operation).inc(upload_bytes)
+
+
+def update_pool_gauges():
+    """
+    Set the pool gauges from the connection pools of this worker (nothing happens without `DB_POOL`).
+
+    :return: None
+    """
+    for alias in connections:
+        if not connections.settings[alias].get('OPTIONS', {}).get('pool'):
+            continue
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is None:
+            continue
+        stats = pool.get_stats()
+        in_use = stats.get('pool_size', 0) - stats.get('pool_available', 0)
+        DB_POOL_CONNECTIONS.labels(alias, 'in_use').set(in_use)
+        DB_POOL_CONNECTIONS.labels(alias, 'available').set(stats.get('pool_available', 0))
+
+
+def render():
+    """
+    Render the metrics in the Prometheus text format, added up over all workers in multiprocess mode.
+
+    :return: The body and its content type.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
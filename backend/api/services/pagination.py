@@ -0,0 +1,222 @@
+"""
+services/pagination.py
+
+Keyset (cursor) pagination helpers.
+
+Offset pagination (`django.core.paginator.Paginator`) needs a `COUNT(*)` and an `OFFSET` scan for every page,
+so deep pages get slower the further a user scrolls. Keyset pagination instead remembers the sort key of the
+last row that was returned and asks the database for the rows "after" it, which an index on the sort columns
+can answer directly no matter how deep the page is.
+
+Cursors are opaque, URL-safe strings that encode the name of the active sort, the sort values of the last row
+and its ID (always used as the final tiebreaker so every row has a unique position).
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Functions:
+----------
+- encode_cursor(sort_name, values)
+    Builds an opaque cursor string.
+- decode_cursor(cursor, sort_name)
+    Reads a cursor string back, checking it belongs to the active sort.
+- with_tiebreaker(ordering) / order_by_args(ordering)
+    Helpers to turn a sort definition into a stable `order_by()`.
+- keyset_queryset(queryset, sort_name, ordering, cursor=None)
+    Orders a queryset and filters it down to the rows after a cursor.
+- paginate_by_cursor(queryset, sort_name, ordering, cursor=None, page_size=10)
+    Returns one page of results and the cursor for the next page.
+- apaginate_by_cursor(queryset, sort_name, ordering, cursor=None, page_size=10)
+    Async version of `paginate_by_cursor` for async views.
+"""
+import base64
+import json
+from datetime import date, datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a cursor cannot be decoded or does not match the requested sort.
+    """
+
+
+def _to_json(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(sort_name, values):
+    """
+    Build an opaque cursor from the sort name and the sort values of the last row on a page.
+
+    :param sort_name: The name of the active sort (e.g. 'most_viewed').
+    :param values: The sort values of the last row, ending with its ID.
+    :return: A URL-safe cursor string.
+    """
+    payload = json.dumps({'s': sort_name, 'v': [_to_json(value) for value in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort_name):
+    """
+    Decode a cursor built by `encode_cursor`.
+
+    :param cursor: The cursor string from the request.
+    :param sort_name: The sort the client is currently asking for.
+    :return: The list of sort values stored in the cursor.
+    :raises InvalidCursor: If the cursor is malformed or was built for a different sort.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        values = payload['v']
+        cursor_sort = payload['s']
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor('Invalid cursor.')
+    if not isinstance(values, list):
+        raise InvalidCursor('Invalid cursor.')
+
+    if cursor_sort != sort_name:
+        raise InvalidCursor('Cursor does not match the requested sort order.')
+    return values
+
+
+def _cursor_values(queryset, ordering, values):
+    """
+    Convert the JSON values of a cursor to the types of the ordering fields (model fields or annotations).
+
+    Cursors come from the client, so a value of the wrong type (e.g. text for 'views') raises InvalidCursor
+    instead of failing in the query.
+    """
+    converted = []
+    for (name, _), value in zip(ordering, values):
+        if name in queryset.query.annotations:
+            field = queryset.query.annotations[name].output_field
+        else:
+            try:
+                field = queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                raise InvalidCursor('Invalid cursor.')
+        try:
+            value = field.to_python(value)
+        except (ValidationError, ValueError, TypeError):
+            raise InvalidCursor('Invalid cursor.')
+        if value is None:
+            raise InvalidCursor('Invalid cursor.')
+        converted.append(value)
+    return converted
+
+
+def _after(ordering, values):
+    """
+    Build the filter selecting rows that come strictly after `values` in `ordering`.
+
+    For an ordering (a, b, id) this is the lexicographic comparison:
+        a > va OR (a = va AND b > vb) OR (a = va AND b = vb AND id > vid)
+    with '>' flipped to '<' for descending fields.
+
+    The redundant bound `a >= va` is added in front: databases cannot seek an index with the OR alone and
+    would read it from the start, while the bound turns the query into a range scan from the cursor.
+    """
+    condition = Q()
+    for index, (field, descending) in enumerate(ordering):
+        lookup = f'{field}__lt' if descending else f'{field}__gt'
+        branch = Q(**{lookup: values[index]})
+        for previous_index, (previous_field, _) in enumerate(ordering[:index]):
+            branch &= Q(**{previous_field: values[previous_index]})
+        condition |= branch
+
+    if len(ordering) > 1:
+        first_field, descending = ordering[0]
+        condition = Q(**{f"{first_field}__{'lte' if descending else 'gte'}": values[0]}) & condition
+    return condition
+
+
+def with_tiebreaker(ordering):
+    """
+    Append the ID to an ordering (in the direction of its first field) so every row has a unique position.
+
+    :param ordering: A list of (field_name, descending) tuples.
+    :return: The ordering with ('id', descending) appended.
+    """
+    return list(ordering) + [('id', ordering[0][1] if ordering else False)]
+
+
+def order_by_args(ordering):
+    """
+    Convert a list of (field_name, descending) tuples into `QuerySet.order_by()` arguments.
+    """
+    return [f'-{field}' if descending else field for field, descending in ordering]
+
+
+def keyset_queryset(queryset, sort_name, ordering, cursor=None):
+    """
+    Order a queryset for keyset pagination and, given a cursor, keep only the rows after it.
+
+    :param queryset: The filtered queryset to paginate.
+    :param sort_name: The name of the active sort.
+    :param ordering: The full ordering, including the ID tiebreaker (see `with_tiebreaker`).
+    :param cursor: The cursor returned with the previous page, or None for the first page.
+    :return: The ordered (and filtered) queryset.
+    :raises InvalidCursor: If the cursor is malformed or was built for a different sort.
+    """
+    queryset = queryset.order_by(*order_by_args(ordering))
+    if cursor:
+        values = decode_cursor(cursor, sort_name)
+        if len(values) != len(ordering):
+            raise InvalidCursor('Invalid cursor.')
+        queryset = queryset.filter(_after(ordering, _cursor_values(queryset, ordering, values)))
+    return queryset
+
+
+def paginate_by_cursor(queryset, sort_name, ordering, cursor=None, page_size=10):
+    """
+    Return a single page of a queryset using keyset pagination.
+
+    The ID is appended to the ordering as a tiebreaker (in the direction of the first sort field),
+    so the ordering must not already include it.
+
+    :param queryset: The filtered queryset to paginate.
+    :param sort_name: The name of the active sort, stored in the cursor.
+    :param ordering: A list of (field_name, descending) tuples describing the sort.
+    :param cursor: The cursor returned with the previous page, or None for the first page.
+    :param page_size: The number of rows per page.
+    :return: A tuple of (list of rows, next cursor or None).
+    :raises InvalidCursor: If the cursor is malformed or was built for a different sort.
+    """
+    ordering = with_tiebreaker(ordering)
+    queryset = keyset_queryset(queryset, sort_name, ordering, cursor)
+
+    # Fetch one extra row to find out whether there is another page
+    rows = list(queryset[:page_size + 1])
+    return _page(rows, sort_name, ordering, page_size)
+
+
+async def apaginate_by_cursor(queryset, sort_name, ordering, cursor=None, page_size=10):
+    """
+    Return a single page of a queryset using keyset pagination, fetching the rows with the async ORM.
+
+    Takes the same arguments and returns the same values as `paginate_by_cursor`.
+    """
+    ordering = with_tiebreaker(ordering)
+    queryset = keyset_queryset(queryset, sort_name, ordering, cursor)
+    rows = [row async for row in queryset[:page_size + 1]]
+    return _page(rows, sort_name, ordering, page_size)
+
+
+def _page(rows, sort_name, ordering, page_size):
+    """
+    Cut the extra row off a page and build the cursor for the next page.
+    """
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_name, [getattr(last, field) for field, _ in ordering])
+    return rows, next_cursor
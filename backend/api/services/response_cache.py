@@ -0,0 +1,271 @@
+"""
+services/response_cache.py
+
+Server-side cache for the public read endpoints (book catalog, book details, top books and comment threads).
+
+These responses are the same for every visitor, so the serialized data is stored in the Django cache (see
+`CACHES` in settings) under a key built from the view, its URL arguments and the normalized query parameters
+that affect the result. Views that add per-user data for signed-in users (e.g. `is_favorited` in the catalog)
+are cached with `per_user=True`, which adds the user's ID to the key of their requests. Unknown parameters are ignored and the rest are sorted, so `?page=2&sort_by=title_asc`
+and `?sort_by=title_asc&page=2&utm_source=x` share one entry.
+
+Invalidation is versioned instead of deleting keys (most cache backends cannot delete by prefix). Every cached
+response depends on a few namespaces, and the current version of each namespace is part of the key:
+
+- 'books': the catalog and the top books lists. Changes when a book is created, updated or deleted.
+- 'book:<id>': the details of one book. Also changes when its counters are flushed or it is (un)favorited.
+- 'favorites:<user id>': the `is_favorited` flags in one user's catalog (written as 'favorites:{user}', and left
+  out for anonymous requests).
+- 'comments:<book id>': the comment thread of one book.
+- 'users': usernames and profile pictures shown next to books and comments.
+
+View/download counter flushes and favorites do not bump 'books': on a busy site that would drop the whole
+catalog every few seconds. Responses that show the counts of many books (the catalog and the top books lists)
+are declared with `shows_counts=True` instead and cached for at most `RESPONSE_CACHE_COUNTS_TIMEOUT` seconds,
+which bounds how stale their counts and the orders built on them (most viewed, trending) can get.
+
+`bump()` gives a namespace a new random version, so the entries built with the old one are no longer found and
+simply expire after `RESPONSE_CACHE_TIMEOUT` seconds. The signal handlers in `api/signals.py` bump the affected
+namespaces when books, comments, favorites, users and profile pictures are saved or deleted, and when buffered
+view/download counters are flushed.
+
+Versions start with the time of the bump. Responses read from a database replica (see `api/db/router.py`) are
+not stored while a namespace they depend on was bumped less than `DB_REPLICA_MAX_LAG` seconds ago, since the
+replica may not have the change yet and the stale response would otherwise be cached under the new version.
+
+Each cached response carries an ETag. Requests with a matching `If-None-Match` header get an empty 304.
+
+The decorator also caches the async public views (see `api/views/public_async.py`). Their responses are built as
+`JsonResponse`s, and the cache is read and written through `sync_to_async`, since cache backends talk to their
+server synchronously.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Functions:
+----------
+- bump(*namespaces)
+    Invalidates every cached response that depends on the given namespaces.
+- book_changed(book_id)
+    Invalidates the responses that show a book.
+- favorites_changed(user_id, book_ids)
+    Invalidates the responses that show a user's favorites.
+- cache_response(namespaces, params=(), per_user=False, shows_counts=False)
+    Decorator that caches a viewset method's (or async view method's) response.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponseNotModified, JsonResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+from api.db import router as replica_router
+
+VERSION_KEY = 'response_cache:version:{}'
+RESPONSE_KEY = 'response_cache:{view}:{digest}'
+
+
+def _versions(namespaces):
+    """
+    Get the current version of each namespace, creating the missing ones.
+    """
+    keys = {VERSION_KEY.format(namespace): namespace for namespace in namespaces}
+    found = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in found}
+    if missing:
+        # add() keeps a version another worker stored in the meantime
+        for key, version in missing.items():
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+            found[key] = version
+    return [found[key] for key in keys]
+
+
+def _new_version():
+    # '<time of the bump>-<random>': the time tells whether a replica may still lag behind the change
+    return f'{time.time():.3f}-{uuid.uuid4().hex}'
+
+
+def _bumped_recently(versions, seconds):
+    now = time.time()
+    for version in versions:
+        bumped_at, separator, _ = version.partition('-')
+        if not separator:
+            continue  # A version from before timestamps were added, so older than any replica lag
+        if now - float(bumped_at) < seconds:
+            return True
+    return False
+
+
+def bump(*namespaces):
+    """
+    Give namespaces a new version, so the cached responses that depend on them are rebuilt.
+
+    :param namespaces: Namespace names, e.g. 'books' or 'book:5'.
+    :return: None
+    """
+    cache.set_many({VERSION_KEY.format(namespace): _new_version() for namespace in namespaces}, None)
+
+
+def book_changed(book_id):
+    """
+    Invalidate the catalog and the details of a book.
+
+    :param book_id: The ID of the book that was created, updated or deleted.
+    :return: None
+    """
+    bump('books', f'book:{book_id}')
+
+
+def favorites_changed(user_id, book_ids):
+    """
+    Invalidate the details of books a user (un)favorited and that user's catalog, but not everyone's catalog,
+    whose favorite counts refresh within `RESPONSE_CACHE_COUNTS_TIMEOUT`.
+
+    :param user_id: The ID of the user whose favorites changed.
+    :param book_ids: The IDs of the books that were added or removed.
+    :return: None
+    """
+    bump(f'favorites:{user_id}', *(f'book:{book_id}' for book_id in book_ids))
+
+
+def _etag(data):
+    body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True).encode()
+    return f'"{hashlib.md5(body).hexdigest()}"'
+
+
+def _matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(',')]
+    # Weak comparison: a proxy may have added the W/ prefix
+    return '*' in candidates or etag in (candidate.removeprefix('W/') for candidate in candidates)
+
+
+def _respond(request, data, etag, hit, as_json=False):
+    if _matches(request, etag):
+        response = HttpResponseNotModified() if as_json else Response(status=status.HTTP_304_NOT_MODIFIED)
+    elif as_json:
+        response = JsonResponse(data, safe=False)
+    else:
+        response = Response(data)
+    response['ETag'] = etag
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
+
+
+def _lookup(view_name, request, kwargs, namespaces, params, per_user):
+    """
+    Build the cache key of a request and get the cached response, if any.
+
+    :return: The cache key, the namespace versions it was built with and the cached entry (or None).
+    """
+    query = sorted(
+        (name, value)
+        for name in params
+        for value in request.GET.getlist(name)
+        if value != ''
+    )
+    user_id = request.user.pk if per_user and request.user.is_authenticated else None
+    # Per-user namespaces do not apply to anonymous requests
+    resolved = [
+        namespace.format(user=user_id, **kwargs)
+        for namespace in namespaces
+        if user_id is not None or '{user}' not in namespace
+    ]
+    versions = _versions(resolved)
+    key_source = repr((sorted(kwargs.items()), query, versions, user_id))
+    cache_key = RESPONSE_KEY.format(view=view_name, digest=hashlib.md5(key_source.encode()).hexdigest())
+    return cache_key, versions, cache.get(cache_key)
+
+
+def _store(cache_key, versions, data, timeout):
+    """
+    Cache a response, unless it was read from a replica that may not have a recent change yet.
+
+    :return: The ETag of the response.
+    """
+    etag = _etag(data)
+    if not (
+        replica_router.reading_from_replicas()
+        and _bumped_recently(versions, settings.DB_REPLICA_MAX_LAG)
+    ):
+        cache.set(cache_key, {'data': data, 'etag': etag}, timeout)
+    return etag
+
+
+def _timeout(shows_counts):
+    if shows_counts:
+        return min(settings.RESPONSE_CACHE_TIMEOUT, settings.RESPONSE_CACHE_COUNTS_TIMEOUT)
+    return settings.RESPONSE_CACHE_TIMEOUT
+
+
+def cache_response(namespaces, params=(), per_user=False, shows_counts=False):
+    """
+    Cache the successful responses of a public viewset method.
+
+    Async view methods are supported too; they must return a response with a `data` attribute holding the
+    JSON data (see `api/views/public_async.py`).
+
+    :param namespaces: Namespaces the response depends on. They are formatted with the URL arguments of the view,
+        e.g. 'book:{pk}', and the ID of the signed-in user as 'user' (only with per_user).
+    :param params: The query parameters that change the response. Others are left out of the cache key.
+    :param per_user: Whether the response differs for signed-in users, who then get their own entries.
+    :param shows_counts: Whether the response shows the view, download or favorite counts of many books, which
+        are not invalidated; it is then cached for at most RESPONSE_CACHE_COUNTS_TIMEOUT seconds.
+    :return: The decorator.
+    """
+    def decorator(view_method):
+        if inspect.iscoroutinefunction(view_method):
+            @functools.wraps(view_method)
+            async def async_wrapper(self, request, *args, **kwargs):
+                timeout = _timeout(shows_counts)
+                if timeout <= 0 or request.method != 'GET':
+                    return await view_method(self, request, *args, **kwargs)
+
+                view_name = f'{type(self).__name__}.{view_method.__name__}'
+                cache_key, versions, cached = await sync_to_async(_lookup)(
+                    view_name, request, kwargs, namespaces, params, per_user,
+                )
+                if cached is not None:
+                    return _respond(request, cached['data'], cached['etag'], hit=True, as_json=True)
+
+                response = await view_method(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+
+                etag = await sync_to_async(_store)(cache_key, versions, response.data, timeout)
+                return _respond(request, response.data, etag, hit=False, as_json=True)
+            return async_wrapper
+
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            timeout = _timeout(shows_counts)
+            if timeout <= 0 or request.method != 'GET':
+                return view_method(self, request, *args, **kwargs)
+
+            view_name = f'{type(self).__name__}.{view_method.__name__}'
+            cache_key, versions, cached = _lookup(view_name, request, kwargs, namespaces, params, per_user)
+            if cached is not None:
+                return _respond(request, cached['data'], cached['etag'], hit=True)
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response  # Errors and not-found responses are not cached
+
+            etag = _store(cache_key, versions, response.data, timeout)
+            return _respond(request, response.data, etag, hit=False)
+        return wrapper
+    return decorator
@@ -0,0 +1,176 @@
+"""
+services/search.py
+
+Full-text search for the public book catalog.
+
+This module keeps a tokenized, ranked search index over the title, author and description of every
+'Book' and exposes helpers to query it. The index lives in the database itself so no extra service is needed:
+
+- PostgreSQL: a weighted `tsvector` column (`api_book.search_vector`) backed by a GIN index.
+  Title is weighted 'A', author 'B' and description 'C', so title/author-only searches restrict the
+  query to the 'A' and 'B' lexemes instead of using a second index.
+- SQLite: an FTS5 virtual table (`api_book_fts`) keyed by the book ID and ranked with `bm25`.
+
+Any other database vendor falls back to the original `icontains` filters so the catalog keeps working.
+
+The index is kept up to date by the `Book` save/delete signals in `api/signals.py` and can be rebuilt
+from scratch with `python manage.py rebuild_search_index`.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Functions:
+----------
+- search_books(queryset, query, include_description=False)
+    Filters a Book queryset to the search matches and annotates each row with `search_rank`.
+- index_book(book_id)
+    Adds or refreshes a single book in the search index.
+- remove_book(book_id)
+    Removes a single book from the search index.
+- rebuild_index()
+    Rebuilds the whole search index from the 'api_book' table.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+# Weights used when ranking: title matches count the most, description matches the least
+FTS5_WEIGHTS = '10.0, 5.0, 1.0'
+
+# The tsvector expression used to (re)build the PostgreSQL search column
+POSTGRES_SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(author, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'C')"
+)
+
+# Only word characters are passed to the search engines, which keeps user input from
+# being interpreted as query syntax by either FTS5 or to_tsquery.
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def is_supported():
+    """
+    Returns True if the default database has a full-text index for books.
+    """
+    return connection.vendor in ('postgresql', 'sqlite')
+
+
+def tokenize(query):
+    """
+    Split a raw search string into lower-cased search tokens.
+
+    :param query: The raw search string from the request.
+    :return: A list of tokens (may be empty).
+    """
+    return [token.lower() for token in TOKEN_PATTERN.findall(query or '')]
+
+
+def search_books(queryset, query, include_description=False):
+    """
+    Restrict a Book queryset to the books matching the search query.
+
+    Every token must match (AND) and the last token of each word is matched as a prefix so
+    results appear while the user is still typing. Matching rows are annotated with
+    `search_rank` (higher is more relevant) which can be used for `sort_by=relevance`.
+
+    :param queryset: The Book queryset to filter.
+    :param query: The raw search string.
+    :param include_description: Whether the description should also be searched.
+    :return: The filtered and annotated queryset.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    if connection.vendor == 'postgresql':
+        weights = 'ABC' if include_description else 'AB'
+        ts_query = ' & '.join(f'{token}:*{weights}' for token in tokens)
+        return queryset.filter(
+            id__in=RawSQL(
+                "SELECT id FROM api_book WHERE search_vector @@ to_tsquery('simple', %s)",
+                [ts_query],
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                "ts_rank(api_book.search_vector, to_tsquery('simple', %s))",
+                [ts_query],
+                output_field=FloatField(),
+            )
+        )
+
+    if connection.vendor == 'sqlite':
+        match = ' AND '.join(f'"{token}"*' for token in tokens)
+        if not include_description:
+            match = '{title author} : (' + match + ')'
+        return queryset.filter(
+            id__in=RawSQL("SELECT rowid FROM api_book_fts WHERE api_book_fts MATCH %s", [match])
+        ).annotate(
+            # bm25() is lower for better matches, so negate it to get "higher is better"
+            search_rank=RawSQL(
+                f"SELECT -bm25(api_book_fts, {FTS5_WEIGHTS}) FROM api_book_fts "
+                "WHERE api_book_fts MATCH %s AND api_book_fts.rowid = api_book.id",
+                [match],
+                output_field=FloatField(),
+            )
+        )
+
+    # Fallback for databases without a search index
+    filters = Q(title__icontains=query) | Q(author__icontains=query)
+    if include_description:
+        filters |= Q(description__icontains=query)
+    return queryset.filter(filters).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def index_book(book_id):
+    """
+    Add or refresh a book in the search index using the values stored in the database.
+
+    :param book_id: The ID of the book to index.
+    :return: None
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f"UPDATE api_book SET search_vector = {POSTGRES_SEARCH_VECTOR} WHERE id = %s", [book_id])
+        elif connection.vendor == 'sqlite':
+            cursor.execute("DELETE FROM api_book_fts WHERE rowid = %s", [book_id])
+            cursor.execute(
+                "INSERT INTO api_book_fts (rowid, title, author, description) "
+                "SELECT id, title, author, description FROM api_book WHERE id = %s",
+                [book_id],
+            )
+
+
+def remove_book(book_id):
+    """
+    Remove a book from the search index.
+
+    PostgreSQL keeps the vector on the book row itself, so only SQLite needs work here.
+
+    :param book_id: The ID of the book to remove.
+    :return: None
+    """
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM api_book_fts WHERE rowid = %s", [book_id])
+
+
+def rebuild_index():
+    """
+    Rebuild the search index for every book.
+
+    :return: None
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f"UPDATE api_book SET search_vector = {POSTGRES_SEARCH_VECTOR}")
+        elif connection.vendor == 'sqlite':
+            cursor.execute("DELETE FROM api_book_fts")
+            cursor.execute(
+                "INSERT INTO api_book_fts (rowid, title, author, description) "
+                "SELECT id, title, author, description FROM api_book"
+            )
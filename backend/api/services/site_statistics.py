@@ -0,0 +1,189 @@
+"""
+services/site_statistics.py
+
+Materialized snapshot of the site statistics served by `PublicBookViewSet.site_statistics`.
+
+All figures are computed with a handful of queries (one aggregate over the book table, the book counts of the
+genre and language tables and one query each for the top viewed/downloaded book) and stored in the Django cache. The
+endpoint then reads the snapshot instead of querying the database.
+
+The snapshot is kept fresh in three ways:
+- Book creates, updates and deletes mark it stale, so the next read rebuilds it.
+- Counter flushes (see `api.services.counters`) add the flushed view/download deltas to two counters kept
+  next to the snapshot, which are added to the totals when it is read. Every gunicorn worker flushes on its
+  own, so the counters are updated with the cache's atomic `incr` instead of rewriting the snapshot (two
+  workers rewriting it at once would lose one update). Each build of the snapshot has its own counters, so
+  deltas already included in a rebuild are not counted again. Cache backends whose `incr` is not atomic
+  (file-based, database) mark the snapshot stale instead.
+- It is never served when older than `SITE_STATISTICS_MAX_AGE` seconds, which bounds how stale the
+  figures that are not updated in place (such as the top viewed book) can get.
+
+Run `python manage.py rebuild_site_statistics` to rebuild it by hand.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Functions:
+----------
+- compute_statistics()
+    Computes the statistics from the database.
+- get_statistics()
+    Returns the current snapshot, rebuilding it if it is missing or stale.
+- rebuild()
+    Computes and stores a new snapshot.
+- mark_stale()
+    Forces the next read to rebuild the snapshot.
+- apply_counter_deltas(deltas)
+    Adds flushed view/download increments to the counters of the stored snapshot.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+from django.db.models import Avg, Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+from api.models.book import Book
+from api.models.catalogTerm import Genre, Language
+
+CACHE_KEY = 'site_statistics:snapshot'
+# Flushed increments not in the snapshot yet, per snapshot build: (build, 'views' or 'downloads')
+DELTA_KEY = 'site_statistics:{}:{}'
+COUNTER_TOTALS = {'views': 'total_views', 'downloads': 'total_downloads'}
+
+# Backends where `incr` is a single atomic operation (the others read and write the value separately)
+ATOMIC_INCR_BACKENDS = (LocMemCache, BaseMemcachedCache, RedisCache)
+
+
+def compute_statistics():
+    """
+    Compute the site statistics from the database.
+
+    :return: A dict in the format returned by the site_statistics endpoint.
+    """
+    totals = Book.objects.aggregate(
+        total_books=Count('id'),
+        total_downloads=Sum('downloads'),
+        total_views=Sum('views'),
+        total_authors=Count('author', distinct=True),
+        oldest_book=Min('published_date'),
+        newest_book=Max('published_date'),
+        books_without_cover_art=Count('id', filter=Q(cover_art_url__isnull=True)),
+        average_views_per_book=Avg('views'),
+        average_downloads_per_book=Avg('downloads'),
+    )
+
+    # Read from the maintained counts of the genre and language tables instead of grouping the book table
+    genre_stats = dict(Genre.objects.filter(book_count__gt=0).order_by('name').values_list('name', 'book_count'))
+    books_per_language = [
+        {'language': name, 'count': count}
+        for name, count in Language.objects.filter(book_count__gt=0).order_by('-book_count', 'name').values_list('name', 'book_count')
+    ]
+
+    top_downloaded_book = Book.objects.order_by('-downloads').values('title', 'downloads').first()
+    top_viewed_book = Book.objects.order_by('-views').values('title', 'views').first()
+
+    return {
+        'total_books': totals['total_books'],
+        'total_downloads': totals['total_downloads'] or 0,
+        'total_views': totals['total_views'] or 0,
+        'genres': genre_stats,
+        'total_authors': totals['total_authors'],
+        'most_popular_language': books_per_language[0]['language'] if books_per_language else None,
+        'oldest_book': totals['oldest_book'],
+        'newest_book': totals['newest_book'],
+        'books_without_cover_art': totals['books_without_cover_art'],
+        'books_per_language': books_per_language,
+        'average_views_per_book': totals['average_views_per_book'] or 0,
+        'average_downloads_per_book': totals['average_downloads_per_book'] or 0,
+        'top_downloaded_book': {
+            'title': top_downloaded_book['title'] if top_downloaded_book else None,
+            'downloads': top_downloaded_book['downloads'] if top_downloaded_book else None,
+        },
+        'top_viewed_book': {
+            'title': top_viewed_book['title'] if top_viewed_book else None,
+            'views': top_viewed_book['views'] if top_viewed_book else None,
+        },
+        'generated_at': timezone.now(),
+    }
+
+
+def rebuild():
+    """
+    Compute the statistics and store them as the current snapshot.
+
+    :return: The new snapshot.
+    """
+    snapshot = compute_statistics()
+    cache.set(CACHE_KEY, {'build': uuid.uuid4().hex, 'statistics': snapshot}, None)
+    return snapshot
+
+
+def get_statistics():
+    """
+    Return the current snapshot, rebuilding it if it is missing or older than SITE_STATISTICS_MAX_AGE.
+
+    :return: A dict in the format returned by the site_statistics endpoint.
+    """
+    stored = cache.get(CACHE_KEY)
+    if stored is None:
+        return rebuild()
+
+    age = (timezone.now() - stored['statistics']['generated_at']).total_seconds()
+    if age > settings.SITE_STATISTICS_MAX_AGE:
+        return rebuild()
+    return _with_counter_deltas(stored)
+
+
+def _with_counter_deltas(stored):
+    """
+    Add the flushed increments counted since the snapshot was built to its totals.
+    """
+    snapshot = dict(stored['statistics'])
+    keys = {field: DELTA_KEY.format(stored['build'], field) for field in COUNTER_TOTALS}
+    deltas = cache.get_many(keys.values())
+    for field, total in COUNTER_TOTALS.items():
+        snapshot[total] += deltas.get(keys[field], 0)
+    if snapshot['total_books']:
+        snapshot['average_views_per_book'] = snapshot['total_views'] / snapshot['total_books']
+        snapshot['average_downloads_per_book'] = snapshot['total_downloads'] / snapshot['total_books']
+    return snapshot
+
+
+def mark_stale():
+    """
+    Drop the snapshot so it is rebuilt on the next read.
+    """
+    cache.delete(CACHE_KEY)
+
+
+def apply_counter_deltas(deltas):
+    """
+    Add flushed view/download increments to the counters of the stored snapshot without querying the database.
+
+    :param deltas: A dict of {book_id: {'views': n, 'downloads': m}}.
+    :return: None
+    """
+    stored = cache.get(CACHE_KEY)
+    if stored is None:
+        return
+    if not isinstance(caches[DEFAULT_CACHE_ALIAS], ATOMIC_INCR_BACKENDS):
+        mark_stale()
+        return
+
+    for field in COUNTER_TOTALS:
+        amount = sum(amounts.get(field, 0) for amounts in deltas.values())
+        if not amount:
+            continue
+        key = DELTA_KEY.format(stored['build'], field)
+        # The counter only has to outlive its snapshot, which is never served after SITE_STATISTICS_MAX_AGE
+        cache.add(key, 0, settings.SITE_STATISTICS_MAX_AGE)
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            mark_stale()  # The counter was evicted, so the snapshot can no longer be corrected
@@ -0,0 +1,151 @@
+"""
+services/trending.py
+
+Time-decayed trending score of books, used by `sort_by=trending` in the public catalog.
+
+Every view, download and favorite adds a weighted amount to the book's `trending_score`
+(`TRENDING_VIEW_WEIGHT`, `TRENDING_DOWNLOAD_WEIGHT`, `TRENDING_FAVORITE_WEIGHT`), and a periodic job multiplies
+all scores by the decay of one `TRENDING_DECAY_INTERVAL`, so activity loses half its weight every
+`TRENDING_HALF_LIFE` seconds. The score is therefore maintained incrementally:
+
+- View/download increments are added in the same UPDATE that flushes the buffered counters
+  (see `api.services.counters`).
+- Favorites are added and removed together with `favorites_count` (see `add_favorites` and `remove_favorites`).
+  Removing a favorite takes back only what is left of its weight after the decay since it was added, so a
+  favorite that is added and later removed leaves the score as if it had never been added.
+- The decay job only touches books with a score, walking the (trending_score, id) index, and resets scores that
+  have decayed below `MIN_SCORE` to 0 so inactive books drop out of it.
+
+The decay job reschedules itself through the job queue (`books.decay_trending`). `schedule_decay()` is called
+whenever counters are flushed, so the chain is started by the first activity after a deploy; it can also be
+started by hand with `python manage.py decay_trending_scores --schedule`.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Functions:
+----------
+- activity_delta(amounts)
+    Returns the score to add for a book's flushed view/download increments.
+- add_favorites(book_ids)
+    Atomically adds a favorite to the favorite count and trending score of books.
+- remove_favorites(favorited_at)
+    Atomically removes a favorite from the favorite count and the decayed weight of it from the trending score.
+- favorite_weight(created_at)
+    Returns what is left of the weight of a favorite added at the given time.
+- decay()
+    Applies one interval of decay to every trending score.
+- schedule_decay()
+    Queues the next decay job if this process has not done so for the current interval.
+"""
+import time
+
+from django.conf import settings
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from api.models.book import Book
+from api.services import jobs
+
+# Scores below this are set to 0 by the decay job
+MIN_SCORE = 0.01
+
+DECAY_JOB = 'books.decay_trending'
+
+# Decay interval this process last queued a job for (saves an INSERT attempt per counter flush)
+_scheduled_slot = None
+
+
+def activity_delta(amounts):
+    """
+    Get the trending score earned by a batch of view/download increments.
+
+    :param amounts: A dict like {'views': n, 'downloads': m}.
+    :return: The weighted sum.
+    """
+    return (
+        amounts.get('views', 0) * settings.TRENDING_VIEW_WEIGHT
+        + amounts.get('downloads', 0) * settings.TRENDING_DOWNLOAD_WEIGHT
+    )
+
+
+def favorite_weight(created_at):
+    """
+    Get what is left of a favorite's trending weight, decayed since the favorite was added.
+
+    :param created_at: When the favorite was added.
+    :return: TRENDING_FAVORITE_WEIGHT halved for every TRENDING_HALF_LIFE seconds since then.
+    """
+    age = max(0.0, (timezone.now() - created_at).total_seconds())
+    return settings.TRENDING_FAVORITE_WEIGHT * 0.5 ** (age / settings.TRENDING_HALF_LIFE)
+
+
+def add_favorites(book_ids):
+    """
+    Add a favorite to each of the books, in a single atomic UPDATE.
+
+    :param book_ids: The IDs of the books.
+    :return: None
+    """
+    book_ids = list(book_ids)
+    if not book_ids:
+        return
+    Book.objects.filter(pk__in=book_ids).update(
+        favorites_count=F('favorites_count') + 1,
+        trending_score=F('trending_score') + settings.TRENDING_FAVORITE_WEIGHT,
+    )
+
+
+def remove_favorites(favorited_at):
+    """
+    Remove a favorite from each of the books, in a single atomic UPDATE. The trending score loses only the
+    decayed weight of the favorite (see `favorite_weight`), not the full weight it was added with.
+
+    :param favorited_at: A dict mapping the ID of each book to when its removed favorite was added.
+    :return: None
+    """
+    if not favorited_at:
+        return
+    weights = Case(
+        *(When(pk=book_id, then=Value(favorite_weight(created_at))) for book_id, created_at in favorited_at.items()),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    # Never below 0 if the count has drifted
+    Book.objects.filter(pk__in=list(favorited_at), favorites_count__gte=1).update(
+        favorites_count=F('favorites_count') - 1,
+        trending_score=Greatest(F('trending_score') - weights, Value(0.0)),
+    )
+
+
+def decay():
+    """
+    Apply the decay of one TRENDING_DECAY_INTERVAL to every book with a trending score.
+
+    :return: The number of books that were updated.
+    """
+    factor = 0.5 ** (settings.TRENDING_DECAY_INTERVAL / settings.TRENDING_HALF_LIFE)
+    threshold = MIN_SCORE / factor  # Scores below this would end up below MIN_SCORE
+    cleared = Book.objects.filter(trending_score__gt=0, trending_score__lt=threshold).update(trending_score=0)
+    decayed = Book.objects.filter(trending_score__gte=threshold).update(trending_score=F('trending_score') * factor)
+    return cleared + decayed
+
+
+def schedule_decay():
+    """
+    Queue the decay job for the next interval, once per interval and process.
+
+    The idempotency key is derived from the interval, so all workers queue the same job.
+
+    :return: None
+    """
+    global _scheduled_slot
+    slot = int(time.time() // settings.TRENDING_DECAY_INTERVAL) + 1
+    if slot == _scheduled_slot:
+        return
+    _scheduled_slot = slot
+    delay = max(0, slot * settings.TRENDING_DECAY_INTERVAL - time.time())
+    jobs.enqueue(DECAY_JOB, {}, idempotency_key=f'trending-decay:{slot}', delay=delay)
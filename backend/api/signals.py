@@ -0,0 +1,189 @@
+"""
+signals.py
+
+Signal handlers for the API app.
+
+This file keeps derived data in sync with the models it is built from. It is imported by
+`ApiConfig.ready()` so the handlers are connected as soon as the app registry is ready.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.models.book import Book
+from api.models.comment import Comment
+from api.models.favoriteBooks import FavoriteBook
+from api.models.userProfilePicture import UserProfilePicture
+from api.services import catalog_terms, db_connections, favorites, images, instrumentation, jobs, response_cache, search, site_statistics, trending
+from api.services.counters import counters_flushed
+
+
+@receiver(post_save, sender=Book)
+def update_book_search_index(sender, instance, **kwargs):
+    """
+    Refresh the full-text search entry for a book whenever it is saved.
+    """
+    search.index_book(instance.pk)
+
+
+@receiver(post_delete, sender=Book)
+def remove_book_search_index(sender, instance, **kwargs):
+    """
+    Drop the full-text search entry for a deleted book.
+    """
+    search.remove_book(instance.pk)
+
+
+@receiver(post_save, sender=Book)
+def update_book_catalog_terms(sender, instance, update_fields=None, **kwargs):
+    """
+    Link a saved book to its normalized genre and language and update their book counts.
+    """
+    catalog_terms.sync_book(instance, update_fields)
+
+
+@receiver(post_delete, sender=Book)
+def remove_book_catalog_terms(sender, instance, **kwargs):
+    """
+    Remove a deleted book from the book counts of its genre and language.
+    """
+    catalog_terms.book_deleted(instance)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_site_statistics(sender, **kwargs):
+    """
+    Rebuild the site statistics snapshot on the next read after a book is created, updated or deleted.
+    """
+    site_statistics.mark_stale()
+
+
+@receiver(post_save, sender=FavoriteBook)
+def count_added_favorite(sender, instance, created, **kwargs):
+    """
+    Add a new favorite to the book's favorites_count and trending score.
+    """
+    if created:
+        trending.add_favorites([instance.book_id])
+
+
+@receiver(post_delete, sender=FavoriteBook)
+def count_removed_favorite(sender, instance, **kwargs):
+    """
+    Remove a deleted favorite from the book's favorites_count, and its decayed weight from the trending score
+    (also when a user is deleted).
+    Favorites removed through `api.services.favorites` are counted there in one UPDATE.
+    """
+    if not favorites.handles_counts():
+        trending.remove_favorites({instance.book_id: instance.created_at})
+
+
+@receiver(counters_flushed)
+def schedule_trending_decay(sender, **kwargs):
+    """
+    Make sure the trending score decay job is queued once there is activity to decay.
+    """
+    trending.schedule_decay()
+
+
+@receiver(counters_flushed)
+def update_site_statistics_counters(sender, deltas, **kwargs):
+    """
+    Add flushed view/download increments to the site statistics snapshot.
+    """
+    site_statistics.apply_counter_deltas(deltas)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_book_responses(sender, instance, **kwargs):
+    """
+    Drop the cached catalog and book details after a book changes.
+    """
+    response_cache.book_changed(instance.pk)
+
+
+@receiver(post_save, sender=FavoriteBook)
+@receiver(post_delete, sender=FavoriteBook)
+def invalidate_favorite_responses(sender, instance, **kwargs):
+    """
+    Drop the cached details of a book and the catalog of the user after the user (un)favorites it.
+    """
+    response_cache.favorites_changed(instance.user_id, [instance.book_id])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_responses(sender, instance, **kwargs):
+    """
+    Drop the cached comment thread of a book after one of its comments changes.
+    """
+    response_cache.bump(f'comments:{instance.book_id}')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=UserProfilePicture)
+@receiver(post_delete, sender=UserProfilePicture)
+def invalidate_user_responses(sender, update_fields=None, **kwargs):
+    """
+    Drop cached responses that show usernames or profile pictures after a user or their picture changes.
+    """
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return  # Logging in does not change anything that is shown publicly
+    response_cache.bump('users')
+
+
+@receiver(counters_flushed)
+def invalidate_counter_responses(sender, deltas, **kwargs):
+    """
+    Drop the cached details of books after their buffered view/download increments are written. The catalog and
+    top books lists are not invalidated; they are cached for at most RESPONSE_CACHE_COUNTS_TIMEOUT seconds.
+    """
+    response_cache.bump(*(f'book:{book_id}' for book_id in deltas))
+
+
+@receiver(post_save, sender=Book)
+def queue_cover_art_variants(sender, instance, **kwargs):
+    """
+    Queue the creation of resized cover art copies when a book gets a new cover.
+
+    There is no idempotency key: a cover can come back to an earlier URL (keys are content-addressed), and the
+    job skips books whose variants are already up to date.
+    """
+    if images.needs_variants(instance.cover_art_url, instance.cover_art_variants):
+        jobs.enqueue('images.book_cover_variants', {'book_id': instance.pk})
+
+
+@receiver(post_save, sender=UserProfilePicture)
+def queue_profile_picture_variants(sender, instance, **kwargs):
+    """
+    Queue the creation of resized profile picture copies when a user gets a new picture (without an
+    idempotency key, like the cover art).
+    """
+    if images.needs_variants(instance.profile_image_url, instance.variants):
+        jobs.enqueue('images.profile_picture_variants', {'profile_picture_id': instance.pk})
+
+
+@receiver(connection_created)
+def count_database_connection(sender, connection, **kwargs):
+    """
+    Count every database connection handed to Django, for the database stats endpoint.
+    """
+    db_connections.record_connect(connection.alias)
+
+
+@receiver(connection_created)
+def time_database_queries(sender, connection, **kwargs):
+    """
+    Time the queries of every connection for the request timings (Server-Timing header and request log).
+    """
+    instrumentation.install_query_timer(connection)
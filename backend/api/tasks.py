@@ -0,0 +1,158 @@
+"""
+tasks.py
+
+Background job handlers for the API app.
+
+Each handler is registered with `api.services.jobs.job` and is executed by the job worker
+(`python manage.py run_jobs`). Handlers receive the job payload as keyword arguments and must be safe to run
+more than once. This module is imported by `ApiConfig.ready()` so the handlers are always registered.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Jobs:
+-----
+- s3.delete_files(urls)
+    Deletes files from S3 in batches.
+- profile_pictures.import_remote(user_id, image_url)
+    Copies a remote image (e.g. a Google account picture) into S3 as the user's profile picture.
+- images.book_cover_variants(book_id, force=False)
+    Creates the resized copies of a book's cover art.
+- images.profile_picture_variants(profile_picture_id, force=False)
+    Creates the resized copies of a profile picture.
+- books.decay_trending()
+    Decays the trending scores of books and queues the next run.
+"""
+import uuid
+
+import requests
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+
+from api.aws.delete import delete_files_from_s3
+from api.aws.upload import retire_files, upload_file_to_s3
+from api.models.book import Book
+from api.models.userProfilePicture import UserProfilePicture
+from api.services import images, jobs, response_cache, trending
+from api.services.file_references import unreferenced_urls
+from api.services.jobs import job
+
+
+class S3DeleteError(Exception):
+    """
+    Raised when some files could not be deleted, so the job is retried.
+    """
+
+
+@job('s3.delete_files')
+def delete_files(urls):
+    """
+    Delete files from S3. Deleting a missing key succeeds, so retries are safe.
+    Files that are still used by a book or profile picture are kept (keys are content-addressed,
+    so several rows can share one object).
+
+    :param urls: A list of file URLs to delete.
+    """
+    failures = delete_files_from_s3(unreferenced_urls(urls))
+    if failures:
+        raise S3DeleteError(f"{len(failures)} files could not be deleted: {[failure['key'] for failure in failures]}")
+
+
+@job('profile_pictures.import_remote')
+def import_remote_profile_picture(user_id, image_url):
+    """
+    Download a remote image and store it in S3 as the user's profile picture.
+
+    Does nothing if the user no longer exists or already has a profile picture.
+
+    :param user_id: The ID of the user.
+    :param image_url: The URL of the image to copy.
+    """
+    user = User.objects.filter(pk=user_id).first()
+    if user is None or UserProfilePicture.objects.filter(user=user).exclude(profile_image_url__isnull=True).exists():
+        return
+
+    response = requests.get(image_url, timeout=10)
+    response.raise_for_status()
+    image_file = ContentFile(response.content, name=f"{uuid.uuid4()}.jpg")
+
+    profile_image_url = upload_file_to_s3(image_file, user.id, 'profile_image', 'image/png')
+    UserProfilePicture.objects.update_or_create(user=user, defaults={'profile_image_url': profile_image_url})
+
+
+def refresh_image_variants(model, pk, url_field, variants_field, force=False):
+    """
+    Bring the stored variants of an image field up to date with its current URL.
+
+    Does nothing if the row is gone or its variants already match the image. Variants of a replaced
+    image are deleted, and so are freshly made variants if the image changed again while they were
+    being generated (that change queues its own job).
+
+    :param model: The model class.
+    :param pk: The primary key of the row.
+    :param url_field: The name of the image URL field.
+    :param variants_field: The name of the JSON field holding the variants.
+    :param force: Regenerate the variants even if they match the image.
+    :return: True if the stored variants changed.
+    """
+    row = model.objects.filter(pk=pk).values(url_field, variants_field).first()
+    if row is None:
+        return False
+    image_url, old_variants = row[url_field], row[variants_field]
+
+    if not image_url:
+        # The image was removed: drop its variants
+        if old_variants:
+            model.objects.filter(pk=pk, **{url_field + '__isnull': True}).update(**{variants_field: {}})
+            jobs.enqueue('s3.delete_files', {'urls': images.variant_urls(old_variants)})
+            return True
+        return False
+    if not force and not images.needs_variants(image_url, old_variants):
+        return False
+
+    variants = images.generate_variants(image_url)
+    # Only store them if the image has not been replaced in the meantime (an update skips post_save signals)
+    updated = model.objects.filter(pk=pk, **{url_field: image_url}).update(**{variants_field: variants})
+
+    old_urls, new_urls = set(images.variant_urls(old_variants)), set(images.variant_urls(variants))
+    if updated:
+        # The old variants may still be referenced by cached responses
+        retire_files(sorted(old_urls - new_urls))
+    elif new_urls - old_urls:
+        jobs.enqueue('s3.delete_files', {'urls': sorted(new_urls - old_urls)})
+    return bool(updated)
+
+
+@job('images.book_cover_variants')
+def generate_book_cover_variants(book_id, force=False):
+    """
+    Create the resized WebP/JPEG copies of a book's cover art.
+
+    :param book_id: The ID of the book.
+    :param force: Regenerate the variants even if they are up to date.
+    """
+    if refresh_image_variants(Book, book_id, 'cover_art_url', 'cover_art_variants', force):
+        response_cache.book_changed(book_id)  # The update skipped the post_save signal
+
+
+@job('images.profile_picture_variants')
+def generate_profile_picture_variants(profile_picture_id, force=False):
+    """
+    Create the resized WebP/JPEG copies of a profile picture.
+
+    :param profile_picture_id: The ID of the UserProfilePicture.
+    :param force: Regenerate the variants even if they are up to date.
+    """
+    if refresh_image_variants(UserProfilePicture, profile_picture_id, 'profile_image_url', 'variants', force):
+        response_cache.bump('users')  # The update skipped the post_save signal
+
+
+@job(trending.DECAY_JOB)
+def decay_trending_scores():
+    """
+    Apply one interval of decay to the trending scores of books, then queue the next interval's run.
+    """
+    trending.decay()  # The trending order in cached lists catches up within RESPONSE_CACHE_COUNTS_TIMEOUT
+    trending.schedule_decay()
@@ -1,3 +1,1394 @@
-from django.test import TestCase
+"""
+tests.py
 
-# Create your tests here.
+Tests for the API app.
+
+Run with `python manage.py test` (the settings need the variables of the `.env` file, see the README).
+
+Author: Chace Nielson
+Created: 2024-08-14
+Modified: 2026-10-18
+@since 1.0
+"""
+import base64
+import io
+import json
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import path
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api import urls as api_urls
+from api.aws.client import get_s3_client, reset_s3_client, s3_key_from_url
+from api.aws.multipart import MIN_PART_SIZE
+from api.db import router
+from api.models.backgroundJob import BackgroundJob, DeadLetterJob
+from api.models.book import Book
+from api.models.catalogTerm import Genre, Language
+from api.models.comment import Comment
+from api.models.favoriteBooks import FavoriteBook
+from api.models.uploadSession import UploadSession
+from api.models.userProfilePicture import UserProfilePicture
+from api.services import catalog_terms, counters, favorites, jobs, site_statistics, trending
+from api.services.pagination import encode_cursor
+from api.views.book.book_public import MAX_CURSOR_PAGE_SIZE, SORT_OPTIONS
+from api.views.book.book_public_async import AsyncBookDetailView, AsyncBookListView, AsyncMostViewedBooksView
+from api.views.upload.local_s3 import LocalS3View
+
+# The API routes plus the local S3 stand-in, which api/urls.py only adds when AWS_S3_LOCAL_ROOT is set at startup
+urlpatterns = api_urls.urlpatterns + [
+    path('api/local-s3/', LocalS3View.as_view()),
+    path('api/local-s3/<path:key>', LocalS3View.as_view()),
+    # The async views, which api/urls.py only uses with ASYNC_PUBLIC_VIEWS
+    path('api/async/books/', AsyncBookListView.as_view()),
+    path('api/async/books/<int:pk>/', AsyncBookDetailView.as_view()),
+    path('api/async/books/most-viewed/', AsyncMostViewedBooksView.as_view()),
+]
+
+
+def make_book(owner, **fields):
+    """
+    Create a book with the required fields filled in.
+    """
+    values = {
+        'title': 'Book',
+        'description': 'A book.',
+        'content_url': 'https://example.com/book.pdf',
+        'owner': owner,
+    }
+    values.update(fields)
+    return Book.objects.create(**values)
+
+
+def auth_headers(user):
+    """
+    Get the headers authenticating a test request as the user (JWT access token).
+    """
+    return {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+
+def forge_cursor(sort_name, values):
+    """
+    Build a cursor by hand, as a client could.
+    """
+    payload = json.dumps({'s': sort_name, 'v': values})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+@override_settings(BOOK_COUNTER_FLUSH_INTERVAL=3600, BOOK_COUNTER_MAX_PENDING=1000)
+class CounterBufferTests(TestCase):
+    """
+    Buffered view/download increments (api/services/counters.py).
+    """
+
+    def setUp(self):
+        cache.clear()
+        counters.buffer.take()
+        self.owner = User.objects.create_user('owner')
+        self.book = make_book(self.owner, views=10, downloads=2)
+
+    def tearDown(self):
+        counters.buffer.take()
+
+    def test_increments_are_buffered_until_flush(self):
+        counters.increment(self.book.pk, 'views')
+        counters.increment(self.book.pk, 'views')
+        counters.increment(self.book.pk, 'downloads')
+
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.views, self.book.downloads), (10, 2))
+        self.assertEqual(counters.pending(self.book.pk, 'views'), 2)
+
+        counters.flush()
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.views, self.book.downloads), (12, 3))
+        self.assertEqual(counters.pending(self.book.pk, 'views'), 0)
+
+    def test_flush_sends_the_deltas(self):
+        received = []
+
+        def listener(sender, deltas, **kwargs):
+            received.append(deltas)
+
+        counters.counters_flushed.connect(listener)
+        self.addCleanup(counters.counters_flushed.disconnect, listener)
+        counters.increment(self.book.pk, 'views', 3)
+        counters.flush()
+        self.assertEqual(received, [{self.book.pk: {'views': 3}}])
+
+    def test_failing_listener_is_logged(self):
+        received = []
+
+        def failing(sender, deltas, **kwargs):
+            raise RuntimeError('cache is down')
+
+        def listener(sender, deltas, **kwargs):
+            received.append(deltas)
+
+        for receiver in (failing, listener):
+            counters.counters_flushed.connect(receiver)
+            self.addCleanup(counters.counters_flushed.disconnect, receiver)
+
+        with self.settings(BOOK_COUNTER_FLUSH_INTERVAL=0), self.assertLogs('django.dispatch', 'ERROR'):
+            response = self.client.post(f'/api/public/books/{self.book.pk}/increment_views/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(received, [{self.book.pk: {'views': 1}}])
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.views, 11)
+
+    def test_flush_when_max_pending_is_reached(self):
+        with self.settings(BOOK_COUNTER_MAX_PENDING=3):
+            for _ in range(3):
+                counters.increment(self.book.pk, 'views')
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.views, 13)
+
+    def test_write_through_without_interval(self):
+        with self.settings(BOOK_COUNTER_FLUSH_INTERVAL=0):
+            counters.increment(self.book.pk, 'downloads')
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.downloads, 3)
+
+    def test_increment_view_returns_the_pending_count(self):
+        response = self.client.post(f'/api/public/books/{self.book.pk}/increment_views/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['views'], 11)
+        self.assertEqual(counters.pending(self.book.pk, 'views'), 1)
+
+    def test_repeated_increments_are_counted(self):
+        for _ in range(3):
+            response = self.client.post(f'/api/public/books/{self.book.pk}/increment_downloads/')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(counters.pending(self.book.pk, 'downloads'), 3)
+
+    def test_unknown_book_is_not_buffered(self):
+        response = self.client.post('/api/public/books/999999/increment_views/')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(counters.buffer.take(), {})
+
+    def test_deleted_book_deltas_do_not_reach_the_statistics(self):
+        other = make_book(self.owner, title='Other', views=5)
+        counters.increment(self.book.pk, 'views', 4)
+        counters.increment(other.pk, 'views', 7)
+        other.delete()
+        self.assertEqual(site_statistics.rebuild()['total_views'], 10)
+
+        counters.flush()
+        self.assertEqual(site_statistics.get_statistics()['total_views'], 14)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.views, 14)
+
+
+class MetricsAccessTests(TestCase):
+    """
+    Access to the Prometheus metrics at /metrics (api/views/admin/metrics.py).
+    """
+
+    @override_settings(METRICS_TOKEN='', DEBUG=False)
+    def test_closed_without_token(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='127.0.0.1').status_code, 404)
+
+    @override_settings(METRICS_TOKEN='', DEBUG=True)
+    def test_local_requests_in_debug_mode(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='127.0.0.1').status_code, 200)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.5').status_code, 404)
+
+    @override_settings(METRICS_TOKEN='secret', DEBUG=True)
+    def test_token_is_required_when_set(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='127.0.0.1').status_code, 404)
+        wrong = self.client.get('/metrics', headers={'Authorization': 'Bearer wrong'})
+        self.assertEqual(wrong.status_code, 404)
+
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'library_http_request_duration_seconds', response.content)
+
+
+class CursorPaginationTests(TestCase):
+    """
+    Cursor pagination of the catalog and the favorites (api/services/pagination.py).
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner')
+        # Repeated sort values, so the pages depend on the ID tiebreaker
+        for number in range(7):
+            make_book(
+                self.owner, title=f'Book {number % 3}', views=number % 2, downloads=number % 3,
+                favorites_count=number % 2, trending_score=float(number % 3),
+            )
+
+    def page_through(self, params):
+        ids, cursor, pages = [], None, 0
+        while True:
+            query = dict(params, pagination='cursor', page_size=2)
+            if cursor:
+                query['cursor'] = cursor
+            response = self.client.get('/api/public/books/', query)
+            self.assertEqual(response.status_code, 200, response.content)
+            ids += [book['id'] for book in response.json()['results']]
+            cursor = response.json()['next_cursor']
+            pages += 1
+            if cursor is None:
+                return ids, pages
+
+    def test_round_trip_over_every_sort(self):
+        for sort_by, ordering in SORT_OPTIONS.items():
+            with self.subTest(sort_by=sort_by):
+                params = {'sort_by': sort_by}
+                books = Book.objects.all()
+                if sort_by == 'relevance':
+                    params['search'] = 'Book'
+                    ordering = SORT_OPTIONS['most_recent']  # All books match equally well
+                order = [f'-{field}' if descending else field for field, descending in ordering]
+                order.append('-id' if ordering[0][1] else 'id')
+                expected = list(books.order_by(*order).values_list('id', flat=True))
+
+                ids, pages = self.page_through(params)
+                self.assertEqual(ids, expected)
+                self.assertEqual(pages, 4)
+
+    def test_cursor_of_another_sort_is_rejected(self):
+        cursor = encode_cursor('most_viewed', [1, 1])
+        response = self.client.get('/api/public/books/', {'sort_by': 'title_asc', 'cursor': cursor})
+        self.assertEqual(response.status_code, 400)
+
+    def test_forged_cursors_are_rejected(self):
+        forged = [
+            ('most_viewed', 'not base64 !'),
+            ('most_viewed', forge_cursor('most_viewed', ['abc', 1])),
+            ('most_viewed', forge_cursor('most_viewed', [1])),
+            ('most_viewed', forge_cursor('most_viewed', [None, 1])),
+            ('most_viewed', forge_cursor('most_viewed', [[1], 1])),
+            ('most_recent', forge_cursor('most_recent', ['not a date', 1])),
+            ('trending', forge_cursor('trending', [{}, 1])),
+            ('most_recent', forge_cursor('most_recent', 5)),
+            ('most_recent', forge_cursor('most_recent', None)),
+            ('most_recent', forge_cursor('most_recent', {'0': 1})),
+        ]
+        for sort_by, cursor in forged:
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/public/books/', {'sort_by': sort_by, 'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+
+    def test_favorites_round_trip(self):
+        user = User.objects.create_user('reader')
+        for book in Book.objects.all():
+            FavoriteBook.objects.create(user=user, book=book)
+        expected = list(
+            FavoriteBook.objects.filter(user=user).order_by('-created_at', '-id').values_list('book_id', flat=True)
+        )
+
+        ids, cursor = [], None
+        while True:
+            query = {'page_size': 3, **({'cursor': cursor} if cursor else {})}
+            response = self.client.get('/api/books/get_favorites/', query, headers=auth_headers(user))
+            self.assertEqual(response.status_code, 200)
+            ids += [book['id'] for book in response.json()['results']]
+            self.assertTrue(all(book['is_favorited'] for book in response.json()['results']))
+            cursor = response.json()['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(ids, expected)
+
+        for forged in (forge_cursor('favorited', ['yesterday', 1]), forge_cursor('favorited', None)):
+            response = self.client.get('/api/books/get_favorites/', {'cursor': forged}, headers=auth_headers(user))
+            self.assertEqual(response.status_code, 400)
+
+    def test_retrieve_is_favorited(self):
+        user = User.objects.create_user('reader')
+        favorite, other = Book.objects.all()[:2]
+        FavoriteBook.objects.create(user=user, book=favorite)
+
+        response = self.client.get(f'/api/public/books/{favorite.pk}/', headers=auth_headers(user))
+        self.assertTrue(response.json()['is_favorited'])
+        response = self.client.get(f'/api/public/books/{other.pk}/', headers=auth_headers(user))
+        self.assertFalse(response.json()['is_favorited'])
+        response = self.client.get(f'/api/public/books/{favorite.pk}/')
+        self.assertFalse(response.json()['is_favorited'])
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class SearchIndexTests(TestCase):
+    """
+    The full-text search index (api/services/search.py) follows book saves and deletes.
+    """
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+        self.book = make_book(self.owner, title='Moby Dick', author='Herman Melville', description='A whale hunt')
+        make_book(self.owner, title='Walden', author='Henry Thoreau', description='Life in the woods')
+
+    def search(self, query, **params):
+        response = self.client.get('/api/public/books/', {'search': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [book['title'] for book in response.json()['results']]
+
+    def test_new_books_are_found(self):
+        self.assertEqual(self.search('melville'), ['Moby Dick'])
+        self.assertEqual(self.search('moby dick'), ['Moby Dick'])
+        self.assertEqual(self.search('tolstoy'), [])
+
+    def test_description_is_searched_only_when_asked(self):
+        self.assertEqual(self.search('whale'), [])
+        self.assertEqual(self.search('whale', description='true'), ['Moby Dick'])
+
+    def test_updates_and_deletes_are_indexed(self):
+        self.book.title = 'The Whale'
+        self.book.save()
+        self.assertEqual(self.search('moby'), [])
+        self.assertEqual(self.search('whale'), ['The Whale'])
+
+        self.book.delete()
+        self.assertEqual(self.search('whale'), [])
+        self.assertEqual(self.search('melville'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search('moby"*) (^'), ['Moby Dick'])
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class CommentTreeTests(TestCase):
+    """
+    Public comment threads (api/services/comment_tree.py) with the max_depth and max_replies limits.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('author')
+        cls.book = make_book(author)
+        # root -> 3 replies, the first of which has a reply chain 3 levels deep
+        cls.root = Comment.objects.create(book=cls.book, user=author, content='root')
+        replies = [
+            Comment.objects.create(book=cls.book, user=author, content=f'reply {number}', parent_comment=cls.root)
+            for number in range(3)
+        ]
+        parent = replies[0]
+        for level in range(3):
+            parent = Comment.objects.create(book=cls.book, user=author, content=f'level {level}', parent_comment=parent)
+        Comment.objects.create(book=cls.book, user=author, content='second root')
+
+    def thread(self, **params):
+        response = self.client.get(f'/api/public-comments/{self.book.pk}/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def depth(self, comment):
+        return 1 + max((self.depth(reply) for reply in comment['replies']), default=0)
+
+    def test_whole_thread(self):
+        roots = self.thread()
+        self.assertEqual([root['content'] for root in roots], ['root', 'second root'])
+        self.assertEqual(roots[0]['reply_count'], 3)
+        self.assertEqual([reply['content'] for reply in roots[0]['replies']], ['reply 0', 'reply 1', 'reply 2'])
+        self.assertEqual(self.depth(roots[0]), 5)
+
+    def test_max_depth(self):
+        root = self.thread(max_depth=0)[0]
+        self.assertEqual(root['replies'], [])
+        self.assertEqual(root['reply_count'], 3)
+        self.assertEqual(self.depth(self.thread(max_depth=2)[0]), 3)
+
+    def test_max_replies(self):
+        root = self.thread(max_replies=1)[0]
+        self.assertEqual([reply['content'] for reply in root['replies']], ['reply 0'])
+        self.assertEqual(root['reply_count'], 3)  # The total, not the number returned
+        self.assertEqual(self.depth(root), 5)
+
+    def test_invalid_limits(self):
+        for params in ({'max_depth': 'deep'}, {'max_depth': '-1'}, {'max_replies': '1.5'}):
+            with self.subTest(params=params):
+                response = self.client.get(f'/api/public-comments/{self.book.pk}/', params)
+                self.assertEqual(response.status_code, 400)
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class QueryBudgetTests(TestCase):
+    """
+    Number of queries per endpoint. The budgets do not depend on the number of books, owners or comments, so
+    an N+1 query in a serializer makes these tests fail.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user('reader')
+        self.book = None
+        for number in range(3):
+            owner = User.objects.create_user(f'owner{number}')
+            UserProfilePicture.objects.create(user=owner, profile_image_url=f'https://example.com/{number}.png')
+            for _ in range(3):
+                book = make_book(owner, title=f'Book by {owner.username}')
+                FavoriteBook.objects.create(user=self.reader, book=book)
+                self.book = self.book or book
+
+        # A thread with replies by users with and without a profile picture
+        for number in range(3):
+            author = User.objects.get(username=f'owner{number}')
+            root = Comment.objects.create(book=self.book, user=author, content='Comment')
+            reply = Comment.objects.create(book=self.book, user=self.reader, content='Reply', parent_comment=root)
+            Comment.objects.create(book=self.book, user=author, content='Reply', parent_comment=reply)
+
+    def assertBudget(self, queries, url, params=None, **kwargs):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, params, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list(self):
+        response = self.assertBudget(2, '/api/public/books/', {'page_size': 20})  # COUNT and the page
+        self.assertEqual(len(response.json()['results']), 9)
+
+    def test_list_cursor(self):
+        self.assertBudget(1, '/api/public/books/', {'pagination': 'cursor', 'page_size': 20})
+
+    def test_list_signed_in(self):
+        # The user is loaded for the token, is_favorited is a subquery of the page query
+        self.assertBudget(3, '/api/public/books/', {'page_size': 20}, headers=auth_headers(self.reader))
+
+    def test_top_n_most_viewed(self):
+        response = self.assertBudget(1, '/api/public/books/most-viewed/', {'n': 9})
+        self.assertEqual(response.json()['count'], 9)
+
+    def test_top_n_recent(self):
+        response = self.assertBudget(1, '/api/public/books/most-recent/', {'n': 9})
+        self.assertEqual(response.json()['count'], 9)
+
+    def test_get_favorites(self):
+        # The user for the token, then one join of the favorites, books, owners and pictures
+        response = self.assertBudget(2, '/api/books/get_favorites/', {'page_size': 20}, headers=auth_headers(self.reader))
+        self.assertEqual(len(response.json()['results']), 9)
+
+    def test_comment_tree(self):
+        response = self.assertBudget(1, f'/api/public-comments/{self.book.pk}/')
+        self.assertEqual(len(response.json()), 3)
+
+
+@override_settings(
+    RESPONSE_CACHE_TIMEOUT=300, RESPONSE_CACHE_COUNTS_TIMEOUT=60,
+    BOOK_COUNTER_FLUSH_INTERVAL=3600, BOOK_COUNTER_MAX_PENDING=1000,
+)
+class ResponseCacheTests(TestCase):
+    """
+    Cached public responses (api/services/response_cache.py): ETags and what invalidates them.
+    """
+
+    def setUp(self):
+        cache.clear()
+        counters.buffer.take()
+        self.addCleanup(counters.buffer.take)
+        self.owner = User.objects.create_user('owner')
+        self.reader = User.objects.create_user('reader')
+        self.book = make_book(self.owner, title='Cached')
+        self.other = make_book(self.owner, title='Other')
+
+    def get(self, url, **headers):
+        return self.client.get(url, headers=headers)
+
+    def test_etag(self):
+        first = self.get('/api/public/books/')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        etag = first['ETag']
+
+        response = self.get('/api/public/books/', If_None_Match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.get('/api/public/books/', If_None_Match=f'"other", W/{etag}').status_code, 304)
+
+        response = self.get('/api/public/books/', If_None_Match='"other"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], etag)
+
+        # A change gives a new ETag
+        self.book.save()
+        response = self.get('/api/public/books/', If_None_Match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_counter_flush_only_drops_the_book_details(self):
+        self.get('/api/public/books/')
+        self.get(f'/api/public/books/{self.book.pk}/')
+        self.get(f'/api/public/books/{self.other.pk}/')
+
+        counters.increment(self.book.pk, 'views', 3)
+        counters.flush()
+
+        self.assertEqual(self.get('/api/public/books/')['X-Cache'], 'HIT')
+        self.assertEqual(self.get(f'/api/public/books/{self.other.pk}/')['X-Cache'], 'HIT')
+        response = self.get(f'/api/public/books/{self.book.pk}/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['views'], 3)
+
+    def test_favorite_only_drops_the_users_catalog(self):
+        reader = auth_headers(self.reader)
+        owner = auth_headers(self.owner)
+        self.get('/api/public/books/')
+        self.get('/api/public/books/', **reader)
+        self.get('/api/public/books/', **owner)
+
+        self.client.post(f'/api/books/{self.book.pk}/add_favorite/', headers=reader)
+
+        self.assertEqual(self.get('/api/public/books/')['X-Cache'], 'HIT')
+        self.assertEqual(self.get('/api/public/books/', **owner)['X-Cache'], 'HIT')
+        response = self.get('/api/public/books/', **reader)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        favorited = {book['id']: book['is_favorited'] for book in response.json()['results']}
+        self.assertEqual(favorited, {self.book.pk: True, self.other.pk: False})
+
+        response = self.get(f'/api/public/books/{self.book.pk}/', **reader)
+        self.assertTrue(response.json()['is_favorited'])
+        self.assertEqual(response.json()['favorites_count'], 1)
+
+    def test_lists_with_counts_use_the_counts_timeout(self):
+        # With no time allowed for stale counts the lists are not cached, but the book details still are
+        with self.settings(RESPONSE_CACHE_COUNTS_TIMEOUT=0):
+            self.get(f'/api/public/books/{self.book.pk}/')
+            self.assertNotIn('X-Cache', self.get('/api/public/books/'))
+            self.assertNotIn('X-Cache', self.get('/api/public/books/most-viewed/'))
+            self.assertEqual(self.get(f'/api/public/books/{self.book.pk}/')['X-Cache'], 'HIT')
+
+
+@override_settings(ROOT_URLCONF='api.tests', RESPONSE_CACHE_TIMEOUT=0)
+class TopBooksTests(TestCase):
+    """
+    The top books lists and the async public views (api/views/book/book_public_async.py).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.books = [make_book(cls.owner, title=f'Book {number}', views=number) for number in range(7)]
+
+    def test_n(self):
+        for url in ('/api/public/books/most-viewed/', '/api/async/books/most-viewed/'):
+            with self.subTest(url=url):
+                response = self.client.get(url, {'n': 3})
+                self.assertEqual([book['views'] for book in response.json()['results']], [6, 5, 4])
+                self.assertEqual(len(self.client.get(url).json()['results']), 5)
+
+    def test_invalid_n(self):
+        for url in ('/api/public/books/most-viewed/', '/api/public/books/most-recent/', '/api/async/books/most-viewed/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, {'n': 'ten'}).status_code, 400)
+                self.assertEqual(len(self.client.get(url, {'n': -1}).json()['results']), 1)
+
+    def test_n_is_capped(self):
+        # There are not enough books to count the results, so check the limit of the query
+        with self.assertNumQueries(1) as queries:
+            self.client.get('/api/public/books/most-viewed/', {'n': 10 ** 6})
+        self.assertIn(f'LIMIT {MAX_CURSOR_PAGE_SIZE}', queries.captured_queries[0]['sql'])
+
+    async def test_async_detail(self):
+        user = await User.objects.acreate(username='reader')
+        await FavoriteBook.objects.acreate(user=user, book=self.books[0])
+
+        response = await self.async_client.get(f'/api/async/books/{self.books[0].pk}/', headers=auth_headers(user))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['title'], 'Book 0')
+        self.assertTrue(response.json()['is_favorited'])
+
+        response = await self.async_client.get('/api/async/books/0/')
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get(
+            f'/api/async/books/{self.books[0].pk}/', headers={'Authorization': 'Bearer invalid'}
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(ROOT_URLCONF='api.tests', AWS_S3_LOCAL_URL='http://testserver/api/local-s3/')
+class LocalS3TestCase(TestCase):
+    """
+    Base class for upload tests, with the local S3 stand-in (api/aws/local.py) in a temporary directory.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.s3_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.s3_root, ignore_errors=True)
+        settings_override = override_settings(AWS_S3_LOCAL_ROOT=self.s3_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_s3_client()
+        self.addCleanup(reset_s3_client)
+
+        self.user = User.objects.create_user('uploader')
+        self.headers = auth_headers(self.user)
+
+    def stored(self, file_url):
+        """
+        Read a stored file back from the stand-in.
+        """
+        response = get_s3_client().get_object(Bucket=settings.AWS_S3_BUCKET_NAME, Key=s3_key_from_url(file_url))
+        with response['Body'] as body:
+            return body.read()
+
+
+class PresignedUploadTests(LocalS3TestCase):
+    """
+    Presigned uploads against the local S3 stand-in: presign, upload, finalize (api/views/upload/upload_session.py).
+    """
+
+    def presign(self, file_name, purpose, **data):
+        response = self.client.post(
+            '/api/uploads/presign/', {'file_name': file_name, 'purpose': purpose, **data},
+            content_type='application/json', headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()
+
+    def post_form(self, upload, content, **changes):
+        fields = {**upload['fields'], **changes}
+        fields['file'] = SimpleUploadedFile('file', content, content_type=fields['Content-Type'])
+        return self.client.post(urlsplit(upload['url']).path, fields)
+
+    def put(self, upload, content, content_type=None, path=None):
+        url = urlsplit(upload['url'])
+        return self.client.put(
+            f'{path or url.path}?{url.query}', content,
+            content_type=content_type or upload['headers']['Content-Type'],
+        )
+
+    def finalize(self, session, **data):
+        return self.client.post(
+            f"/api/uploads/{session['id']}/finalize/", data, content_type='application/json', headers=self.headers,
+        )
+
+    def test_book_content(self):
+        content = b'%PDF-1.4 book'
+        session = self.presign('my book.pdf', 'content', size=len(content))
+        self.assertEqual(self.post_form(session['upload'], content).status_code, 204)
+
+        response = self.finalize(session, title='Uploaded', description='A book.', author='Author')
+        self.assertEqual(response.status_code, 200, response.content)
+        book = Book.objects.get(pk=response.json()['book']['id'])
+        self.assertEqual((book.owner, book.title), (self.user, 'Uploaded'))
+        self.assertEqual(book.content_url, response.json()['file_url'])
+        self.assertEqual(response.json()['status'], UploadSession.STATUS_CONSUMED)
+
+        stored = get_s3_client().head_object(Bucket=settings.AWS_S3_BUCKET_NAME, Key=UploadSession.objects.get().file_key)
+        self.assertEqual((stored['ContentLength'], stored['ContentType']), (len(content), 'application/pdf'))
+
+    def test_profile_picture(self):
+        content = b'\x89PNG picture'
+        session = self.presign('me.png', 'profile_image', method='put')
+        self.assertEqual(self.put(session['upload'], content).status_code, 200)
+
+        response = self.finalize(session)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(UserProfilePicture.objects.get(user=self.user).profile_image_url, response.json()['profile_image_url'])
+
+    def test_size_mismatch_is_rejected(self):
+        session = self.presign('me.png', 'profile_image', size=5, method='put')
+        self.assertEqual(self.put(session['upload'], b'more than five bytes').status_code, 200)
+
+        response = self.finalize(session)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UploadSession.objects.get().status, UploadSession.STATUS_ABORTED)
+        self.assertFalse(UserProfilePicture.objects.filter(user=self.user).exists())
+
+    def test_oversized_form_upload_is_rejected(self):
+        session = self.presign('me.png', 'profile_image', size=5)
+        self.assertEqual(self.post_form(session['upload'], b'more than five bytes').status_code, 400)
+        self.assertEqual(self.finalize(session).status_code, 400)  # Nothing was stored
+
+    def test_wrong_mime_type_is_rejected(self):
+        session = self.presign('book.pdf', 'content', method='put')
+        self.assertEqual(self.put(session['upload'], b'<html>', content_type='text/html').status_code, 403)
+
+        # A file stored with another type (e.g. by a client ignoring the signed headers) fails finalize
+        file_key = UploadSession.objects.get().file_key
+        get_s3_client().put_object(Bucket=settings.AWS_S3_BUCKET_NAME, Key=file_key, Body=b'<html>', ContentType='text/html')
+        response = self.finalize(session, title='Uploaded', description='A book.')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UploadSession.objects.get().status, UploadSession.STATUS_ABORTED)
+        self.assertFalse(Book.objects.exists())
+
+    def test_file_type_not_allowed_for_purpose(self):
+        response = self.client.post(
+            '/api/uploads/presign/', {'file_name': 'cover.pdf', 'purpose': 'cover_art'},
+            content_type='application/json', headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_key_outside_the_callers_folder_is_rejected(self):
+        other = User.objects.create_user('other')
+        session = self.presign('me.png', 'profile_image', size=3)
+        own_key = session['upload']['fields']['key']
+        self.assertTrue(own_key.startswith(f'profilePictures/{self.user.pk}_'))
+        other_key = own_key.replace(f'/{self.user.pk}_', f'/{other.pk}_')
+
+        # The signed upload is bound to its key, in the form and in the URL
+        self.assertEqual(self.post_form(session['upload'], b'png', key=other_key).status_code, 403)
+        put_session = self.presign('me.png', 'profile_image', method='put')
+        other_path = urlsplit(put_session['upload']['url']).path.replace(f'/{self.user.pk}_', f'/{other.pk}_')
+        self.assertEqual(self.put(put_session['upload'], b'png', path=other_path).status_code, 403)
+        self.assertIsNone(get_s3_client().file_path(settings.AWS_S3_BUCKET_NAME, other_key))
+
+        # Sessions of other users cannot be finalized
+        response = self.client.post(
+            f"/api/uploads/{session['id']}/finalize/", {}, content_type='application/json', headers=auth_headers(other),
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+# The primary stands in for a replica: these tests check the routing state, not which database answers
+class MultipartUploadTests(LocalS3TestCase):
+    """
+    Resumable multipart upload sessions: create, upload parts, resume, complete, abort
+    (api/views/upload/upload_session.py).
+    """
+
+    def start(self, file_name='big book.txt', purpose='content'):
+        response = self.client.post(
+            '/api/uploads/', {'file_name': file_name, 'purpose': purpose},
+            content_type='application/json', headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()
+
+    def put_part(self, session, part_number, data):
+        return self.client.put(
+            f"/api/uploads/{session['id']}/parts/{part_number}/", data,
+            content_type='application/octet-stream', headers=self.headers,
+        )
+
+    def complete(self, session):
+        return self.client.post(f"/api/uploads/{session['id']}/complete/", headers=self.headers)
+
+    def test_upload_resume_and_complete(self):
+        session = self.start()
+        part_size = session['part_size']
+        first, last = b'a' * part_size, b'the end'
+
+        # The last part arrives first, then the upload is interrupted
+        self.assertEqual(self.put_part(session, 2, last).status_code, 200)
+        response = self.complete(session)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['parts'], [2])
+
+        # Resuming: the session tells which parts are stored
+        response = self.client.get(f"/api/uploads/{session['id']}/", headers=self.headers)
+        self.assertEqual(response.json()['parts'], [{'part_number': 2, 'size': len(last)}])
+        self.assertEqual(self.put_part(session, 1, first).status_code, 200)
+
+        response = self.complete(session)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['status'], UploadSession.STATUS_COMPLETED)
+        self.assertEqual(response.json()['uploaded_size'], part_size + len(last))
+        file_url = response.json()['file_url']
+        self.assertEqual(self.stored(file_url), first + last)
+
+        # The completed file becomes the content of a new book
+        response = self.client.post(
+            '/api/books/', {'title': 'Big', 'author': 'Author', 'description': 'A long book.', 'content_upload_session': session['id']},
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(Book.objects.get().content_url, file_url)
+        self.assertEqual(UploadSession.objects.get().status, UploadSession.STATUS_CONSUMED)
+
+    def test_short_parts_before_the_last_are_rejected(self):
+        session = self.start()
+        self.put_part(session, 1, b'too short')
+        self.put_part(session, 2, b'last')
+        response = self.complete(session)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['parts'], [1])
+        self.assertEqual(UploadSession.objects.get().status, UploadSession.STATUS_ACTIVE)
+
+    def test_parts_may_not_exceed_the_file_size_limit(self):
+        session = self.start()
+        part_size = session['part_size']
+        with self.settings(UPLOAD_MAX_CONTENT_SIZE=part_size + 5):
+            self.assertEqual(self.put_part(session, 1, b'a' * part_size).status_code, 200)
+            self.assertEqual(self.put_part(session, 2, b'b' * 6).status_code, 400)
+            self.assertEqual(self.put_part(session, 2, b'b' * 5).status_code, 200)
+            # Replacing a part counts the new size instead of the old one
+            self.assertEqual(self.put_part(session, 2, b'c' * 5).status_code, 200)
+        self.assertEqual(UploadSession.objects.get().uploaded_size, part_size + 5)
+
+    def test_completed_session_larger_than_the_limit_is_not_attached(self):
+        session = self.start()
+        self.put_part(session, 1, b'content')
+        self.assertEqual(self.complete(session).status_code, 200)
+        with self.settings(UPLOAD_MAX_CONTENT_SIZE=3):
+            response = self.client.post(
+                '/api/books/', {'title': 'Big', 'author': 'Author', 'description': 'x', 'content_upload_session': session['id']},
+                headers=self.headers,
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Book.objects.exists())
+
+    def test_abort(self):
+        session = self.start()
+        self.put_part(session, 1, b'part')
+        response = self.client.delete(f"/api/uploads/{session['id']}/", headers=self.headers)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(UploadSession.objects.get().status, UploadSession.STATUS_ABORTED)
+        self.assertEqual(self.put_part(session, 2, b'more').status_code, 409)
+        self.assertEqual(self.complete(session).status_code, 409)
+
+    def test_other_users_sessions_are_hidden(self):
+        session = self.start()
+        other = auth_headers(User.objects.create_user('other'))
+        self.assertEqual(self.client.get(f"/api/uploads/{session['id']}/", headers=other).status_code, 404)
+        response = self.client.put(
+            f"/api/uploads/{session['id']}/parts/1/", b'part', content_type='application/octet-stream', headers=other,
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class StreamingUploadTests(LocalS3TestCase):
+    """
+    Book content streamed to S3 while the request is read (S3StreamingUploadHandler in api/aws/multipart.py).
+    """
+
+    def create_book(self, content, **fields):
+        data = {'title': 'Streamed', 'author': 'Author', 'description': 'A book.', 'content': content, **fields}
+        return self.client.post('/api/books/', data, headers=self.headers)
+
+    def queued_deletes(self):
+        return [url for job in BackgroundJob.objects.filter(name='s3.delete_files') for url in job.payload['urls']]
+
+    def test_create(self):
+        response = self.create_book(SimpleUploadedFile('book.txt', b'Once upon a time', content_type='text/plain'))
+        self.assertEqual(response.status_code, 201, response.content)
+        book = Book.objects.get()
+        self.assertEqual(self.stored(book.content_url), b'Once upon a time')
+        self.assertIn(f'/{self.user.id}_content_', book.content_url)
+
+    def test_create_in_parts(self):
+        # Larger than one part, so the file is sent as a multipart upload
+        content = bytes(range(256)) * (MIN_PART_SIZE // 256) + b'tail'
+        response = self.create_book(SimpleUploadedFile('book.txt', content, content_type='text/plain'))
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(self.stored(Book.objects.get().content_url), content)
+
+    def test_update_retires_the_old_file(self):
+        self.create_book(SimpleUploadedFile('book.txt', b'first edition', content_type='text/plain'))
+        book = Book.objects.get()
+        old_url = book.content_url
+
+        body = encode_multipart(BOUNDARY, {'content': SimpleUploadedFile('book.txt', b'second edition', content_type='text/plain')})
+        response = self.client.patch(f'/api/books/{book.pk}/', body, content_type=MULTIPART_CONTENT, headers=self.headers)
+        self.assertEqual(response.status_code, 200, response.content)
+
+        book.refresh_from_db()
+        self.assertNotEqual(book.content_url, old_url)
+        self.assertEqual(self.stored(book.content_url), b'second edition')
+        self.assertEqual(self.queued_deletes(), [old_url])
+        # Retired after AWS_S3_RETIRE_DELAY, so cached responses can still use the old file
+        job = BackgroundJob.objects.get(name='s3.delete_files')
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=settings.AWS_S3_RETIRE_DELAY - 60))
+
+    def test_invalid_request_discards_the_streamed_file(self):
+        response = self.create_book(SimpleUploadedFile('book.txt', b'orphan', content_type='text/plain'), title='')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Book.objects.exists())
+        [url] = self.queued_deletes()
+        self.assertEqual(self.stored(url), b'orphan')  # Deleted by the job
+
+    def test_unsupported_type_is_not_streamed(self):
+        response = self.create_book(SimpleUploadedFile('virus.exe', b'MZ', content_type='application/octet-stream'))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Book.objects.exists())
+        self.assertEqual(self.queued_deletes(), [])
+
+
+@override_settings(DATABASE_REPLICAS=['default'], DB_REPLICA_PIN_SECONDS=10)
+class ReplicaRoutingTests(TestCase):
+    """
+    Read-your-writes pinning of the replica router (api/db/router.py).
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('writer')
+        self.book = make_book(User.objects.create_user('owner'))
+
+    def test_write_pins_the_user_to_the_primary(self):
+        self.assertFalse(router.is_pinned(self.user.pk))
+        response = self.client.post(f'/api/books/{self.book.pk}/add_favorite/', headers=auth_headers(self.user))
+        self.assertIn(response.status_code, (200, 201))
+        self.assertTrue(router.is_pinned(self.user.pk))
+
+    def test_reads_do_not_pin(self):
+        response = self.client.get('/api/public/books/', headers=auth_headers(self.user))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(router.is_pinned(self.user.pk))
+
+    def test_pinned_user_reads_from_the_primary(self):
+        state = {'replica_reads': False, 'wrote': False}
+        token = router._request_state.set(state)
+        self.addCleanup(router._request_state.reset, token)
+
+        router.enable_replica_reads(self.user)
+        self.assertTrue(router.reading_from_replicas())
+        router.pin_user(self.user.pk)
+        router.enable_replica_reads(self.user)
+        self.assertFalse(router.reading_from_replicas())
+
+
+@override_settings(JOB_QUEUE_BACKEND='api.services.jobs.DatabaseBackend', JOB_RETRY_BACKOFF=30, JOB_LOCK_TIMEOUT=600)
+class JobQueueTests(TestCase):
+    """
+    Retries and dead-lettering of the database job queue (api/services/jobs.py).
+    """
+
+    def setUp(self):
+        self.calls = []
+        self.failures = 0
+
+        def handler(**payload):
+            self.calls.append(payload)
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError('S3 is unavailable')
+
+        jobs.registry['tests.record'] = handler
+        self.addCleanup(jobs.registry.pop, 'tests.record')
+
+    def run_failing(self):
+        with self.assertLogs('api.services.jobs', 'WARNING'):
+            jobs.run_pending()
+
+    def make_due(self, job):
+        BackgroundJob.objects.filter(pk=job.pk).update(run_after=timezone.now() - timedelta(seconds=1))
+
+    def test_cover_changed_back_gets_new_variants(self):
+        book = make_book(User.objects.create_user('owner'))
+        pending = BackgroundJob.objects.filter(name='images.book_cover_variants', status=BackgroundJob.STATUS_PENDING)
+
+        for cover in ('https://example.com/a.png', 'https://example.com/b.png', 'https://example.com/a.png'):
+            book.cover_art_url = cover
+            book.save()
+            self.assertEqual(pending.count(), 1, cover)
+            # What the job does once it has made the variants
+            pending.update(status=BackgroundJob.STATUS_SUCCEEDED)
+            book.cover_art_variants = {'source': cover}
+            Book.objects.filter(pk=book.pk).update(cover_art_variants=book.cover_art_variants)
+
+    def test_success(self):
+        job = jobs.enqueue('tests.record', {'key': 'value'})
+        self.assertEqual(jobs.run_pending(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (BackgroundJob.STATUS_SUCCEEDED, 1))
+        self.assertEqual(self.calls, [{'key': 'value'}])
+        self.assertEqual(jobs.run_pending(), 0)
+
+    def test_retry_with_backoff(self):
+        self.failures = 2
+        job = jobs.enqueue('tests.record', max_attempts=3)
+
+        self.run_failing()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (BackgroundJob.STATUS_PENDING, 1))
+        self.assertIn('S3 is unavailable', job.last_error)
+        self.assertAlmostEqual((job.run_after - timezone.now()).total_seconds(), 30, delta=5)
+        self.assertEqual(jobs.run_pending(), 0)  # Not due until the backoff has passed
+
+        self.make_due(job)
+        self.run_failing()
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 2)
+        self.assertAlmostEqual((job.run_after - timezone.now()).total_seconds(), 60, delta=5)  # Doubled
+
+        self.make_due(job)
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (BackgroundJob.STATUS_SUCCEEDED, 3))
+        self.assertFalse(DeadLetterJob.objects.exists())
+
+    def test_dead_letter_after_max_attempts(self):
+        self.failures = 5
+        job = jobs.enqueue('tests.record', {'key': 'value'}, idempotency_key='tests:dead', max_attempts=2)
+        self.run_failing()
+        self.make_due(job)
+        self.run_failing()
+
+        self.assertFalse(BackgroundJob.objects.filter(pk=job.pk).exists())
+        dead = DeadLetterJob.objects.get()
+        self.assertEqual((dead.name, dead.payload, dead.attempts), ('tests.record', {'key': 'value'}, 2))
+        self.assertEqual(dead.idempotency_key, 'tests:dead')
+        self.assertIn('S3 is unavailable', dead.last_error)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_unknown_job_is_dead_lettered(self):
+        jobs.enqueue('tests.missing', max_attempts=1)
+        self.run_failing()
+        self.assertIn('UnknownJob', DeadLetterJob.objects.get(name='tests.missing').last_error)
+
+    def test_idempotency_key(self):
+        first = jobs.enqueue('tests.record', idempotency_key='tests:once')
+        second = jobs.enqueue('tests.record', idempotency_key='tests:once')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(BackgroundJob.objects.count(), 1)
+
+    def test_stuck_running_job_is_picked_up_again(self):
+        job = jobs.enqueue('tests.record')
+        self.assertEqual(len(jobs.claim_jobs(10)), 1)
+        self.assertEqual(jobs.claim_jobs(10), [])  # Claimed by the first worker
+
+        BackgroundJob.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(seconds=601))
+        self.assertEqual([claimed.pk for claimed in jobs.claim_jobs(10)], [job.pk])
+
+    @override_settings(JOB_QUEUE_BACKEND='api.services.jobs.ImmediateBackend')
+    def test_immediate_backend_dead_letters_failures(self):
+        self.failures = 1
+        with self.assertLogs('api.services.jobs', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+            jobs.enqueue('tests.record', {'key': 'value'})
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(DeadLetterJob.objects.get().attempts, 1)
+
+
+class SiteStatisticsTests(TestCase):
+    """
+    The site statistics snapshot and the counter deltas added to it (api/services/site_statistics.py).
+    """
+
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user('owner')
+        self.books = [make_book(owner, views=10, downloads=1), make_book(owner, views=30, downloads=3)]
+
+    def flush(self, book, views=0, downloads=0):
+        """
+        Do what a counter flush does: write the increments, then add them to the snapshot.
+        """
+        Book.objects.filter(pk=book.pk).update(views=book.views + views, downloads=book.downloads + downloads)
+        book.refresh_from_db()
+        site_statistics.apply_counter_deltas({book.pk: {'views': views, 'downloads': downloads}})
+
+    def test_counter_deltas_are_added_to_the_snapshot(self):
+        self.assertEqual(site_statistics.get_statistics()['total_views'], 40)
+        self.flush(self.books[0], views=5)
+        self.flush(self.books[1], views=3, downloads=2)
+
+        with self.assertNumQueries(0):
+            statistics = site_statistics.get_statistics()
+        self.assertEqual((statistics['total_views'], statistics['total_downloads']), (48, 6))
+        self.assertEqual(statistics['average_views_per_book'], 24)
+
+    def test_rebuild_does_not_count_deltas_twice(self):
+        site_statistics.get_statistics()
+        self.flush(self.books[0], views=5)
+        self.assertEqual(site_statistics.rebuild()['total_views'], 45)
+
+        self.assertEqual(site_statistics.get_statistics()['total_views'], 45)
+        self.flush(self.books[0], views=1)
+        self.assertEqual(site_statistics.get_statistics()['total_views'], 46)
+
+    def test_concurrent_flushes_are_not_lost(self):
+        site_statistics.get_statistics()
+        book_id = self.books[0].pk
+
+        def flush_deltas():
+            for _ in range(50):
+                site_statistics.apply_counter_deltas({book_id: {'views': 1}})
+
+        threads = [threading.Thread(target=flush_deltas) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(site_statistics.get_statistics()['total_views'], 240)
+
+    def test_cache_without_atomic_incr_rebuilds_instead(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        file_cache = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}}
+        with self.settings(CACHES=file_cache):
+            self.assertEqual(caches['default'].__class__.__name__, 'FileBasedCache')
+            site_statistics.get_statistics()
+            self.flush(self.books[0], views=5)
+            self.assertIsNone(cache.get(site_statistics.CACHE_KEY))
+            self.assertEqual(site_statistics.get_statistics()['total_views'], 45)
+
+    def test_endpoint(self):
+        response = self.client.get('/api/public/books/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_books'], 2)
+        self.assertNotIn('build', response.json())
+
+
+@override_settings(TRENDING_FAVORITE_WEIGHT=4.0, TRENDING_HALF_LIFE=3600)
+class TrendingFavoriteTests(TestCase):
+    """
+    Favorites in the trending score (api/services/trending.py): removing one takes back only its decayed weight.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('reader')
+        self.book = make_book(self.user)
+
+    def age_favorite(self, half_lives):
+        # What the decay job would have done since the favorite was added
+        FavoriteBook.objects.filter(book=self.book).update(
+            created_at=timezone.now() - timedelta(seconds=half_lives * 3600)
+        )
+        Book.objects.filter(pk=self.book.pk).update(trending_score=4.0 * 0.5 ** half_lives)
+
+    def assertScore(self, favorites_count, trending_score):
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.favorites_count, favorites_count)
+        self.assertAlmostEqual(self.book.trending_score, trending_score, places=3)
+
+    def test_remove_through_service(self):
+        favorites.add(self.user, [self.book.pk])
+        self.assertScore(1, 4.0)
+        self.age_favorite(2)
+        favorites.remove(self.user, [self.book.pk])
+        self.assertScore(0, 0.0)
+
+    def test_remove_through_signal(self):
+        favorite = FavoriteBook.objects.create(user=self.user, book=self.book)
+        self.assertScore(1, 4.0)
+        self.age_favorite(1)
+        Book.objects.filter(pk=self.book.pk).update(trending_score=F('trending_score') + 3.0)  # Other activity
+        favorite.refresh_from_db()
+        favorite.delete()
+        self.assertScore(0, 3.0)
+
+    def test_toggling_does_not_build_up(self):
+        for _ in range(5):
+            favorites.add(self.user, [self.book.pk])
+            favorites.remove(self.user, [self.book.pk])
+        self.assertScore(0, 0.0)
+        self.assertAlmostEqual(trending.favorite_weight(timezone.now()), 4.0, places=3)
+
+
+class BulkFavoriteTests(TestCase):
+    """
+    Adding and removing many favorites at once (bulk_add and bulk_remove in api/views/favorites/fav_crud.py).
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('reader')
+        self.headers = auth_headers(self.user)
+        self.books = [make_book(self.user, title=f'Book {number}') for number in range(3)]
+        self.ids = [book.pk for book in self.books]
+
+    def post(self, action, book_ids):
+        return self.client.post(
+            f'/api/books/favorites/{action}/', {'book_ids': book_ids}, content_type='application/json', headers=self.headers
+        )
+
+    def counts(self):
+        return list(Book.objects.filter(pk__in=self.ids).order_by('pk').values_list('favorites_count', flat=True))
+
+    def test_add_and_remove(self):
+        response = self.post('bulk_add', self.ids[:2])
+        self.assertEqual(response.json(), {'added': self.ids[:2]})
+        self.assertEqual(self.counts(), [1, 1, 0])
+
+        response = self.post('bulk_remove', self.ids)
+        self.assertEqual(response.json(), {'removed': self.ids[:2]})
+        self.assertEqual(self.counts(), [0, 0, 0])
+        self.assertFalse(FavoriteBook.objects.exists())
+
+    def test_duplicates_are_counted_once(self):
+        response = self.post('bulk_add', [self.ids[0]] * 3)
+        self.assertEqual(response.json(), {'added': [self.ids[0]]})
+        response = self.post('bulk_add', self.ids[:2])  # The first one is already a favorite
+        self.assertEqual(response.json(), {'added': [self.ids[1]]})
+        self.assertEqual(self.counts(), [1, 1, 0])
+
+        response = self.post('bulk_remove', [self.ids[0], self.ids[0]])
+        self.assertEqual(response.json(), {'removed': [self.ids[0]]})
+        self.assertEqual(self.counts(), [0, 1, 0])
+
+    def test_unknown_books_are_skipped(self):
+        unknown = max(self.ids) + 1
+        response = self.post('bulk_add', [unknown, self.ids[0]])
+        self.assertEqual(response.json(), {'added': [self.ids[0]]})
+        response = self.post('bulk_remove', [unknown])
+        self.assertEqual(response.json(), {'removed': []})
+        self.assertEqual(self.counts(), [1, 0, 0])
+
+    def test_limit(self):
+        response = self.post('bulk_add', list(range(1, favorites.MAX_BULK_FAVORITES + 1)))
+        self.assertEqual(response.status_code, 200)
+        response = self.post('bulk_add', list(range(1, favorites.MAX_BULK_FAVORITES + 2)))
+        self.assertEqual(response.status_code, 400)
+        response = self.post('bulk_remove', list(range(1, favorites.MAX_BULK_FAVORITES + 2)))
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_ids(self):
+        for book_ids in ([], 'abc', [1, '2'], [True], [0], [-1], [10 ** 30], [2 ** 63]):
+            for action in ('bulk_add', 'bulk_remove'):
+                response = self.post(action, book_ids)
+                self.assertEqual(response.status_code, 400, (action, book_ids))
+        self.assertEqual(self.counts(), [0, 0, 0])
+
+
+class CatalogTermTests(TestCase):
+    """
+    Normalized genres and languages and their book counts (api/services/catalog_terms.py).
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner')
+
+    def counts(self, model):
+        return dict(model.objects.values_list('key', 'book_count'))
+
+    def test_spellings_share_a_term(self):
+        first = make_book(self.user, genre='Sci Fi', language='English')
+        second = make_book(self.user, genre='  sci   FI ', language='english')
+        self.assertEqual(self.counts(Genre), {'sci fi': 2})
+        self.assertEqual(self.counts(Language), {'english': 2})
+        self.assertEqual(first.genre_ref_id, second.genre_ref_id)
+        self.assertEqual(Genre.objects.get().name, 'Sci Fi')  # The first spelling is displayed
+        self.assertEqual(catalog_terms.normalize(' Science\tFiction '), 'science fiction')
+
+    def test_rename_moves_the_book(self):
+        book = make_book(self.user, genre='Horror')
+        make_book(self.user, genre='Fantasy')
+        book.genre = 'fantasy'
+        book.save()
+        self.assertEqual(self.counts(Genre), {'horror': 0, 'fantasy': 2})
+        book.refresh_from_db()
+        self.assertEqual(book.genre_ref.key, 'fantasy')
+
+        book.genre = ''
+        book.save()
+        self.assertEqual(self.counts(Genre), {'horror': 0, 'fantasy': 1})
+        book.refresh_from_db()
+        self.assertIsNone(book.genre_ref)
+
+    def test_delete(self):
+        book = make_book(self.user, genre='Horror', language='English')
+        make_book(self.user, genre='Horror', language='French')
+        book.delete()
+        self.assertEqual(self.counts(Genre), {'horror': 1})
+        self.assertEqual(self.counts(Language), {'english': 0, 'french': 1})
+
+    def test_update_fields(self):
+        book = make_book(self.user, genre='Horror', language='English')
+        book.genre = 'Fantasy'
+        book.save(update_fields=['title'])  # The genre was not saved, so it keeps its term
+        self.assertEqual(self.counts(Genre), {'horror': 1})
+
+        book.save(update_fields=['genre'])
+        self.assertEqual(self.counts(Genre), {'horror': 0, 'fantasy': 1})
+        self.assertEqual(self.counts(Language), {'english': 1})
+
+    def test_rebuild_command(self):
+        horror = make_book(self.user, genre='Horror')
+        make_book(self.user, genre='Fantasy')
+        # Bulk updates skip the signals
+        Book.objects.filter(pk=horror.pk).update(genre='FANTASY ')
+        Book.objects.bulk_create([Book(title='Bulk', description='A book.', content_url='x', owner=self.user, genre='Western')])
+        Genre.objects.filter(key='fantasy').update(book_count=7)
+
+        call_command('rebuild_catalog_terms', stdout=io.StringIO())
+        self.assertEqual(self.counts(Genre), {'horror': 0, 'fantasy': 2, 'western': 1})
+        self.assertEqual(Book.objects.filter(genre_ref__key='fantasy').count(), 2)
+
+    def test_facets_endpoint(self):
+        make_book(self.user, genre='Horror')
+        make_book(self.user, genre='Fantasy')
+        make_book(self.user, genre='fantasy ', language='French')
+        make_book(self.user, genre='Horror').delete()
+
+        response = self.client.get('/api/public/books/facets/')
+        self.assertEqual(response.json(), {
+            'genres': [{'name': 'Fantasy', 'count': 2}, {'name': 'Horror', 'count': 1}],
+            'languages': [{'name': 'English', 'count': 2}, {'name': 'French', 'count': 1}],
+        })
+
+        Book.objects.filter(genre='Horror').get().delete()
+        response = self.client.get('/api/public/books/facets/')
+        self.assertEqual(response.json()['genres'], [{'name': 'Fantasy', 'count': 2}])
+
+    def test_filter_is_an_exact_match(self):
+        sci_fi = make_book(self.user, title='Dune', genre='Sci Fi', language='English')
+        make_book(self.user, title='Mixed', genre='Sci Fi Fantasy', language='English (US)')
+        make_book(self.user, title='Other', genre='Fantasy')
+
+        for query, expected in (
+            ({'genre': 'sci  fi'}, [sci_fi.pk]),
+            ({'genre': 'Sci'}, []),
+            ({'genre': 'sci fi', 'language': ' ENGLISH'}, [sci_fi.pk]),
+            ({'language': 'French'}, []),
+        ):
+            response = self.client.get('/api/public/books/', query)
+            self.assertEqual([book['id'] for book in response.json()['results']], expected, query)
+
+
+@override_settings(ROOT_URLCONF='api.tests', RESPONSE_CACHE_TIMEOUT=0)
+class ResultFacetTests(TestCase):
+    """
+    Facet counts of the catalog results (`facets=true`, see `catalog_terms.result_facets`).
+    """
+
+    def setUp(self):
+        owner = User.objects.create_user('owner')
+        cover = 'https://example.com/cover.png'
+        make_book(owner, title='Moby Dick', genre='Horror', published_date='1851-10-18', cover_art_url=cover)
+        make_book(owner, title='Fleurs', genre='horror ', language='French', published_date='1857-06-25')
+        make_book(owner, title='The Hobbit', genre='Fantasy', published_date='1937-09-21', cover_art_url='')
+        make_book(owner, title='Undated', genre='Fantasy', cover_art_url=cover)
+
+    def facets(self, **params):
+        # The sync and async views, page number and cursor pagination, one book per page
+        results = []
+        for url in ('/api/public/books/', '/api/async/books/'):
+            for pagination in ({}, {'pagination': 'cursor'}):
+                response = self.client.get(url, {'facets': 'true', 'page_size': 1, **pagination, **params})
+                self.assertEqual(response.status_code, 200, response.content)
+                results.append(response.json()['facets'])
+        self.assertTrue(all(facets == results[0] for facets in results), results)
+        return results[0]
+
+    def test_whole_catalog(self):
+        self.assertEqual(self.facets(), {
+            'genre': [{'name': 'Fantasy', 'count': 2}, {'name': 'Horror', 'count': 2}],
+            'language': [{'name': 'English', 'count': 3}, {'name': 'French', 'count': 1}],
+            'published_decade': [
+                {'decade': 1850, 'count': 2},
+                {'decade': 1930, 'count': 1},
+                {'decade': None, 'count': 1},  # Books without a date come last
+            ],
+            'has_cover_art': {'true': 2, 'false': 2},
+        })
+
+    def test_genre_filter(self):
+        self.assertEqual(self.facets(genre='HORROR'), {
+            'genre': [{'name': 'Horror', 'count': 2}],
+            'language': [{'name': 'English', 'count': 1}, {'name': 'French', 'count': 1}],
+            'published_decade': [{'decade': 1850, 'count': 2}],
+            'has_cover_art': {'true': 1, 'false': 1},
+        })
+
+    def test_search(self):
+        self.assertEqual(self.facets(search='hobbit'), {
+            'genre': [{'name': 'Fantasy', 'count': 1}],
+            'language': [{'name': 'English', 'count': 1}],
+            'published_decade': [{'decade': 1930, 'count': 1}],
+            'has_cover_art': {'true': 0, 'false': 1},
+        })
+
+    def test_no_results(self):
+        self.assertEqual(self.facets(language='Latin'), {
+            'genre': [], 'language': [], 'published_decade': [], 'has_cover_art': {'true': 0, 'false': 0},
+        })
+
+    def test_only_when_asked(self):
+        response = self.client.get('/api/public/books/')
+        self.assertNotIn('facets', response.json())
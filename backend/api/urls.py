@@ -8,7 +8,7 @@ admin operations, and testing routes.
 
 Author: Chace Nielson
 Created: 2024-08-14
-Modified: 2024-08-14
+Modified: 2026-10-18
 @since 1.0
 """
 
@@ -18,6 +18,8 @@ from rest_framework.routers import DefaultRouter
 # Import viewsets and views
 from api.views.testing.testing_viewset import TestingViewSet
 from api.views.admin.admin_crud import AdminUserViewSet
+from api.views.admin.db_stats import DatabaseStatsView
+from api.views.admin.metrics import MetricsView
 
 from api.views.user.user_crud import UserCRUDViewSet
 from api.views.user.login import LoginView, GoogleLoginView
@@ -25,9 +27,11 @@ from api.views.user.create_account import UserCreateView
 
 from api.views.book.book_crud import BookCRUDViewSet
 from api.views.book.book_public import PublicBookViewSet
+from api.views.book.book_public_async import AsyncBookListView, AsyncBookDetailView, AsyncMostViewedBooksView, AsyncMostRecentBooksView
 
 from api.views.comment.comment_crud import CommentCRUDViewSet
 from api.views.comment.comment_public import CommentPublicViewSet
+from api.views.comment.comment_public_async import AsyncCommentThreadView
 
 from api.views.favorites.fav_crud import FavoriteBookViewSet
 
@@ -35,6 +39,10 @@ from api.views.user.profile_pic import UpdateProfilePictureView
 
 from api.views.user.change_password import ChangePasswordView  # Import the view
 
+from api.views.upload.upload_session import UploadSessionViewSet
+from api.views.upload.local_s3 import LocalS3View
+from django.conf import settings
+
 
 # Router setup for different CRUD operations
 router = DefaultRouter()
@@ -44,7 +52,19 @@ router.register(r'users', UserCRUDViewSet, basename='user')  # Private CRUD for
 router.register(r'books', BookCRUDViewSet, basename='book')  # Private CRUD for books
 router.register(r'comment', CommentCRUDViewSet, basename='comment')  # Private CRUD for comments
 router.register(r'public-comments', CommentPublicViewSet, basename='public-comments')
-
+router.register(r'uploads', UploadSessionViewSet, basename='upload')  # Resumable multipart uploads
+
+# Public read views: async views under ASGI with ASYNC_PUBLIC_VIEWS, otherwise the viewsets
+if settings.ASYNC_PUBLIC_VIEWS:
+    public_books_list = AsyncBookListView.as_view()
+    public_books_detail = AsyncBookDetailView.as_view()
+    most_viewed_books = AsyncMostViewedBooksView.as_view()
+    most_recent_books = AsyncMostRecentBooksView.as_view()
+else:
+    public_books_list = PublicBookViewSet.as_view({'get': 'list'})
+    public_books_detail = PublicBookViewSet.as_view({'get': 'retrieve'})
+    most_viewed_books = PublicBookViewSet.as_view({'get': 'top_n_most_viewed'})
+    most_recent_books = PublicBookViewSet.as_view({'get': 'top_n_recent'})
 
 urlpatterns = [
     # Public Routes
@@ -53,23 +73,32 @@ urlpatterns = [
     path("api/google-login/", GoogleLoginView.as_view(), name="google-login"),  # Add Google login route
 
     # Custom Public Book Routes
-    path('api/public/books/', PublicBookViewSet.as_view({'get': 'list'}), name='public_books_list'),  # Get all books
-    path('api/public/books/<int:pk>/', PublicBookViewSet.as_view({'get': 'retrieve'}), name='public_books_detail'),  # Get book by ID
+    path('api/public/books/', public_books_list, name='public_books_list'),  # Get all books
+    path('api/public/books/<int:pk>/', public_books_detail, name='public_books_detail'),  # Get book by ID
     
     # Add routes for incrementing views and downloads
     path('api/public/books/<int:pk>/increment_views/', PublicBookViewSet.as_view({'post': 'increment_views'}), name='public_books_increment_views'),
     path('api/public/books/<int:pk>/increment_downloads/', PublicBookViewSet.as_view({'post': 'increment_downloads'}), name='public_books_increment_downloads'),
 
     # New routes for top books and stats
-    path('api/public/books/most-viewed/', PublicBookViewSet.as_view({'get': 'top_n_most_viewed'}), name='most_viewed_books'),
-    path('api/public/books/most-recent/', PublicBookViewSet.as_view({'get': 'top_n_recent'}), name='most_recent_books'),
+    path('api/public/books/most-viewed/', most_viewed_books, name='most_viewed_books'),
+    path('api/public/books/most-recent/', most_recent_books, name='most_recent_books'),
     path('api/public/books/stats/', PublicBookViewSet.as_view({'get': 'site_statistics'}), name='site_statistics'),
+    path('api/public/books/facets/', PublicBookViewSet.as_view({'get': 'facets'}), name='book_facets'),  # Genres and languages with counts
 
     
+    # Database connection statistics of the worker (admin only)
+    path('api/admin/db-stats/', DatabaseStatsView.as_view(), name='db_stats'),
+
+    # Prometheus metrics of all workers (for the metrics scraper)
+    path('metrics', MetricsView.as_view(), name='metrics'),
+
     # Add and remove favorites
     path('api/books/<int:pk>/add_favorite/', FavoriteBookViewSet.as_view({'post': 'add_favorite'}), name='add_favorite'),
     path('api/books/<int:pk>/remove_favorite/', FavoriteBookViewSet.as_view({'delete': 'remove_favorite'}), name='remove_favorite'),
     path('api/books/get_favorites/', FavoriteBookViewSet.as_view({'get': 'get_favorites'}), name='get_favorites'),
+    path('api/books/favorites/bulk_add/', FavoriteBookViewSet.as_view({'post': 'bulk_add'}), name='bulk_add_favorites'),  # Add many favorites at once
+    path('api/books/favorites/bulk_remove/', FavoriteBookViewSet.as_view({'post': 'bulk_remove'}), name='bulk_remove_favorites'),  # Remove many favorites at once
 
     # profile image edit
     path('api/profile-picture/', UpdateProfilePictureView.as_view(), name='update_profile_picture'),
@@ -80,3 +109,14 @@ urlpatterns = [
     # Private Routes (handled by the router) - all routes prefixed with 'api/'
     path('api/', include(router.urls)),
 ]
+
+# The async comment thread view takes the place of the router's public-comments detail route
+if settings.ASYNC_PUBLIC_VIEWS:
+    urlpatterns.insert(0, path('api/public-comments/<int:pk>/', AsyncCommentThreadView.as_view(), name='public-comments-detail'))
+
+# Local S3 stand-in for development and tests (see api/aws/local.py)
+if settings.AWS_S3_LOCAL_ROOT:
+    urlpatterns += [
+        path('api/local-s3/', LocalS3View.as_view(), name='local_s3'),
+        path('api/local-s3/<path:key>', LocalS3View.as_view(), name='local_s3_object'),
+    ]
@@ -16,11 +16,14 @@ from django.contrib.auth.models import User
 from api.serializers.userSerializer import UserSerializer
 from rest_framework.permissions import IsAdminUser
 from api.models.book import Book
-from api.aws.delete import delete_file_from_s3
+from api.services.book_deletion import delete_books, delete_user_content
+import logging
 from rest_framework.decorators import action
 from rest_framework.response import Response 
 from rest_framework import status
 
+logger = logging.getLogger(__name__)
+
 class AdminUserViewSet(viewsets.ModelViewSet):
     """
     A viewset for CRUD operations on the User model.
@@ -44,21 +47,10 @@ class AdminUserViewSet(viewsets.ModelViewSet):
         Args:
             instance (User): The user instance to be deleted.
         """
-        # Fetch all books owned by the user
-        books = Book.objects.filter(owner=instance)
-
-        # Loop through each book and delete associated files from S3
-        for book in books:
-            if book.content_url:
-                delete_file_from_s3(book.content_url)  # Delete book content file from S3
-            if book.cover_art_url:
-                delete_file_from_s3(book.cover_art_url)  # Delete cover art file from S3
-            book.delete()
-
-        # Check if the user has an associated profile picture and delete the image from S3
-        if hasattr(instance, 'profile_picture') and instance.profile_picture.profile_image_url:
-            delete_file_from_s3(instance.profile_picture.profile_image_url)
-            instance.profile_picture.delete()
+        # Delete the user's books and profile picture, removing their S3 files in batches
+        failures = delete_user_content(instance)
+        if failures:
+            logger.warning('User %s deleted with %d S3 files left behind', instance.pk, len(failures))
 
         # Finally, delete the user instance (which cascades other related objects)
         instance.delete()
@@ -102,17 +94,13 @@ class AdminUserViewSet(viewsets.ModelViewSet):
             Response: Success or error message.
         """
         try:
-            book = Book.objects.get(pk=pk)
-            
-            # Delete associated S3 files if they exist
-            if book.content_url:
-                delete_file_from_s3(book.content_url)
-            if book.cover_art_url:
-                delete_file_from_s3(book.cover_art_url)
-            
-            book.delete()
+            # Delete associated S3 files (in one batched request) and the book itself
+            deleted, failures = delete_books(Book.objects.filter(pk=pk))
+            if not deleted:
+                return Response({'error': 'Book not found'}, status=status.HTTP_404_NOT_FOUND)
+            if failures:
+                # The book is gone but some files could not be removed from S3
+                return Response({'detail': 'Book deleted successfully', 's3_failures': failures}, status=status.HTTP_200_OK)
             return Response({'detail': 'Book deleted successfully'}, status=status.HTTP_204_NO_CONTENT)
-        except Book.DoesNotExist:
-            return Response({'error': 'Book not found'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
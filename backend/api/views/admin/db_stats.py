@@ -0,0 +1,30 @@
+"""
+db_stats.py
+
+View exposing the database connection statistics of the worker that serves the request, restricted to admin users.
+
+Used to check that connections are reused (persistent connections or the psycopg pool) and that the pool is
+large enough: see `api/services/db_connections.py` for the meaning of each value. Each gunicorn worker keeps
+its own connections, so repeated requests may be answered by different workers (see 'pid').
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.services import db_connections
+
+
+class DatabaseStatsView(APIView):
+    """
+    Returns the connection counters and pool statistics of the current worker process.
+    """
+    permission_classes = [IsAdminUser]  # Only admins can access these routes
+
+    def get(self, request):
+        return Response(db_connections.stats(), status=status.HTTP_200_OK)
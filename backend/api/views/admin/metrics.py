@@ -0,0 +1,47 @@
+"""
+metrics.py
+
+View serving the Prometheus metrics of all workers at /metrics (see `api/services/metrics.py`).
+
+The endpoint is meant for the metrics scraper, not for users. The scraper must send `METRICS_TOKEN` as a bearer
+token (`authorization` in the Prometheus scrape config). Without a token the endpoint is closed, except from
+localhost with `DEBUG` on, for development. The client address is not trusted otherwise: behind a reverse proxy
+on the same host every request comes from localhost. Rejected requests get a 404, so the endpoint does not show
+up to outsiders.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views import View
+
+from api.services import metrics
+
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+
+class MetricsView(View):
+    """
+    Returns the metrics in the Prometheus text format.
+    """
+    http_method_names = ['get']
+
+    def get(self, request):
+        if not self.is_allowed(request):
+            raise Http404
+        body, content_type = metrics.render()
+        return HttpResponse(body, content_type=content_type)
+
+    def is_allowed(self, request):
+        """
+        Check the bearer token. Without a configured token, only local requests in DEBUG mode are allowed.
+        """
+        if not settings.METRICS_TOKEN:
+            return settings.DEBUG and request.META.get('REMOTE_ADDR') in LOCAL_ADDRESSES
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        return scheme.lower() == 'bearer' and hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode())
@@ -8,7 +8,7 @@ on books. Only authenticated users can access these routes.
 
 Author: Chace Nielson
 Created: 2024-08-14
-Modified: 2024-08-14
+Modified: 2026-10-18
 @since 1.0
 
 Function Overview:
@@ -16,6 +16,8 @@ Function Overview:
 - POST /books/       : Create a new book.
     - **Function:** `perform_create(self, serializer)`
     - **Purpose:** Handles the creation of a new book, including file uploads to S3.
+      The content file is streamed to S3 in parts while the request is read, or can be uploaded
+      beforehand through an upload session (`content_upload_session`).
 
 - GET /books/        : Retrieve a list of the authenticated user's books.
     - **Function:** `get_queryset(self)`
@@ -29,7 +31,7 @@ Function Overview:
 
 - PUT /books/{id}/   : Update a specific book.
     - **Function:** `perform_update(self, serializer)`
-    - **Purpose:** Handles updating an entire book, including overwriting content or cover art files in S3 if provided.
+    - **Purpose:** Handles updating an entire book, including replacing content or cover art files in S3 if provided.
     - **DRF Keyword:** Partially (`update()` is the standard method; `perform_update()` is a helper function).
 
 - PATCH /books/{id}/ : Partially update a specific book.
@@ -39,7 +41,7 @@ Function Overview:
 
 - DELETE /books/{id}/: Delete a specific book.
     - **Function:** `perform_destroy(self, instance)`
-    - **Purpose:** Deletes a specific book from the database and removes the associated files from S3.
+    - **Purpose:** Deletes a specific book from the database and queues the removal of the associated files from S3.
     - **DRF Keyword:** Partially (`destroy()` is the standard method; `perform_destroy()` is a helper function).
 
 Notes:
@@ -53,7 +55,7 @@ Notes:
 
 """
 
-import uuid
+import logging
 import mimetypes
 from rest_framework import serializers
 from rest_framework import viewsets
@@ -63,8 +65,14 @@ from rest_framework.response import Response
 from api.serializers.bookSerializer import BookSerializer
 from api.models.book import Book
 from rest_framework.parsers import MultiPartParser, FormParser
-from api.aws.upload import upload_file_to_s3, edit_upload
-from api.aws.delete import delete_file_from_s3
+from django.conf import settings
+from django.db import transaction
+from api.aws.upload import BOOK_CONTENT_TYPES, upload_file_to_s3, edit_upload, retire_files
+from api.aws.multipart import S3StreamingUploadHandler, S3UploadedFile
+from api.models.uploadSession import UploadSession
+from api.services import images, jobs
+
+logger = logging.getLogger(__name__)
 
 class BookCRUDViewSet(viewsets.ModelViewSet):
     """
@@ -82,9 +90,68 @@ class BookCRUDViewSet(viewsets.ModelViewSet):
         Retrieve the list of books for the authenticated user.
         """
         if self.request.user.is_authenticated:
-            return Book.objects.filter(owner=self.request.user)
+            return Book.objects.with_owner().filter(owner=self.request.user)
         return Book.objects.none()
-    
+
+    def stream_content_to_s3(self, request):
+        """
+        Stream the 'content' file straight to S3 while the request body is parsed,
+        instead of buffering it in memory or in a temporary file.
+        Must be called before `request.data` or `request.FILES` is accessed.
+        """
+        request._request.upload_handlers.insert(
+            0, S3StreamingUploadHandler(request._request, 'content', request.user.id, 'content', BOOK_CONTENT_TYPES)
+        )
+
+    def discard_streamed_content(self, request):
+        """
+        Queue the deletion of a streamed content file that was not saved to a book.
+        """
+        content_file = request.FILES.get('content')
+        if isinstance(content_file, S3UploadedFile):
+            jobs.enqueue('s3.delete_files', {'urls': [content_file.file_url]})
+
+    def consume_upload_session(self, session_id):
+        """
+        Mark a completed content upload session as used and return its file URL.
+        The file may not be larger than UPLOAD_MAX_CONTENT_SIZE.
+        """
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().filter(
+                pk=session_id, user=self.request.user, purpose='content'
+            ).first()
+            if session is None:
+                raise serializers.ValidationError({'content_upload_session': 'Upload session not found.'})
+            if session.status != UploadSession.STATUS_COMPLETED:
+                raise serializers.ValidationError({'content_upload_session': f'Upload session is {session.status}.'})
+            if session.uploaded_size > settings.UPLOAD_MAX_CONTENT_SIZE:
+                raise serializers.ValidationError({'content_upload_session': 'The uploaded file is too large.'})
+            session.status = UploadSession.STATUS_CONSUMED
+            session.save(update_fields=['status', 'updated_at'])
+        return session.file_url
+
+    def create(self, request, *args, **kwargs):
+        """
+        Create a book, streaming the content file to S3.
+        """
+        self.stream_content_to_s3(request)
+        try:
+            return super().create(request, *args, **kwargs)
+        except Exception:
+            self.discard_streamed_content(request)
+            raise
+
+    def update(self, request, *args, **kwargs):
+        """
+        Update a book, streaming a new content file (if any) to S3.
+        """
+        self.stream_content_to_s3(request)
+        try:
+            return super().update(request, *args, **kwargs)
+        except Exception:
+            self.discard_streamed_content(request)
+            raise
+
     def perform_create(self, serializer):
         """
         Handle file uploads and set URLs for content and cover art.
@@ -97,25 +164,28 @@ class BookCRUDViewSet(viewsets.ModelViewSet):
         content_url = None
         cover_art_url = None
 
-        # Generate a unique string to ensure filename uniqueness
-        unique_string = str(uuid.uuid4())  
+        content_upload_session = serializer.validated_data.get('content_upload_session')
 
         # Upload content file to S3 by getting MIME type based on file extension for content file
-        if content_file:
+        if isinstance(content_file, S3UploadedFile):
+            # Already streamed to S3 while the request was read
+            content_url = content_file.file_url
+        elif content_file:
             # Use mimetypes to guess the content type
             content_mime_type, _ = mimetypes.guess_type(content_file.name)
 
             # Check if the file type is allowed
-            allowed_types = ['application/pdf', 'application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'application/json', 'text/html', 'text/plain', 'application/rtf']
-            if content_mime_type not in allowed_types:
+            if content_mime_type not in BOOK_CONTENT_TYPES:
                 raise serializers.ValidationError("Unsupported file type. Allowed types are PDF, DocX, JSON, HTML, TXT, and RTF.")
 
             # Upload content file to S3
-            content_url = upload_file_to_s3(content_file, self.request.user.id, 'content', content_mime_type, unique_string)
+            content_url = upload_file_to_s3(content_file, self.request.user.id, 'content', content_mime_type)
+        elif content_upload_session:
+            content_url = self.consume_upload_session(content_upload_session)
 
         # Upload cover art file to S3 (if provided)
         if cover_art_file:
-            cover_art_url = upload_file_to_s3(cover_art_file, self.request.user.id, 'cover_art', 'image/png', unique_string)
+            cover_art_url = upload_file_to_s3(cover_art_file, self.request.user.id, 'cover_art', 'image/png')
 
         # Save the book instance
         serializer.save(
@@ -127,21 +197,19 @@ class BookCRUDViewSet(viewsets.ModelViewSet):
 
     def perform_update(self, serializer):
         """
-        Handle file updates and overwrite content or cover art in S3 if provided.
+        Handle file updates and replace content or cover art in S3 if provided.
         Allow updates for other fields like description, author, genre, etc.
         """
         content_file = self.request.FILES.get('content')
         cover_art_file = self.request.FILES.get('cover_art')
+        content_upload_session = serializer.validated_data.get('content_upload_session')
 
         # Retrieve the existing instance to get the current state
         instance = serializer.instance
 
-        print("Debugging")
-
         # Default to existing values if not provided in the request
         title = self.request.data.get('title', instance.title)
         description = self.request.data.get('description', instance.description)
-        print("Debugging " + description)
 
         author = self.request.data.get('author', instance.author)
         genre = self.request.data.get('genre', instance.genre)
@@ -151,17 +219,21 @@ class BookCRUDViewSet(viewsets.ModelViewSet):
         content_url = instance.content_url
         cover_art_url = instance.cover_art_url
 
-        # Overwrite content file in S3 if a new file is provided
-        if content_file:
+        # Replace the content file in S3 if a new file is provided
+        replaced_content_url = None
+        if isinstance(content_file, S3UploadedFile):
+            # Streamed to a new key, so the old file is deleted once the book points at the new one
+            replaced_content_url, content_url = instance.content_url, content_file.file_url
+        elif content_file:
             content_url = edit_upload(content_file, instance.content_url, 'content', instance.owner.id)
+        elif content_upload_session:
+            replaced_content_url, content_url = instance.content_url, self.consume_upload_session(content_upload_session)
 
-        # Overwrite cover art file in S3 if a new file is provided
+        # Upload a new cover art file if provided (stored under a new key; the old file is retired)
         if cover_art_file:
             cover_art_url = edit_upload(cover_art_file, instance.cover_art_url, 'cover_art', instance.owner.id)
 
-        print("Debugging before serializer save?")
-        print("Request Data:", self.request.data)
-
+        logger.debug('Updating book %s with fields %s', instance.pk, sorted(self.request.data.keys()))
 
         # Save the updates to the instance
         serializer.save(
@@ -175,6 +247,9 @@ class BookCRUDViewSet(viewsets.ModelViewSet):
             cover_art_url=cover_art_url
         )
 
+        if replaced_content_url and replaced_content_url != content_url:
+            retire_files([replaced_content_url])
+
 
     def perform_destroy(self, instance):
         """
@@ -184,15 +259,18 @@ class BookCRUDViewSet(viewsets.ModelViewSet):
         if instance.owner != self.request.user:
             raise PermissionDenied("You do not have permission to delete this book.")
         
-        # Delete content and cover art files from S3
-        if instance.content_url:
-            delete_file_from_s3(instance.content_url)
-        if instance.cover_art_url:
-            delete_file_from_s3(instance.cover_art_url)
+        file_urls = [url for url in (instance.content_url, instance.cover_art_url) if url]
+        file_urls.extend(images.variant_urls(instance.cover_art_variants))
+        book_id = instance.pk
 
         # Delete the book instance from the database
         instance.delete()
 
+        # Delete content and cover art files (including the resized copies) from S3 in the background.
+        # Queued after the delete: the job keeps files that are still referenced by a book.
+        if file_urls:
+            jobs.enqueue('s3.delete_files', {'urls': file_urls}, idempotency_key=f'book:{book_id}:delete-files')
+
     def retrieve(self, request, *args, **kwargs):
         """
         Retrieve a specific book by ID.
@@ -2,13 +2,17 @@
 book_public.py
 
 Viewset for public access to book routes. This includes endpoints for retrieving
-all books and fetching a book by its ID.
+all books and fetching a book by its ID. The catalog list also works for signed-in users (send the access
+token) and then marks the books they have favorited.
 
 also includes custom actions for incrementing views and downloads for a book. incorporates throttling to limit the rate of these actions.
+GET requests read from the database replicas when they are configured (see api/db/router.py).
+The catalog helpers at the top of this module are shared with the async versions of the read views
+(see api/views/book/book_public_async.py).
 
 Author: Chace Nielson
 Created: 2024-08-14
-Modified: 2024-09-20
+Modified: 2026-10-18
 @since 1.0
 """
 from rest_framework import viewsets, status  # Add 'status' import
@@ -16,96 +20,201 @@ from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from api.serializers.bookSerializer import BookSerializer
 from api.models.book import Book
+from api.services import catalog_terms, counters, metrics, search, site_statistics
+from api.db.router import ReplicaReadMixin
+from api.services.response_cache import cache_response
+from api.services.pagination import paginate_by_cursor, order_by_args, with_tiebreaker, InvalidCursor
 from django.core.paginator import Paginator
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from rest_framework.decorators import action
-from django.db.models import Q
 from rest_framework.throttling import ScopedRateThrottle
-from django.db import models 
-from django.db.models import Count, Max, Min, Avg
+from django.core.cache import cache
+from django.conf import settings
+import hashlib
+
+# Sort options for the catalog: name -> list of (field, descending). The book ID is always
+# added as the final tiebreaker so pages are stable.
+SORT_OPTIONS = {
+    'most_recent': [('created_at', True)],
+    'least_recent': [('created_at', False)],
+    'most_viewed': [('views', True)],
+    'least_viewed': [('views', False)],
+    'most_downloaded': [('downloads', True)],
+    'least_downloaded': [('downloads', False)],
+    'title_asc': [('title', False)],   # Sort by title A-Z
+    'title_desc': [('title', True)],   # Sort by title Z-A
+    'most_favorited': [('favorites_count', True)],
+    'trending': [('trending_score', True)],  # Recent activity, see api/services/trending.py
+    'relevance': [('search_rank', True), ('created_at', True)],  # Best search matches first
+}
+
+MAX_CURSOR_PAGE_SIZE = 100
+
+# Query parameters that change the catalog response (the others are left out of the response cache key)
+LIST_PARAMS = ('search', 'description', 'sort_by', 'genre', 'language', 'page', 'page_size', 'pagination', 'cursor', 'include_count', 'facets')
+
+
+def catalog_queryset(params, user):
+    """
+    Build the catalog queryset for the request parameters, before the genre and language filters.
+
+    :param params: The query parameters of the request.
+    :param user: The requesting user. Signed-in users also get `is_favorited` for each book.
+    :return: The queryset, the name of the sort option and its ordering.
+    """
+    search_query = params.get('search', None)
+    sort_by = params.get('sort_by', 'most_recent')
+    description_search = params.get('description', False)
+
+    queryset = Book.objects.with_owner()
+
+    # Signed-in users also get `is_favorited` for each book, from the same query
+    if user.is_authenticated:
+        queryset = queryset.with_favorited(user)
+
+    # Filter by title, author, and optionally description using the full-text search index
+    if search_query:
+        queryset = search.search_books(queryset, search_query, include_description=description_search == 'true')
+
+    # Sorting (unknown values default to most recent)
+    if sort_by == 'relevance' and not search_query:
+        sort_by = 'most_recent'
+    if sort_by not in SORT_OPTIONS:
+        sort_by = 'most_recent'
+    return queryset, sort_by, SORT_OPTIONS[sort_by]
+
+
+def catalog_count_key(params):
+    """
+    Get the cache key of the total count of a filtered catalog.
+    """
+    filters = sorted(
+        (key, value) for key, value in params.items()
+        if key in ('search', 'description', 'genre', 'language')
+    )
+    return 'catalog_count:' + hashlib.md5(repr(filters).encode()).hexdigest()
+
+
+def top_n_param(params):
+    """
+    Get the number of books asked for by the top books lists, between 1 and MAX_CURSOR_PAGE_SIZE.
+
+    :param params: The query parameters of the request.
+    :return: The value of 'n' (5 when it is not given).
+    :raises ValueError: If 'n' is not an integer.
+    """
+    n = int(params.get('n', 5))  # Default to top 5 if 'n' is not provided
+    return max(1, min(n, MAX_CURSOR_PAGE_SIZE))
+
 
 class IncrementThrottle(ScopedRateThrottle):
+    """
+    The 'increments' rate limit of the view and download counters. Rejected requests are counted in the metrics.
+    """
     scope = 'increments'
 
-class PublicBookViewSet(viewsets.ViewSet):
+    def allow_request(self, request, view):
+        allowed = super().allow_request(request, view)
+        if not allowed:
+            metrics.THROTTLED_REQUESTS.labels(self.scope).inc()
+        return allowed
+
+
+class PublicBookViewSet(ReplicaReadMixin, viewsets.ViewSet):
     permission_classes = [AllowAny]
 
     @swagger_auto_schema(
         manual_parameters=[
-            openapi.Parameter('search', openapi.IN_QUERY, description="Search books by title", type=openapi.TYPE_STRING),
+            openapi.Parameter('search', openapi.IN_QUERY, description="Search books by title and author (full-text)", type=openapi.TYPE_STRING),
+            openapi.Parameter('genre', openapi.IN_QUERY, description="Only books of this genre (see the facets endpoint)", type=openapi.TYPE_STRING),
+            openapi.Parameter('language', openapi.IN_QUERY, description="Only books in this language (see the facets endpoint)", type=openapi.TYPE_STRING),
+            openapi.Parameter('description', openapi.IN_QUERY, description="Also search descriptions ('true' or 'false')", type=openapi.TYPE_STRING),
+            openapi.Parameter('sort_by', openapi.IN_QUERY, description="Sort order, e.g. most_recent, most_viewed, most_favorited, trending, title_asc or relevance (requires search)", type=openapi.TYPE_STRING),
             openapi.Parameter('page', openapi.IN_QUERY, description="Page number", type=openapi.TYPE_INTEGER),
             openapi.Parameter('page_size', openapi.IN_QUERY, description="Number of results per page", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('pagination', openapi.IN_QUERY, description="Set to 'cursor' to use cursor pagination instead of page numbers", type=openapi.TYPE_STRING),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="Cursor returned as 'next_cursor' by the previous page", type=openapi.TYPE_STRING),
+            openapi.Parameter('include_count', openapi.IN_QUERY, description="Include a (cached) total count in cursor mode ('true' or 'false')", type=openapi.TYPE_STRING),
+            openapi.Parameter('facets', openapi.IN_QUERY, description="Include book counts per genre, language, published decade and cover art for the results ('true' or 'false')", type=openapi.TYPE_STRING),
         ]
     )
-
+    @cache_response(['users', 'books', 'favorites:{user}'], params=LIST_PARAMS, per_user=True, shows_counts=True)
     def list(self, request):
-        search_query = request.query_params.get('search', None)
-        sort_by = request.query_params.get('sort_by', 'most_recent')
         genre = request.query_params.get('genre', None)
         language = request.query_params.get('language', None)
-        description_search = request.query_params.get('description', False)
-
-        queryset = Book.objects.all()
-
-        # Filter by title, author, and optionally description
-        if search_query:
-            if description_search == 'true':
-                queryset = queryset.filter(
-                    Q(title__icontains=search_query) | 
-                    Q(author__icontains=search_query) |
-                    Q(description__icontains=search_query)
-                )
-            else:
-                queryset = queryset.filter(
-                    Q(title__icontains=search_query) | 
-                    Q(author__icontains=search_query)
-                )
-
-        # Filter by genre and language
+        # Facet counts of the whole result set, so filters can be rendered from the same response
+        include_facets = request.query_params.get('facets') == 'true'
+
+        queryset, sort_by, ordering = catalog_queryset(request.query_params, request.user)
+
+        # Filter by genre and language (exact match on the normalized value, ignoring case and spacing)
         if genre:
-            queryset = queryset.filter(genre__icontains=genre)
+            queryset = catalog_terms.filter_books(queryset, 'genre', genre)
         if language:
-            queryset = queryset.filter(language__icontains=language)
-
-        # Sorting
-        if sort_by == 'most_viewed':
-            queryset = queryset.order_by('-views')
-        elif sort_by == 'least_viewed':
-            queryset = queryset.order_by('views')
-        elif sort_by == 'most_downloaded':
-            queryset = queryset.order_by('-downloads')
-        elif sort_by == 'least_downloaded':
-            queryset = queryset.order_by('downloads')
-        elif sort_by == 'title_asc':  # Sort by title A-Z
-            queryset = queryset.order_by('title')
-        elif sort_by == 'title_desc':  # Sort by title Z-A
-            queryset = queryset.order_by('-title')
-        elif sort_by == 'least_recent':
-            queryset = queryset.order_by('created_at')
-        else:  # Default to most recent
-            queryset = queryset.order_by('-created_at')
-
-        # Pagination
+            queryset = catalog_terms.filter_books(queryset, 'language', language)
+
+        try:
+            page_size = int(request.query_params.get('page_size', 10))
+        except ValueError:
+            return Response({'error': 'page_size must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Cursor (keyset) pagination: cost does not grow with the page depth
+        cursor = request.query_params.get('cursor')
+        if cursor or request.query_params.get('pagination') == 'cursor':
+            page_size = max(1, min(page_size, MAX_CURSOR_PAGE_SIZE))
+            try:
+                books, next_cursor = paginate_by_cursor(queryset, sort_by, ordering, cursor, page_size)
+            except InvalidCursor as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            response_data = {
+                'results': BookSerializer(books, many=True).data,
+                'next_cursor': next_cursor,
+                'page_size': page_size,
+            }
+            if request.query_params.get('include_count') == 'true':
+                response_data['count'] = self._cached_count(queryset, request)
+            if include_facets:
+                response_data['facets'] = catalog_terms.result_facets(queryset)
+            return Response(response_data)
+
+        # Page number pagination
+        queryset = queryset.order_by(*order_by_args(with_tiebreaker(ordering)))
         page_number = request.query_params.get('page', 1)
-        page_size = request.query_params.get('page_size', 10)
         paginator = Paginator(queryset, page_size)
         page = paginator.get_page(page_number)
 
         serializer = BookSerializer(page, many=True)
 
-        return Response({
+        response_data = {
             'results': serializer.data,
             'count': paginator.count,
             'num_pages': paginator.num_pages,
             'current_page': page_number
-        })
+        }
+        if include_facets:
+            response_data['facets'] = catalog_terms.result_facets(queryset)
+        return Response(response_data)
+
+    def _cached_count(self, queryset, request):
+        """
+        Count the filtered catalog, caching the result per filter combination so
+        scrolling through cursor pages does not repeat the COUNT(*).
+        """
+        cache_key = catalog_count_key(request.query_params)
+        count = cache.get(cache_key)
+        if count is None:
+            count = queryset.count()
+            cache.set(cache_key, count, settings.CATALOG_COUNT_CACHE_TIMEOUT)
+        return count
     
+    @cache_response(['users', 'book:{pk}'], per_user=True)
     def retrieve(self, request, pk=None):
         """
-        Retrieve a specific book by ID.
+        Retrieve a specific book by ID. Signed-in users also get `is_favorited`.
         """
-        book = Book.objects.filter(pk=pk).first()
+        book = Book.objects.with_owner().with_favorited(request.user).filter(pk=pk).first()
         if book is None:
             return Response({"detail": "Not found."}, status=404)
         serializer = BookSerializer(book)
@@ -115,41 +224,53 @@ class PublicBookViewSet(viewsets.ViewSet):
     def increment_views(self, request, pk=None):
         """
         Increment the views count for the book.
+
+        The increment is buffered and written in batches (see `api.services.counters`);
+        the returned count includes increments that have not been written yet.
         """
-        try:
-            book = Book.objects.get(pk=pk)  # Manually fetch the book object
-            book.views += 1
-            book.save()
-            return Response({'status': 'views incremented', 'views': book.views}, status=status.HTTP_200_OK)
-        except Book.DoesNotExist:
+        views = self._increment_counter(pk, 'views')
+        if views is None:
             return Response({'error': 'Book not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'status': 'views incremented', 'views': views}, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['post'], throttle_classes=[IncrementThrottle])
     def increment_downloads(self, request, pk=None):
         """
         Increment the downloads count for the book.
+
+        The increment is buffered and written in batches (see `api.services.counters`);
+        the returned count includes increments that have not been written yet.
         """
-        try:
-            book = Book.objects.get(pk=pk)  # Manually fetch the book object
-            book.downloads += 1
-            book.save()
-            return Response({'status': 'downloads incremented', 'downloads': book.downloads}, status=status.HTTP_200_OK)
-        except Book.DoesNotExist:
+        downloads = self._increment_counter(pk, 'downloads')
+        if downloads is None:
             return Response({'error': 'Book not found'}, status=status.HTTP_404_NOT_FOUND)
-        
+        return Response({'status': 'downloads incremented', 'downloads': downloads}, status=status.HTTP_200_OK)
+
+    def _increment_counter(self, pk, field):
+        """
+        Buffer an increment and return the best-known counter value, or None if the book does not exist.
+        """
+        stored = Book.objects.filter(pk=pk).values_list(field, flat=True).first()
+        if stored is None:
+            return None  # Only existing books are buffered, so unknown IDs cannot reach the statistics
+        return stored + counters.increment(int(pk), field)
 
     @swagger_auto_schema(
         manual_parameters=[
-            openapi.Parameter('n', openapi.IN_QUERY, description="Number of books to retrieve", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('n', openapi.IN_QUERY, description="Number of books to retrieve (at most 100)", type=openapi.TYPE_INTEGER),
         ]
     )
     @action(detail=False, methods=['get'])
+    @cache_response(['users', 'books'], params=('n',), shows_counts=True)
     def top_n_most_viewed(self, request):
         """
         Get top 'n' most viewed books.
         """
-        n = int(request.query_params.get('n', 5))  # Default to top 5 if 'n' is not provided
-        top_books = Book.objects.all().order_by('-views')[:n]
+        try:
+            n = top_n_param(request.query_params)
+        except ValueError:
+            return Response({'error': 'n must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        top_books = Book.objects.with_owner().order_by('-views')[:n]
         serializer = BookSerializer(top_books, many=True)
         return Response({
             'results': serializer.data,
@@ -158,16 +279,20 @@ class PublicBookViewSet(viewsets.ViewSet):
 
     @swagger_auto_schema(
         manual_parameters=[
-            openapi.Parameter('n', openapi.IN_QUERY, description="Number of books to retrieve", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('n', openapi.IN_QUERY, description="Number of books to retrieve (at most 100)", type=openapi.TYPE_INTEGER),
         ]
     )
     @action(detail=False, methods=['get'])
+    @cache_response(['users', 'books'], params=('n',), shows_counts=True)
     def top_n_recent(self, request):
         """
         Get top 'n' most recent books.
         """
-        n = int(request.query_params.get('n', 5))  # Default to top 5 if 'n' is not provided
-        recent_books = Book.objects.all().order_by('-created_at')[:n]
+        try:
+            n = top_n_param(request.query_params)
+        except ValueError:
+            return Response({'error': 'n must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        recent_books = Book.objects.with_owner().order_by('-created_at')[:n]
         serializer = BookSerializer(recent_books, many=True)
         return Response({
             'results': serializer.data,
@@ -175,59 +300,20 @@ class PublicBookViewSet(viewsets.ViewSet):
         }, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'])
-    def site_statistics(self, request):
-        """
-        Get general statistics about the site.
+    @cache_response(['books'])
+    def facets(self, request):
         """
-        # Basic stats
-        total_books = Book.objects.count()
-        genres = Book.objects.values_list('genre', flat=True).distinct()
-        total_downloads = Book.objects.aggregate(total_downloads=models.Sum('downloads'))['total_downloads'] or 0
-        total_views = Book.objects.aggregate(total_views=models.Sum('views'))['total_views'] or 0
-
-        # Genre stats
-        genre_stats = {}
-        for genre in genres:
-            genre_count = Book.objects.filter(genre=genre).count()
-            genre_stats[genre] = genre_count
+        Get the genres and languages that have books, with their book counts, for the catalog filters.
 
-        # New stats
-        total_authors = Book.objects.values('author').distinct().count()  # Unique authors
-        most_popular_language = Book.objects.values('language').annotate(count=Count('id')).order_by('-count').first()  # Most common language
-        oldest_book = Book.objects.aggregate(oldest=Min('published_date'))['oldest']  # Oldest book by published date
-        newest_book = Book.objects.aggregate(newest=Max('published_date'))['newest']  # Newest book by published date
-        books_without_cover_art = Book.objects.filter(cover_art_url__isnull=True).count()  # Books missing cover art
-
-        # Breakdown of books per language
-        books_per_language = Book.objects.values('language').annotate(count=Count('id')).order_by('-count')
-
-        # Average views and downloads
-        avg_views = Book.objects.aggregate(avg_views=Avg('views'))['avg_views'] or 0
-        avg_downloads = Book.objects.aggregate(avg_downloads=Avg('downloads'))['avg_downloads'] or 0
+        Read from the maintained counts on the genre and language tables (see `api.services.catalog_terms`).
+        """
+        return Response(catalog_terms.facets(), status=status.HTTP_200_OK)
 
-        # Top viewed and downloaded books
-        top_downloaded_book = Book.objects.order_by('-downloads').first()
-        top_viewed_book = Book.objects.order_by('-views').first()
+    @action(detail=False, methods=['get'])
+    def site_statistics(self, request):
+        """
+        Get general statistics about the site.
 
-        return Response({
-            'total_books': total_books,
-            'total_downloads': total_downloads,
-            'total_views': total_views,
-            'genres': genre_stats,
-            'total_authors': total_authors,
-            'most_popular_language': most_popular_language['language'] if most_popular_language else None,
-            'oldest_book': oldest_book,
-            'newest_book': newest_book,
-            'books_without_cover_art': books_without_cover_art,
-            'books_per_language': list(books_per_language),
-            'average_views_per_book': avg_views,
-            'average_downloads_per_book': avg_downloads,
-            'top_downloaded_book': {
-                'title': top_downloaded_book.title if top_downloaded_book else None,
-                'downloads': top_downloaded_book.downloads if top_downloaded_book else None,
-            },
-            'top_viewed_book': {
-                'title': top_viewed_book.title if top_viewed_book else None,
-                'views': top_viewed_book.views if top_viewed_book else None,
-            },
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        Served from a snapshot that is refreshed when books change (see `api.services.site_statistics`).
+        """
+        return Response(site_statistics.get_statistics(), status=status.HTTP_200_OK)
@@ -0,0 +1,140 @@
+"""
+book_public_async.py
+
+Async versions of the public book read views: the catalog, book details and the top books lists.
+
+They return the same JSON as the matching `PublicBookViewSet` actions (api/views/book/book_public.py), share its
+catalog helpers and response cache, and replace them on the same URLs when `ASYNC_PUBLIC_VIEWS` is on. The
+increment, facet and statistics actions stay on the viewset. See api/views/public_async.py.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from rest_framework import status
+
+from api.models.book import Book
+from api.serializers.bookSerializer import BookSerializer
+from api.services import catalog_terms
+from api.services.pagination import apaginate_by_cursor, order_by_args, with_tiebreaker, InvalidCursor
+from api.services.response_cache import cache_response
+from api.views.book.book_public import LIST_PARAMS, MAX_CURSOR_PAGE_SIZE, catalog_count_key, catalog_queryset, top_n_param
+from api.views.public_async import AsyncPublicView, DataJsonResponse
+
+
+class AsyncBookListView(AsyncPublicView):
+    """
+    The book catalog, see `PublicBookViewSet.list` for the query parameters.
+    """
+
+    @cache_response(['users', 'books', 'favorites:{user}'], params=LIST_PARAMS, per_user=True, shows_counts=True)
+    async def get(self, request):
+        params = request.GET
+        genre = params.get('genre', None)
+        language = params.get('language', None)
+        include_facets = params.get('facets') == 'true'
+
+        queryset, sort_by, ordering = catalog_queryset(params, request.user)
+        if genre:
+            queryset = await catalog_terms.afilter_books(queryset, 'genre', genre)
+        if language:
+            queryset = await catalog_terms.afilter_books(queryset, 'language', language)
+
+        try:
+            page_size = int(params.get('page_size', 10))
+        except ValueError:
+            return DataJsonResponse({'error': 'page_size must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Cursor (keyset) pagination
+        cursor = params.get('cursor')
+        if cursor or params.get('pagination') == 'cursor':
+            page_size = max(1, min(page_size, MAX_CURSOR_PAGE_SIZE))
+            try:
+                books, next_cursor = await apaginate_by_cursor(queryset, sort_by, ordering, cursor, page_size)
+            except InvalidCursor as e:
+                return DataJsonResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            response_data = {
+                'results': BookSerializer(books, many=True).data,
+                'next_cursor': next_cursor,
+                'page_size': page_size,
+            }
+            if params.get('include_count') == 'true':
+                response_data['count'] = await self._cached_count(queryset, params)
+            if include_facets:
+                response_data['facets'] = await catalog_terms.aresult_facets(queryset)
+            return DataJsonResponse(response_data)
+
+        # Page number pagination. The paginator works on the row numbers, so only the count and the
+        # rows of the page are queried (with the async ORM).
+        queryset = queryset.order_by(*order_by_args(with_tiebreaker(ordering)))
+        page_number = params.get('page', 1)
+        paginator = Paginator(range(await queryset.acount()), page_size)
+        rows = paginator.get_page(page_number).object_list
+        books = [book async for book in queryset[rows.start:rows.stop]]
+
+        response_data = {
+            'results': BookSerializer(books, many=True).data,
+            'count': paginator.count,
+            'num_pages': paginator.num_pages,
+            'current_page': page_number,
+        }
+        if include_facets:
+            response_data['facets'] = await catalog_terms.aresult_facets(queryset)
+        return DataJsonResponse(response_data)
+
+    async def _cached_count(self, queryset, params):
+        """
+        Count the filtered catalog, caching the result per filter combination.
+        """
+        cache_key = catalog_count_key(params)
+        count = await cache.aget(cache_key)
+        if count is None:
+            count = await queryset.acount()
+            await cache.aset(cache_key, count, settings.CATALOG_COUNT_CACHE_TIMEOUT)
+        return count
+
+
+class AsyncBookDetailView(AsyncPublicView):
+    """
+    The details of one book. Signed-in users also get `is_favorited`.
+    """
+
+    @cache_response(['users', 'book:{pk}'], per_user=True)
+    async def get(self, request, pk):
+        book = await Book.objects.with_owner().with_favorited(request.user).filter(pk=pk).afirst()
+        if book is None:
+            return DataJsonResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return DataJsonResponse(BookSerializer(book).data)
+
+
+class AsyncTopBooksView(AsyncPublicView):
+    """
+    The top 'n' books in the order of `order_by`. Each order is its own subclass, as the class name is part of
+    the response cache key.
+    """
+    order_by = None
+
+    @cache_response(['users', 'books'], params=('n',), shows_counts=True)
+    async def get(self, request):
+        try:
+            n = top_n_param(request.GET)
+        except ValueError:
+            return DataJsonResponse({'error': 'n must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        books = [book async for book in Book.objects.with_owner().order_by(self.order_by)[:n]]
+        return DataJsonResponse({
+            'results': BookSerializer(books, many=True).data,
+            'count': len(books),
+        })
+
+
+class AsyncMostViewedBooksView(AsyncTopBooksView):
+    order_by = '-views'
+
+
+class AsyncMostRecentBooksView(AsyncTopBooksView):
+    order_by = '-created_at'
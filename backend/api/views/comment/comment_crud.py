@@ -37,8 +37,8 @@ class CommentCRUDViewSet(viewsets.ModelViewSet):
             # If the book ID is provided in the query params, filter comments by book
             book_id = self.request.query_params.get('book', None)
             if book_id:
-                return Comment.objects.filter(book__id=book_id)
-            return Comment.objects.filter(user=self.request.user)
+                return Comment.objects.filter(book__id=book_id).select_related('user', 'user__profile_picture')
+            return Comment.objects.filter(user=self.request.user).select_related('user', 'user__profile_picture')
         return Comment.objects.none()
 
     def perform_create(self, serializer):
@@ -5,19 +5,44 @@ Views for publicly retrieving comments and their nested replies for a specific b
 
 This file defines the 'CommentPublicViewSet' for unauthenticated and authenticated users to view all comments related to a specific book. 
 This includes all top-level comments and their nested replies (threaded comments).
+Comments are read from the database replicas when they are configured (see api/db/router.py).
+An async version of the thread view is in api/views/comment/comment_public_async.py.
 
 Author: Chace Nielson
 Created: 2024-08-14
-Modified: 2024-08-14
+Modified: 2026-10-18
 @since 1.0
 """
-from rest_framework import viewsets
+from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from api.models.comment import Comment
 from api.serializers.commentSerializer import CommentSerializer
+from api.services.comment_tree import load_comment_tree
+from api.db.router import ReplicaReadMixin
+from api.services.response_cache import cache_response
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
 
-class CommentPublicViewSet(viewsets.ReadOnlyModelViewSet):
+
+def optional_int_param(params, name):
+    """
+    Read an optional, non-negative integer query parameter.
+
+    :param params: The query parameters of the request.
+    :param name: The parameter name.
+    :return: The value, or None when it is missing or empty.
+    :raises ValueError: If the value is not a non-negative integer.
+    """
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    if not value.isdigit():
+        raise ValueError(f'{name} must be a non-negative integer')
+    return int(value)
+
+
+class CommentPublicViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for publicly retrieving comments related to a specific book, 
     including all nested replies (threaded comments).
@@ -32,11 +57,26 @@ class CommentPublicViewSet(viewsets.ReadOnlyModelViewSet):
         book_id = self.kwargs.get('pk')  # Assuming the book ID is passed as a URL parameter
         return Comment.objects.filter(book_id=book_id, parent_comment__isnull=True)
 
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('max_depth', openapi.IN_QUERY, description="Levels of replies to include (0 for top-level comments only)", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('max_replies', openapi.IN_QUERY, description="Maximum replies returned per comment", type=openapi.TYPE_INTEGER),
+        ]
+    )
+    @cache_response(['users', 'comments:{pk}'], params=('max_depth', 'max_replies'))
     def retrieve(self, request, *args, **kwargs):
         """
         Retrieve all top-level comments for the book specified by its ID, including nested replies.
+
+        The whole thread is loaded in a single query and assembled in memory.
         """
         book_id = kwargs.get('pk')
-        queryset = self.get_queryset().filter(book_id=book_id)
-        serializer = self.get_serializer(queryset, many=True)
+        try:
+            max_depth = optional_int_param(request.query_params, 'max_depth')
+            max_replies = optional_int_param(request.query_params, 'max_replies')
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        comments = load_comment_tree(book_id, max_depth=max_depth, max_replies=max_replies)
+        serializer = self.get_serializer(comments, many=True)
         return Response(serializer.data)
@@ -0,0 +1,38 @@
+"""
+comment_public_async.py
+
+Async version of the public comment thread view (`CommentPublicViewSet.retrieve`).
+
+It returns the same JSON, loads the thread with the async ORM in a single query and replaces the viewset on the
+same URL when `ASYNC_PUBLIC_VIEWS` is on. See api/views/public_async.py.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+from rest_framework import status
+
+from api.serializers.commentSerializer import CommentSerializer
+from api.services.comment_tree import aload_comment_tree
+from api.services.response_cache import cache_response
+from api.views.comment.comment_public import optional_int_param
+from api.views.public_async import AsyncPublicView, DataJsonResponse
+
+
+class AsyncCommentThreadView(AsyncPublicView):
+    """
+    The top-level comments of a book with their nested replies.
+    """
+
+    @cache_response(['users', 'comments:{pk}'], params=('max_depth', 'max_replies'))
+    async def get(self, request, pk):
+        try:
+            max_depth = optional_int_param(request.GET, 'max_depth')
+            max_replies = optional_int_param(request.GET, 'max_replies')
+        except ValueError as e:
+            return DataJsonResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        comments = await aload_comment_tree(pk, max_depth=max_depth, max_replies=max_replies)
+        serializer = CommentSerializer(comments, many=True, context={'request': request})
+        return DataJsonResponse(serializer.data)
@@ -5,6 +5,19 @@ from rest_framework.response import Response
 from api.models.favoriteBooks import FavoriteBook
 from api.models.book import Book
 from api.serializers.bookSerializer import BookSerializer
+from api.services import favorites
+from api.services.pagination import paginate_by_cursor, InvalidCursor
+from api.views.book.book_public import MAX_CURSOR_PAGE_SIZE
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+DEFAULT_FAVORITES_PAGE_SIZE = 20
+
+# Most recently favorited first (the favorite's ID is added as the tiebreaker)
+FAVORITES_ORDERING = [('created_at', True)]
+
+# The largest book ID (a 64-bit primary key); larger IDs cannot be sent to the database
+MAX_BOOK_ID = 2 ** 63 - 1
 
 
 class FavoriteBookViewSet(viewsets.ViewSet):
@@ -13,40 +26,107 @@ class FavoriteBookViewSet(viewsets.ViewSet):
     @action(detail=True, methods=['post'])
     def add_favorite(self, request, pk=None):
         """Adds a book to the user's favorites."""
-        try:
-            book = Book.objects.get(pk=pk)
-            # Check if already favorited
-            if FavoriteBook.objects.filter(user=request.user, book=book).exists():
-                return Response({"detail": "Book is already in favorites."}, status=status.HTTP_400_BAD_REQUEST)
-
-            FavoriteBook.objects.create(user=request.user, book=book)
+        if favorites.add(request.user, [int(pk)]):
             return Response({"detail": "Book added to favorites."}, status=status.HTTP_201_CREATED)
-        except Book.DoesNotExist:
+        if not Book.objects.filter(pk=pk).exists():
             return Response({"detail": "Book not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"detail": "Book is already in favorites."}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['delete'])
     def remove_favorite(self, request, pk=None):
         """Removes a book from the user's favorites."""
-        try:
-            book = Book.objects.get(pk=pk)
-            favorite = FavoriteBook.objects.filter(user=request.user, book=book)
-            if favorite.exists():
-                favorite.delete()
-                return Response({"detail": "Book removed from favorites."}, status=status.HTTP_204_NO_CONTENT)
-            return Response({"detail": "Book not in favorites."}, status=status.HTTP_400_BAD_REQUEST)
-        except Book.DoesNotExist:
+        if favorites.remove(request.user, [int(pk)]):
+            return Response({"detail": "Book removed from favorites."}, status=status.HTTP_204_NO_CONTENT)
+        if not Book.objects.filter(pk=pk).exists():
             return Response({"detail": "Book not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"detail": "Book not in favorites."}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['post'])
+    def bulk_add(self, request):
+        """
+        Adds several books to the user's favorites.
 
+        Expects {"book_ids": [1, 2, ...]}. Books that do not exist or are already favorites are skipped;
+        the response lists the IDs that were added.
+        """
+        book_ids, error = self._book_ids(request)
+        if error:
+            return error
+        return Response({"added": favorites.add(request.user, book_ids)}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'])
+    def bulk_remove(self, request):
+        """
+        Removes several books from the user's favorites.
+
+        Expects {"book_ids": [1, 2, ...]}. Books that are not favorites are skipped; the response lists the IDs
+        that were removed.
+        """
+        book_ids, error = self._book_ids(request)
+        if error:
+            return error
+        return Response({"removed": favorites.remove(request.user, book_ids)}, status=status.HTTP_200_OK)
+
+    def _book_ids(self, request):
+        """
+        Read the `book_ids` list of a bulk request, returning (ids, None) or (None, error response).
+        """
+        book_ids = request.data.get('book_ids') if hasattr(request.data, 'get') else None
+        if (
+            not isinstance(book_ids, list)
+            or not book_ids
+            or not all(
+                isinstance(book_id, int) and not isinstance(book_id, bool) and 1 <= book_id <= MAX_BOOK_ID
+                for book_id in book_ids
+            )
+        ):
+            return None, Response({"detail": "book_ids must be a non-empty list of book IDs."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(book_ids) > favorites.MAX_BULK_FAVORITES:
+            return None, Response(
+                {"detail": f"At most {favorites.MAX_BULK_FAVORITES} books can be changed at once."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return book_ids, None
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('page_size', openapi.IN_QUERY, description="Number of books per page (at most 100)", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="Cursor returned as 'next_cursor' by the previous page", type=openapi.TYPE_STRING),
+        ]
+    )
     @action(detail=False, methods=['get'])
     def get_favorites(self, request):
-        """Get all favorite books of the user."""
-        """Get all favorite books of the user."""
-        # Get all the favorite book entries for the user
-        favorite_books = FavoriteBook.objects.filter(user=request.user).values_list('book', flat=True)
+        """
+        Get the user's favorite books, most recently favorited first, one page at a time.
 
-        # Retrieve the book objects for those favorite books
-        books = Book.objects.filter(id__in=favorite_books)
+        Pages are read with a single join from the favorites to the books (and their owners) using cursor
+        pagination on the (user, created_at, id) index, so the cost per page does not depend on how many
+        favorites the user has. Pass the returned 'next_cursor' to get the next page; it is null on the last one.
+        """
+        try:
+            page_size = int(request.query_params.get('page_size', DEFAULT_FAVORITES_PAGE_SIZE))
+        except ValueError:
+            return Response({'error': 'page_size must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        page_size = max(1, min(page_size, MAX_CURSOR_PAGE_SIZE))
+
+        favorite_books = (
+            FavoriteBook.objects.filter(user=request.user)
+            .select_related('book__owner', 'book__owner__profile_picture')
+        )
+        try:
+            favorites_page, next_cursor = paginate_by_cursor(
+                favorite_books, 'favorited', FAVORITES_ORDERING, request.query_params.get('cursor'), page_size
+            )
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Serialize the books and return their data
-        serializer = BookSerializer(books, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        # Serialize the books and add when each one was favorited
+        results = BookSerializer([favorite.book for favorite in favorites_page], many=True).data
+        for book_data, favorite in zip(results, favorites_page):
+            book_data['is_favorited'] = True
+            book_data['favorited_at'] = favorite.created_at
+        return Response({
+            'results': results,
+            'next_cursor': next_cursor,
+            'page_size': page_size,
+        }, status=status.HTTP_200_OK)
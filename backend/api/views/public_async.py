@@ -0,0 +1,83 @@
+"""
+public_async.py
+
+Base class for the async (ASGI) versions of the public read views.
+
+Django REST framework views are synchronous, so under an ASGI server every request to them occupies a thread
+for its whole duration. The async views are plain Django views with async handlers: their queries use the
+async ORM, and while one request waits on the database the event loop serves the others. They return the same
+JSON as the viewsets they mirror and are switched on with `ASYNC_PUBLIC_VIEWS` (see api/urls.py). Under a
+WSGI server they still work, but each request then runs in its own event loop and gains nothing.
+
+Like the viewsets they are open to everyone and authenticate the access token when one is sent (invalid tokens
+get a 401, as in DRF), and their reads go to the database replicas (see api/db/router.py).
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Classes:
+--------
+- AsyncPublicView
+    Async view authenticating the optional access token and enabling replica reads.
+- DataJsonResponse
+    JSON response that keeps its data, for the response cache.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from api.db import router as replica_router
+
+
+class DataJsonResponse(JsonResponse):
+    """
+    A `JsonResponse` that keeps the data it was built from in `data`, like a DRF `Response`, so
+    `cache_response` can cache it.
+    """
+
+    def __init__(self, data, **kwargs):
+        super().__init__(data, safe=False, **kwargs)
+        self.data = data
+
+
+class AsyncPublicView(View):
+    """
+    Async view open to everyone. The access token, if any, is checked before the handler runs.
+    """
+    http_method_names = ['get', 'head', 'options']
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            await self.authenticate(request)
+        except AuthenticationFailed as e:
+            data = e.detail if isinstance(e.detail, (list, dict)) else {'detail': e.detail}
+            response = DataJsonResponse(data, status=status.HTTP_401_UNAUTHORIZED)
+            response['WWW-Authenticate'] = JWTAuthentication().authenticate_header(request)
+            return response
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def authenticate(self, request):
+        """
+        Set `request.user` from the access token (anonymous without one) and enable replica reads.
+
+        :param request: The request.
+        :return: None
+        :raises AuthenticationFailed: If the token is invalid or expired.
+        """
+        if not request.headers.get('Authorization'):
+            # Anonymous reads need neither the database nor the cache to be routed
+            request.user = AnonymousUser()
+            replica_router.enable_replica_reads(request.user)
+            return
+        await sync_to_async(self._authenticate_token)(request)
+
+    def _authenticate_token(self, request):
+        result = JWTAuthentication().authenticate(request)
+        request.user = result[0] if result else AnonymousUser()
+        replica_router.enable_replica_reads(request.user)
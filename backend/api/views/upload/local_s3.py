@@ -0,0 +1,93 @@
+"""
+local_s3.py
+
+Development endpoint standing in for the S3 bucket.
+
+This file defines the 'LocalS3View', which accepts presigned uploads and serves files when `AWS_S3_LOCAL_ROOT`
+is set (see `api/aws/local.py`). It is only routed in that case and must never be enabled in production.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Function Overview:
+------------------
+- POST /local-s3/        : Upload a file with a presigned POST form ('key', 'token', 'Content-Type', 'file').
+- PUT  /local-s3/{key}   : Upload a file with a presigned PUT URL (raw request body).
+- GET  /local-s3/{key}   : Download a stored file.
+"""
+from django.conf import settings
+from django.http import FileResponse, Http404
+from rest_framework import status
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.aws.client import get_s3_client
+from api.aws.local import read_presigned_token
+
+
+class LocalS3View(APIView):
+    """
+    Accepts presigned uploads and serves files for the local S3 stand-in.
+    Uploads are authorized by the signed token in the presigned URL, not by a user.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    parser_classes = [MultiPartParser]
+    swagger_schema = None  # Not part of the public API
+
+    def check_token(self, token, key, content_type):
+        """
+        Verify a presigned token against the uploaded key and content type.
+        Returns the signed conditions, or None if the upload is not allowed.
+        """
+        conditions = read_presigned_token(token or '')
+        if conditions is None or conditions['key'] != key:
+            return None
+        if conditions.get('content_type') and conditions['content_type'] != content_type:
+            return None
+        return conditions
+
+    def post(self, request, key=None):
+        key = request.data.get('key')
+        upload = request.FILES.get('file')
+        conditions = self.check_token(request.data.get('token'), key, request.data.get('Content-Type'))
+        if conditions is None or upload is None:
+            return Response({'error': 'Invalid upload'}, status=status.HTTP_403_FORBIDDEN)
+        if conditions.get('max_size') is not None and not 1 <= upload.size <= conditions['max_size']:
+            return Response({'error': 'EntityTooLarge'}, status=status.HTTP_400_BAD_REQUEST)
+
+        get_s3_client().put_object(
+            Bucket=conditions['bucket'],
+            Key=key,
+            Body=upload,
+            ContentType=request.data.get('Content-Type'),
+            CacheControl=conditions.get('cache_control'),
+        )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def put(self, request, key=None):
+        content_type = request.META.get('CONTENT_TYPE')
+        conditions = self.check_token(request.query_params.get('token'), key, content_type)
+        if conditions is None:
+            return Response({'error': 'Invalid upload'}, status=status.HTTP_403_FORBIDDEN)
+
+        get_s3_client().put_object(
+            Bucket=conditions['bucket'],
+            Key=key,
+            Body=request.stream or b'',
+            ContentType=content_type,
+            CacheControl=request.META.get('HTTP_CACHE_CONTROL') or conditions.get('cache_control'),
+        )
+        return Response(status=status.HTTP_200_OK)
+
+    def get(self, request, key=None):
+        client = get_s3_client()
+        path = client.file_path(settings.AWS_S3_BUCKET_NAME, key or '')
+        if path is None:
+            raise Http404
+        meta = client.head_object(Bucket=settings.AWS_S3_BUCKET_NAME, Key=key)
+        return FileResponse(open(path, 'rb'), content_type=meta['ContentType'])
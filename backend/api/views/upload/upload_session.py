@@ -0,0 +1,458 @@
+"""
+upload_session.py
+
+Views for resumable, chunked uploads and direct-to-S3 uploads.
+
+This file defines the 'UploadSessionViewSet', which lets authenticated users upload files in two ways:
+- Multipart: the file is sent through the API in parts. Each part goes straight to an S3 multipart upload, so the
+  server never holds more than one part in memory, and an interrupted upload can be resumed by asking which parts
+  were stored and sending only the missing ones.
+- Presigned: the API issues a presigned POST form or PUT URL and the client uploads straight to S3, so the file
+  bytes never reach the API servers.
+
+Finalizing a session checks the stored object with a HEAD request (size and MIME type) and creates or updates the
+'Book' or 'UserProfilePicture' it belongs to. A completed multipart session can also be attached to a book with
+the `content_upload_session` field.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+
+Function Overview:
+------------------
+- POST   /uploads/                 : Start a multipart upload session.
+- POST   /uploads/presign/         : Start a presigned upload session and get the upload URL.
+- GET    /uploads/{id}/            : Get the session status and the parts stored so far (to resume).
+- PUT    /uploads/{id}/parts/{n}/  : Upload part number n (raw request body).
+- POST   /uploads/{id}/complete/   : Finish the upload and get the file URL.
+- POST   /uploads/{id}/finalize/   : Verify the stored file and attach it to a book or profile picture.
+- DELETE /uploads/{id}/            : Abort the upload and discard the stored parts.
+"""
+import mimetypes
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from api.aws.multipart import (
+    MIN_PART_SIZE,
+    abort_multipart_upload,
+    complete_multipart_upload,
+    start_multipart_upload,
+    upload_part,
+)
+from api.aws.presigned import head_file, presigned_post, presigned_put
+from api.aws.upload import BOOK_CONTENT_TYPES, build_file_key, retire_files
+from api.models.book import Book
+from api.models.uploadSession import UploadSession
+from api.models.userProfilePicture import UserProfilePicture
+from api.serializers.bookSerializer import BookSerializer
+from api.services import jobs
+
+# S3 allows at most 10,000 parts per upload
+MAX_PARTS = 10000
+
+
+def is_allowed_type(purpose, content_type):
+    """
+    Check whether a MIME type may be uploaded for the given purpose.
+    """
+    if purpose == 'content':
+        return content_type in BOOK_CONTENT_TYPES
+    return bool(content_type) and content_type.startswith('image/')
+
+
+def max_upload_size(purpose):
+    """
+    Get the largest file size in bytes allowed for the given purpose.
+    """
+    if purpose == 'content':
+        return settings.UPLOAD_MAX_CONTENT_SIZE
+    return settings.UPLOAD_MAX_IMAGE_SIZE
+
+
+def session_data(session):
+    """
+    Serialize an upload session for API responses.
+    """
+    return {
+        'id': str(session.id),
+        'purpose': session.purpose,
+        'file_name': session.file_name,
+        'content_type': session.content_type,
+        'status': session.status,
+        'part_size': session.part_size,
+        'uploaded_size': session.size if session.size is not None else session.uploaded_size,
+        'parts': [
+            {'part_number': part['PartNumber'], 'size': part['Size']}
+            for part in sorted(session.parts, key=lambda part: part['PartNumber'])
+        ],
+        'mode': session.mode,
+        'file_url': session.file_url if session.status in (UploadSession.STATUS_COMPLETED, UploadSession.STATUS_CONSUMED) else None,
+    }
+
+
+class UploadSessionViewSet(viewsets.ViewSet):
+    """
+    ViewSet for multipart and presigned upload sessions. Users can only see and modify their own sessions.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_session(self, request, pk, for_update=False):
+        """
+        Get one of the user's upload sessions, or None if it does not exist.
+        """
+        queryset = UploadSession.objects.filter(user=request.user)
+        if for_update:
+            queryset = queryset.select_for_update()
+        try:
+            return queryset.filter(pk=pk).first()
+        except ValidationError:  # Not a valid UUID
+            return None
+
+    def validate_new_upload(self, request):
+        """
+        Validate the file name and purpose of a new upload session.
+        Returns (file_name, purpose, content_type, error_response).
+        """
+        file_name = request.data.get('file_name')
+        purpose = request.data.get('purpose', 'content')
+        if not file_name:
+            return None, None, None, Response({'error': 'file_name is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if purpose not in dict(UploadSession.PURPOSE_CHOICES):
+            return None, None, None, Response({'error': 'Invalid purpose'}, status=status.HTTP_400_BAD_REQUEST)
+
+        content_type = mimetypes.guess_type(file_name)[0]
+        if not is_allowed_type(purpose, content_type):
+            return None, None, None, Response({'error': 'Unsupported file type.'}, status=status.HTTP_400_BAD_REQUEST)
+        return file_name, purpose, content_type, None
+
+    @swagger_auto_schema(
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['file_name', 'purpose'],
+            properties={
+                'file_name': openapi.Schema(type=openapi.TYPE_STRING),
+                'purpose': openapi.Schema(type=openapi.TYPE_STRING, enum=['content', 'cover_art', 'profile_image']),
+            },
+        )
+    )
+    def create(self, request):
+        """
+        Start a new multipart upload session.
+        """
+        file_name, purpose, content_type, error = self.validate_new_upload(request)
+        if error:
+            return error
+
+        file_key = build_file_key(request.user.id, purpose, str(uuid.uuid4()), file_name)
+        upload_id = start_multipart_upload(file_key, content_type)
+
+        session = UploadSession.objects.create(
+            user=request.user,
+            purpose=purpose,
+            mode=UploadSession.MODE_MULTIPART,
+            file_name=file_name,
+            content_type=content_type,
+            file_key=file_key,
+            upload_id=upload_id,
+            part_size=max(settings.AWS_S3_MULTIPART_PART_SIZE, MIN_PART_SIZE),
+        )
+        return Response(session_data(session), status=status.HTTP_201_CREATED)
+
+    @swagger_auto_schema(
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['file_name', 'purpose'],
+            properties={
+                'file_name': openapi.Schema(type=openapi.TYPE_STRING),
+                'purpose': openapi.Schema(type=openapi.TYPE_STRING, enum=['content', 'cover_art', 'profile_image']),
+                'size': openapi.Schema(type=openapi.TYPE_INTEGER, description='File size in bytes'),
+                'method': openapi.Schema(type=openapi.TYPE_STRING, enum=['post', 'put'], default='post'),
+            },
+        )
+    )
+    @action(detail=False, methods=['post'])
+    def presign(self, request):
+        """
+        Start a presigned upload session. The response's 'upload' describes the request the client
+        must send to S3: a form POST to 'url' with 'fields' (and the file last, as 'file'), or a PUT to
+        'url' with 'headers'. Call finalize once the upload has finished.
+        """
+        file_name, purpose, content_type, error = self.validate_new_upload(request)
+        if error:
+            return error
+
+        max_size = max_upload_size(purpose)
+        size = request.data.get('size')
+        if size is not None:
+            try:
+                size = int(size)
+            except (TypeError, ValueError):
+                return Response({'error': 'size must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+            if not 1 <= size <= max_size:
+                return Response({'error': f'size must be between 1 and {max_size} bytes'}, status=status.HTTP_400_BAD_REQUEST)
+
+        method = str(request.data.get('method', 'post')).lower()
+        if method not in ('post', 'put'):
+            return Response({'error': "method must be 'post' or 'put'"}, status=status.HTTP_400_BAD_REQUEST)
+
+        file_key = build_file_key(request.user.id, purpose, str(uuid.uuid4()), file_name)
+        session = UploadSession.objects.create(
+            user=request.user,
+            purpose=purpose,
+            mode=UploadSession.MODE_PRESIGNED,
+            file_name=file_name,
+            content_type=content_type,
+            file_key=file_key,
+            expected_size=size,
+        )
+
+        if method == 'post':
+            upload = {'method': 'POST', **presigned_post(file_key, content_type, size or max_size)}
+        else:
+            upload = {'method': 'PUT', **presigned_put(file_key, content_type)}
+        return Response({**session_data(session), 'upload': upload}, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        """
+        Get the status of an upload session, including the parts already stored.
+        """
+        session = self.get_session(request, pk)
+        if session is None:
+            return Response({'error': 'Upload session not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(session_data(session))
+
+    @action(detail=True, methods=['put'], url_path=r'parts/(?P<part_number>\d+)')
+    def upload_part(self, request, pk=None, part_number=None):
+        """
+        Upload one part. The raw request body is the part's data; every part except the last
+        must be exactly `part_size` bytes (checked by `complete`). Re-sending a part replaces it.
+        All parts together may not be larger than the largest file allowed for the session's purpose.
+        """
+        part_number = int(part_number)
+        if not 1 <= part_number <= MAX_PARTS:
+            return Response({'error': f'part_number must be between 1 and {MAX_PARTS}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        session = self.get_session(request, pk)
+        if session is None:
+            return Response({'error': 'Upload session not found'}, status=status.HTTP_404_NOT_FOUND)
+        if session.mode != UploadSession.MODE_MULTIPART:
+            return Response({'error': 'Presigned sessions are uploaded directly to S3'}, status=status.HTTP_409_CONFLICT)
+        if session.status != UploadSession.STATUS_ACTIVE:
+            return Response({'error': f'Upload session is {session.status}'}, status=status.HTTP_409_CONFLICT)
+
+        # Read at most one part (plus one byte to detect oversized parts) from the request stream
+        data = request.stream.read(session.part_size + 1) if request.stream else b''
+        if not data:
+            return Response({'error': 'Part is empty'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(data) > session.part_size:
+            return Response({'error': f'Parts may not be larger than {session.part_size} bytes'}, status=status.HTTP_400_BAD_REQUEST)
+        too_large = self.check_total_size(session, part_number, len(data))
+        if too_large:
+            return too_large
+
+        etag = upload_part(session.file_key, session.upload_id, part_number, data)
+
+        with transaction.atomic():
+            session = self.get_session(request, pk, for_update=True)
+            # Checked again under the lock, as parts may be uploaded in parallel. A part that is not recorded
+            # is left out of the completed file and discarded by S3 with the rest of the upload.
+            too_large = self.check_total_size(session, part_number, len(data))
+            if too_large:
+                return too_large
+            parts = [part for part in session.parts if part['PartNumber'] != part_number]
+            parts.append({'PartNumber': part_number, 'ETag': etag, 'Size': len(data)})
+            session.parts = parts
+            session.save(update_fields=['parts', 'updated_at'])
+
+        return Response(session_data(session))
+
+    def check_total_size(self, session, part_number, size):
+        """
+        Check that a part of the given size keeps the session within the largest file allowed for its purpose.
+        Returns an error response, or None if the part fits.
+        """
+        other_parts = sum(part['Size'] for part in session.parts if part['PartNumber'] != part_number)
+        max_size = max_upload_size(session.purpose)
+        if other_parts + size > max_size:
+            return Response({'error': f'The file may not be larger than {max_size} bytes'}, status=status.HTTP_400_BAD_REQUEST)
+        return None
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """
+        Complete the upload once every part from 1 to N has been stored, all but the last one `part_size` bytes
+        long (S3 rejects smaller parts in the middle of a file).
+        """
+        with transaction.atomic():
+            session = self.get_session(request, pk, for_update=True)
+            if session is None:
+                return Response({'error': 'Upload session not found'}, status=status.HTTP_404_NOT_FOUND)
+            if session.mode != UploadSession.MODE_MULTIPART:
+                return Response({'error': 'Presigned sessions are finalized instead'}, status=status.HTTP_409_CONFLICT)
+            if session.status != UploadSession.STATUS_ACTIVE:
+                return Response({'error': f'Upload session is {session.status}'}, status=status.HTTP_409_CONFLICT)
+
+            part_numbers = sorted(part['PartNumber'] for part in session.parts)
+            if not part_numbers or part_numbers != list(range(1, len(part_numbers) + 1)):
+                return Response({'error': 'Parts are missing', 'parts': part_numbers}, status=status.HTTP_400_BAD_REQUEST)
+            short_parts = sorted(
+                part['PartNumber'] for part in session.parts
+                if part['PartNumber'] != part_numbers[-1] and part['Size'] != session.part_size
+            )
+            if short_parts:
+                return Response(
+                    {'error': f'Every part but the last must be {session.part_size} bytes', 'parts': short_parts},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            complete_multipart_upload(session.file_key, session.upload_id, session.parts)
+            session.status = UploadSession.STATUS_COMPLETED
+            session.save(update_fields=['status', 'updated_at'])
+
+        return Response(session_data(session))
+
+    def check_stored_file(self, session, stored):
+        """
+        Check the HEAD response of an uploaded object against the session.
+        Returns an error message, or None if the file is acceptable.
+        """
+        if stored is None:
+            return 'The file has not been uploaded.'
+        if stored['content_type'] != session.content_type:
+            return f"Expected a file of type {session.content_type}, got {stored['content_type']}."
+        if not 1 <= stored['size'] <= max_upload_size(session.purpose):
+            return 'The file is empty or too large.'
+        if session.expected_size is not None and stored['size'] != session.expected_size:
+            return 'The file size does not match the announced size.'
+        return None
+
+    def attach_to_book(self, request, session):
+        """
+        Set the session's file as the content or cover art of one of the user's books,
+        or create a new book from the request data when no book is given for content.
+        """
+        book_id = request.data.get('book')
+        if book_id is None:
+            if session.purpose != 'content':
+                return None, Response({'error': 'book is required for cover art'}, status=status.HTTP_400_BAD_REQUEST)
+            data = request.data.copy()
+            data['content_upload_session'] = str(session.id)
+            serializer = BookSerializer(data=data, context={'request': request})
+            serializer.is_valid(raise_exception=True)
+            book = serializer.save(owner=request.user, content_url=session.file_url)
+            return BookSerializer(book, context={'request': request}).data, None
+
+        book = Book.objects.filter(pk=book_id, owner=request.user).first() if str(book_id).isdigit() else None
+        if book is None:
+            return None, Response({'error': 'Book not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        field = 'content_url' if session.purpose == 'content' else 'cover_art_url'
+        old_url = getattr(book, field)
+        setattr(book, field, session.file_url)
+        book.save()
+
+        # Retire the replaced file from S3 in the background
+        if old_url and old_url != session.file_url:
+            retire_files([old_url])
+        return BookSerializer(book, context={'request': request}).data, None
+
+    def attach_to_profile_picture(self, request, session):
+        """
+        Set the session's file as the user's profile picture.
+        """
+        old_profile_image_url = None
+        if hasattr(request.user, 'profile_picture'):
+            old_profile_image_url = request.user.profile_picture.profile_image_url
+
+        UserProfilePicture.objects.update_or_create(
+            user=request.user,
+            defaults={'profile_image_url': session.file_url}
+        )
+
+        # Retire the old profile image from S3 in the background
+        if old_profile_image_url and old_profile_image_url != session.file_url:
+            retire_files([old_profile_image_url])
+
+    @swagger_auto_schema(
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'book': openapi.Schema(type=openapi.TYPE_INTEGER, description='Book to update (content or cover art). Omit for content to create a new book from the other fields.'),
+                'title': openapi.Schema(type=openapi.TYPE_STRING),
+                'author': openapi.Schema(type=openapi.TYPE_STRING),
+                'description': openapi.Schema(type=openapi.TYPE_STRING),
+                'genre': openapi.Schema(type=openapi.TYPE_STRING),
+                'language': openapi.Schema(type=openapi.TYPE_STRING),
+                'published_date': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+            },
+        )
+    )
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        """
+        Verify the uploaded file with a HEAD request and attach it to a book or profile picture.
+        Presigned sessions are finalized after the upload to S3; multipart sessions after `complete`.
+        A file that fails verification is deleted and the session is aborted.
+        """
+        with transaction.atomic():
+            session = self.get_session(request, pk, for_update=True)
+            if session is None:
+                return Response({'error': 'Upload session not found'}, status=status.HTTP_404_NOT_FOUND)
+
+            ready_status = UploadSession.STATUS_ACTIVE if session.mode == UploadSession.MODE_PRESIGNED else UploadSession.STATUS_COMPLETED
+            if session.status != ready_status:
+                return Response({'error': f'Upload session is {session.status}'}, status=status.HTTP_409_CONFLICT)
+
+            stored = head_file(session.file_key)
+            error = self.check_stored_file(session, stored)
+            if error:
+                if stored is not None:
+                    jobs.enqueue('s3.delete_files', {'urls': [session.file_url]})
+                    session.status = UploadSession.STATUS_ABORTED
+                    session.save(update_fields=['status', 'updated_at'])
+                return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+            data = {}
+            if session.purpose == 'profile_image':
+                self.attach_to_profile_picture(request, session)
+                data['profile_image_url'] = session.file_url
+            else:
+                book, error_response = self.attach_to_book(request, session)
+                if error_response:
+                    return error_response
+                data['book'] = book
+
+            session.size = stored['size']
+            session.status = UploadSession.STATUS_CONSUMED
+            session.save(update_fields=['size', 'status', 'updated_at'])
+
+        return Response({**session_data(session), **data})
+
+    def destroy(self, request, pk=None):
+        """
+        Abort an unfinished upload and discard its parts (or the presigned upload's file).
+        """
+        session = self.get_session(request, pk)
+        if session is None:
+            return Response({'error': 'Upload session not found'}, status=status.HTTP_404_NOT_FOUND)
+        if session.status != UploadSession.STATUS_ACTIVE:
+            return Response({'error': f'Upload session is {session.status}'}, status=status.HTTP_409_CONFLICT)
+
+        if session.mode == UploadSession.MODE_MULTIPART:
+            abort_multipart_upload(session.file_key, session.upload_id)
+        else:
+            # The client may already have uploaded the file
+            jobs.enqueue('s3.delete_files', {'urls': [session.file_url]})
+        session.status = UploadSession.STATUS_ABORTED
+        session.save(update_fields=['status', 'updated_at'])
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -8,7 +8,7 @@ The endpoint is publicly accessible.
 
 Author: Chace Nielson
 Created: 2024-08-14
-Modified: 2024-10-10
+Modified: 2026-10-18
 @since 1.0
 """
 # create_account.py
@@ -24,7 +24,6 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.response import Response
 from rest_framework import status
-import uuid
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 
@@ -61,8 +60,7 @@ class UserCreateView(generics.CreateAPIView):
         # Handle profile image upload (if provided)
         profile_image = self.request.FILES.get('profile_image')
         if profile_image:
-            unique_string = str(uuid.uuid4())  # Generate a unique string for filename
-            profile_image_url = upload_file_to_s3(profile_image, user.id, 'profile_image', 'image/png', unique_string)
+            profile_image_url = upload_file_to_s3(profile_image, user.id, 'profile_image', 'image/png')
             # Create or update the profile picture record for the user
             UserProfilePicture.objects.create(user=user, profile_image_url=profile_image_url)
 
@@ -8,10 +8,11 @@ and authenticating users with Google.
 
 Author: Chace Nielson
 Created: 2024-08-14
-Modified: 2024-08-14
+Modified: 2026-10-18
 @since 1.0
 """
 
+import logging
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
@@ -21,17 +22,14 @@ from api.serializers.userSerializer import PublicUserSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 from google.oauth2 import id_token
 from google.auth.transport import requests
-import requests as fetchRequest  # This is the correct requests library for making HTTP requests
 
 from rest_framework import status
-from django.core.files.base import ContentFile
 
 from django.conf import settings  # Import settings to access the GOOGLE_CLIENT_ID
 
-from api.models.userProfilePicture import UserProfilePicture
-from api.aws.upload import upload_file_to_s3
+from api.services import jobs
 
-import uuid
+logger = logging.getLogger(__name__)
 
 
 
@@ -83,22 +81,16 @@ class GoogleLoginView(APIView):
                 },
             )
 
-            # if google provides an image copy it and uplaod the new img to s3
+            # if google provides an image copy it to s3 in the background
 
             # ONly happens if a user is creating an account
             if picture and created:
+                jobs.enqueue(
+                    'profile_pictures.import_remote',
+                    {'user_id': user.id, 'image_url': picture},
+                    idempotency_key=f'user:{user.id}:import-google-picture',
+                )
 
-                response = fetchRequest.get(picture, stream=True)
-                response.raise_for_status()
-                image_file = ContentFile(response.content, name=f"{uuid.uuid4()}.jpg")
-                
-                # Handle profile image upload (if provided)
-                unique_string = str(uuid.uuid4())  # Generate a unique string for filename
-                profile_image_url = upload_file_to_s3(image_file, user.id, 'profile_image', 'image/png', unique_string)
-                # Create or update the profile picture record for the user
-                UserProfilePicture.objects.update_or_create(user=user, profile_image_url=profile_image_url)
-
-     
             # Generate JWT tokens for the user
             refresh = RefreshToken.for_user(user)
 
@@ -115,5 +107,5 @@ class GoogleLoginView(APIView):
 
         except ValueError as e:
             # Log the error for debugging purposes
-            print("Google token validation failed:", str(e))
+            logger.warning('Google token validation failed: %s', e)
             return Response({"error": "Invalid Google token", "details": str(e)}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
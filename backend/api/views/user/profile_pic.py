@@ -3,13 +3,11 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
-from api.aws.upload import upload_file_to_s3
-from api.aws.delete import delete_file_from_s3
+from api.aws.upload import retire_files, upload_file_to_s3
 from api.serializers.profilePicSerializer import ProfileImageSerializer
 from api.models.userProfilePicture import UserProfilePicture
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-import uuid
 
 class UpdateProfilePictureView(APIView):
     """
@@ -35,14 +33,13 @@ class UpdateProfilePictureView(APIView):
         if serializer.is_valid():
             profile_image = serializer.validated_data['profile_image']
 
-            # Delete the old profile image from S3 if it exists
-            if hasattr(request.user, 'profile_picture') and request.user.profile_picture.profile_image_url:
-                delete_file_from_s3(request.user.profile_picture.profile_image_url)
-                request.user.profile_picture.delete()
+            # Remember the old profile image so it can be removed from S3 once replaced
+            old_profile_image_url = None
+            if hasattr(request.user, 'profile_picture'):
+                old_profile_image_url = request.user.profile_picture.profile_image_url
 
             # Upload the new profile image to S3
-            unique_string = str(uuid.uuid4())
-            profile_image_url = upload_file_to_s3(profile_image, request.user.id, 'profile_image', 'image/png', unique_string)
+            profile_image_url = upload_file_to_s3(profile_image, request.user.id, 'profile_image', 'image/png')
 
             # Save or update the profile picture in the database
             UserProfilePicture.objects.update_or_create(
@@ -50,5 +47,9 @@ class UpdateProfilePictureView(APIView):
                 defaults={'profile_image_url': profile_image_url}
             )
 
+            # Retire the old profile image from S3 in the background
+            if old_profile_image_url and old_profile_image_url != profile_image_url:
+                retire_files([old_profile_image_url])
+
             return Response({'message': 'Profile picture updated successfully.'}, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -19,8 +19,10 @@ from django.core.exceptions import PermissionDenied
 from rest_framework.exceptions import MethodNotAllowed
 from api.serializers.userSerializer import UserSerializer
 from django.contrib.auth.models import User
-from api.models.book import Book  # Import the Book model
-from api.aws.delete import delete_file_from_s3  # Import the delete function for S3
+from api.services.book_deletion import delete_user_content
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class UserCRUDViewSet(viewsets.ModelViewSet):
@@ -91,21 +93,10 @@ class UserCRUDViewSet(viewsets.ModelViewSet):
         Args:
             instance (User): The user instance to be deleted.
         """
-        # Fetch all books owned by the user
-        books = Book.objects.filter(owner=instance)
-
-        # Loop through each book and delete associated files from S3
-        for book in books:
-            if book.content_url:
-                delete_file_from_s3(book.content_url)
-            if book.cover_art_url:
-                delete_file_from_s3(book.cover_art_url)
-            book.delete()
-
-        # Check if the user has an associated profile picture and delete the image from S3
-        if hasattr(instance, 'profile_picture') and instance.profile_picture.profile_image_url:
-            delete_file_from_s3(instance.profile_picture.profile_image_url)
-            instance.profile_picture.delete()
+        # Delete the user's books and profile picture, removing their S3 files in batches
+        failures = delete_user_content(instance)
+        if failures:
+            logger.warning('User %s deleted with %d S3 files left behind', instance.pk, len(failures))
 
         # Now, delete the user instance (this also cascades to other related objects)
         instance.delete()
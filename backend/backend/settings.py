@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from datetime import timedelta
 from pathlib import Path
 from decouple import config, Csv
+from django.core.exceptions import ImproperlyConfigured
 
 import sys
 import logging
@@ -62,6 +63,7 @@ INSTALLED_APPS = [
 SITE_ID = int(config('SITE_ID'))
 
 MIDDLEWARE = [
+    'api.services.instrumentation.RequestTimingMiddleware',  # First, so it times the whole request
     'corsheaders.middleware.CorsMiddleware',  # Must be before CommonMiddleware
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -71,6 +73,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',  # Add this middleware
+    'api.db.router.ReplicaRoutingMiddleware',  # Read replica routing and read-your-writes pinning
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -93,18 +96,47 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'backend.wsgi.application'
 
+# Serve the public read endpoints (catalog, book details, top books, comment threads) with async views on the
+# same URLs (see api/views/public_async.py). Only useful under an ASGI server, e.g.
+# gunicorn backend.asgi:application -k uvicorn.workers.UvicornWorker
+ASYNC_PUBLIC_VIEWS = config('ASYNC_PUBLIC_VIEWS', default=False, cast=bool)
+
 # Database configuration
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 # Database configuration
+#
+# Production connections are reused between requests instead of being opened per request:
+# - By default each worker thread keeps its connection for DB_CONN_MAX_AGE seconds, checking it is still usable
+#   before reusing it (CONN_HEALTH_CHECKS).
+# - With DB_POOL=True each worker process keeps a psycopg pool of DB_POOL_MIN_SIZE to DB_POOL_MAX_SIZE connections
+#   shared by its threads (size it to the gunicorn threads per worker; workers x DB_POOL_MAX_SIZE must stay below
+#   the server's max_connections). Requests wait up to DB_POOL_TIMEOUT seconds for a free connection.
+# The `api.db.postgresql` engine is Django's PostgreSQL backend plus connection timing for the stats endpoint
+# (see api/services/db_connections.py).
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+DB_POOL_MIN_SIZE = config('DB_POOL_MIN_SIZE', default=1, cast=int)
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=4, cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=float)
+
 if config('ENV', default='production') == 'production':
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.postgresql',
+            'ENGINE': 'api.db.postgresql',
             'NAME': config('POSTGRES_DB'),
             'USER': config('POSTGRES_USER'),
             'PASSWORD': config('POSTGRES_PASSWORD'),
             'HOST': config('POSTGRES_HOST'),
             'PORT': config('POSTGRES_PORT', default='5432'),
+            # The pool keeps the connections itself, so Django must not also hold on to them
+            'CONN_MAX_AGE': 0 if DB_POOL else config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': DB_POOL_MIN_SIZE,
+                    'max_size': DB_POOL_MAX_SIZE,
+                    'timeout': DB_POOL_TIMEOUT,
+                },
+            } if DB_POOL else {},
         }
     }
 else:
@@ -118,6 +150,31 @@ else:
         }
     }
 
+# Read replicas for the public catalog (see api/db/router.py). In production, list the replica hosts in
+# POSTGRES_REPLICA_HOSTS (they use the primary's database name and credentials). To try the routing locally,
+# list SQLite files in SQLITE_REPLICAS, e.g. a copy of db.sqlite3 (local copies do not replicate, so they only
+# show which database answered).
+if config('ENV', default='production') == 'production':
+    _replicas = [
+        {**DATABASES['default'], 'HOST': host}
+        for host in config('POSTGRES_REPLICA_HOSTS', default='', cast=Csv())
+    ]
+else:
+    _replicas = [
+        {**DATABASES['default'], 'NAME': path}
+        for path in config('SQLITE_REPLICAS', default='', cast=Csv())
+    ]
+for _number, _replica in enumerate(_replicas, start=1):
+    DATABASES[f'replica_{_number}'] = {**_replica, 'TEST': {'MIRROR': 'default'}}
+DATABASE_REPLICAS = [f'replica_{_number}' for _number in range(1, len(_replicas) + 1)]
+DATABASE_ROUTERS = ['api.db.router.ReplicaRouter']
+
+# Seconds a user's reads stay on the primary after they write, so they see their own changes
+DB_REPLICA_PIN_SECONDS = config('DB_REPLICA_PIN_SECONDS', default=10, cast=int)
+# Replicas further behind than this (in seconds) are skipped; their lag is checked every LAG_CHECK_INTERVAL
+DB_REPLICA_MAX_LAG = config('DB_REPLICA_MAX_LAG', default=5, cast=float)
+DB_REPLICA_LAG_CHECK_INTERVAL = config('DB_REPLICA_LAG_CHECK_INTERVAL', default=5, cast=float)
+
 # Authentication backends
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',                     # Default authentication backend
@@ -202,6 +259,33 @@ AWS_S3_OBJECT_PARAMETERS = {
 }
 AWS_DEFAULT_ACL = 'public-read'
 
+# Shared S3 client connection pool, timeouts and retry policy (see api/aws/client.py)
+AWS_S3_MAX_POOL_CONNECTIONS = config('AWS_S3_MAX_POOL_CONNECTIONS', default=50, cast=int)
+AWS_S3_CONNECT_TIMEOUT = config('AWS_S3_CONNECT_TIMEOUT', default=5, cast=float)
+AWS_S3_READ_TIMEOUT = config('AWS_S3_READ_TIMEOUT', default=60, cast=float)
+AWS_S3_MAX_ATTEMPTS = config('AWS_S3_MAX_ATTEMPTS', default=3, cast=int)
+AWS_S3_RETRY_MODE = config('AWS_S3_RETRY_MODE', default='standard')
+
+# Streaming/resumable multipart uploads to S3 (see api/aws/multipart.py). Parts are at least 5 MiB.
+AWS_S3_MULTIPART_PART_SIZE = config('AWS_S3_MULTIPART_PART_SIZE', default=8 * 1024 * 1024, cast=int)
+AWS_S3_MULTIPART_CONCURRENCY = config('AWS_S3_MULTIPART_CONCURRENCY', default=4, cast=int)
+
+# Cache-Control header of uploaded objects. Object keys are content-addressed (or random) and never rewritten,
+# so browsers and CDNs can cache them for a year without revalidating (see api/aws/upload.py).
+AWS_S3_CACHE_CONTROL = config('AWS_S3_CACHE_CONTROL', default='public, max-age=31536000, immutable')
+# Seconds to wait before deleting a file that was replaced by a new upload
+AWS_S3_RETIRE_DELAY = config('AWS_S3_RETIRE_DELAY', default=300, cast=int)
+
+# Direct-to-S3 uploads with presigned URLs (see api/aws/presigned.py)
+AWS_S3_PRESIGNED_EXPIRY = config('AWS_S3_PRESIGNED_EXPIRY', default=900, cast=int)  # Seconds
+UPLOAD_MAX_CONTENT_SIZE = config('UPLOAD_MAX_CONTENT_SIZE', default=200 * 1024 * 1024, cast=int)  # Bytes, book files
+UPLOAD_MAX_IMAGE_SIZE = config('UPLOAD_MAX_IMAGE_SIZE', default=10 * 1024 * 1024, cast=int)  # Bytes, cover art and profile pictures
+
+# Store S3 objects on the local filesystem instead (development and tests only, see api/aws/local.py).
+# Presigned URLs then point at AWS_S3_LOCAL_URL, which is served by the API itself.
+AWS_S3_LOCAL_ROOT = config('AWS_S3_LOCAL_ROOT', default='')
+AWS_S3_LOCAL_URL = config('AWS_S3_LOCAL_URL', default='http://localhost:8000/api/local-s3/')
+
 
 SOCIALACCOUNT_LOGIN_ON_GET=True
 
@@ -233,11 +317,22 @@ DEBUG = config('DEBUG', default=False, cast=bool)
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        # The message of the request log is already a JSON object
+        'json': {
+            'format': '{"time": "%(asctime)s", "level": "%(levelname)s", "logger": "%(name)s", "request": %(message)s}',
+        },
+    },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
             'stream': sys.stdout,
         },
+        'json_console': {
+            'class': 'logging.StreamHandler',
+            'stream': sys.stdout,
+            'formatter': 'json',
+        },
     },
     'root': {
         'handlers': ['console'],
@@ -249,6 +344,87 @@ LOGGING = {
             'level': 'ERROR',
             'propagate': True,
         },
+        'api.requests': {
+            'handlers': ['json_console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
+# Request timing (see api/services/instrumentation.py). Every response gets a Server-Timing header with the
+# time spent on database queries, S3 calls and serializers. A sample of REQUEST_LOG_SAMPLE_RATE (0 to 1) of
+# the requests is logged as JSON on the 'api.requests' logger; requests taking at least REQUEST_SLOW_MS
+# milliseconds or making more than REQUEST_SLOW_QUERIES queries are always logged, as warnings.
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=True, cast=bool)
+REQUEST_LOG_SAMPLE_RATE = config('REQUEST_LOG_SAMPLE_RATE', default=0.01, cast=float)
+REQUEST_SLOW_MS = config('REQUEST_SLOW_MS', default=1000, cast=float)
+REQUEST_SLOW_QUERIES = config('REQUEST_SLOW_QUERIES', default=50, cast=int)
+
+# Prometheus metrics at /metrics (see api/services/metrics.py). The scraper sends METRICS_TOKEN as a bearer
+# token; without a token the endpoint is closed (except from localhost with DEBUG on). Under gunicorn the
+# workers' metrics are added up through PROMETHEUS_MULTIPROC_DIR (set in gunicorn.conf.py).
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+
+# Cache used for the catalog counts, the site statistics snapshot and the public response cache.
+# The local-memory default is per process: with several workers, invalidations only reach the worker
+# that handled the write, so use a shared backend there, e.g.
+# CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache CACHE_LOCATION=/var/tmp/library-cache
+# or a Redis/Memcached backend.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='library'),
+        'OPTIONS': {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=5000, cast=int)},
+    }
+}
+
+# The replica router pins a user's reads to the primary after they write by storing the pin in the cache.
+# The next request usually reaches another worker, so with replicas the cache must be shared by all workers.
+if DATABASE_REPLICAS and CACHES['default']['BACKEND'] in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+):
+    raise ImproperlyConfigured(
+        'Read replicas need a cache shared by all workers (set CACHE_BACKEND, see api/db/router.py).'
+    )
+
+# Seconds a public read response is cached for (see api/services/response_cache.py). Writes invalidate
+# entries early; the timeout bounds how long replaced entries take up space. 0 disables the response cache.
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Seconds the catalog and top books lists are cached for at most. View/download counter flushes and favorites
+# do not invalidate them, so this bounds how stale their counts (and the orders built on them) can be. 0 stops
+# caching them.
+RESPONSE_CACHE_COUNTS_TIMEOUT = config('RESPONSE_CACHE_COUNTS_TIMEOUT', default=60, cast=int)
+
+# Seconds a catalog result count is cached for when cursor pagination asks for a total
+CATALOG_COUNT_CACHE_TIMEOUT = config('CATALOG_COUNT_CACHE_TIMEOUT', default=60, cast=int)
+
+# Book view/download counters are buffered per process and written in batches
+# (see api/services/counters.py). An interval of 0 writes every increment immediately.
+BOOK_COUNTER_FLUSH_INTERVAL = config('BOOK_COUNTER_FLUSH_INTERVAL', default=5, cast=float)
+BOOK_COUNTER_MAX_PENDING = config('BOOK_COUNTER_MAX_PENDING', default=500, cast=int)
+
+# Trending score of books (see api/services/trending.py): weights per view, download and favorite,
+# the half-life of activity and how often the decay job runs (both in seconds)
+TRENDING_VIEW_WEIGHT = config('TRENDING_VIEW_WEIGHT', default=1.0, cast=float)
+TRENDING_DOWNLOAD_WEIGHT = config('TRENDING_DOWNLOAD_WEIGHT', default=3.0, cast=float)
+TRENDING_FAVORITE_WEIGHT = config('TRENDING_FAVORITE_WEIGHT', default=5.0, cast=float)
+TRENDING_HALF_LIFE = config('TRENDING_HALF_LIFE', default=2 * 24 * 3600, cast=int)
+TRENDING_DECAY_INTERVAL = config('TRENDING_DECAY_INTERVAL', default=3600, cast=int)
+
+# Maximum age in seconds of the site statistics snapshot before it is rebuilt
+SITE_STATISTICS_MAX_AGE = config('SITE_STATISTICS_MAX_AGE', default=300, cast=int)
+
+# Background job queue (see api/services/jobs.py). Use 'api.services.jobs.ImmediateBackend'
+# to run jobs in-process when no `manage.py run_jobs` worker is running.
+JOB_QUEUE_BACKEND = config('JOB_QUEUE_BACKEND', default='api.services.jobs.DatabaseBackend')
+JOB_MAX_ATTEMPTS = config('JOB_MAX_ATTEMPTS', default=5, cast=int)
+JOB_RETRY_BACKOFF = config('JOB_RETRY_BACKOFF', default=30, cast=int)  # Seconds, doubled after each failed attempt
+JOB_LOCK_TIMEOUT = config('JOB_LOCK_TIMEOUT', default=600, cast=int)  # Seconds before a stuck running job is retried
+
+# Resized WebP/JPEG copies of cover art and profile pictures (see api/services/images.py)
+IMAGE_VARIANT_WIDTHS = config('IMAGE_VARIANT_WIDTHS', default='160,320,640', cast=Csv(int))  # Pixels
+IMAGE_VARIANT_QUALITY = config('IMAGE_VARIANT_QUALITY', default=80, cast=int)
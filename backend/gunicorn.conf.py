@@ -0,0 +1,33 @@
+"""
+gunicorn.conf.py
+
+Gunicorn settings, loaded automatically when gunicorn is started from this directory.
+
+Sets up the prometheus_client multiprocess mode, so /metrics reports the metrics of all workers rather than
+those of the worker that answers the scrape (see api/services/metrics.py):
+- `PROMETHEUS_MULTIPROC_DIR` is set (default /tmp/library-metrics) before the workers import the app.
+- The directory is emptied when gunicorn starts, so values of a previous run are not counted again.
+- When a worker exits, its live gauges (the connection pool usage) are dropped. Its counters and histograms are
+  kept, so totals do not go down when workers are replaced.
+
+Author: Chace Nielson
+Created: 2026-10-18
+Modified: 2026-10-18
+@since 1.2
+"""
+import os
+import shutil
+
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/library-metrics')
+
+from prometheus_client import multiprocess  # noqa: E402 (reads the directory setting on import)
+
+
+def on_starting(server):
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
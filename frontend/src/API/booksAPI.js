@@ -11,6 +11,7 @@
  *
  * @function fetchBooks - Fetch a list of books with pagination, search, and filters.
  * @function fetchBookById - Fetch details of a single book by ID.
+ * @function fetchBookFacets - Fetch the genres and languages that have books, with their counts.
  * @function incrementViews - Increment the view count of a book.
  * @function incrementDownloads - Increment the download count of a book.
  * @function fetchBookDetails - Fetch detailed book information (admin only).
@@ -20,6 +21,7 @@
  *
  * @exports fetchBooks
  * @exports fetchBookById
+ * @exports fetchBookFacets
  * @exports incrementViews
  * @exports incrementDownloads
  * @exports fetchBookDetails
@@ -32,6 +34,7 @@
  */
 
 import { API_BASE_URL, DEFAULT_PAGE_SIZE } from '../globals';
+import { checkAndRefreshAccessToken } from './tokenFetchAPI';
 
 export const fetchBooks = async (page = 1, searchQuery = '', filters = {}, pageSize = DEFAULT_PAGE_SIZE) => {
   try {
@@ -49,7 +52,14 @@ export const fetchBooks = async (page = 1, searchQuery = '', filters = {}, pageS
 
     const url = `${API_BASE_URL}/public/books?${queryParams.toString()}`;
 
-    const response = await fetch(url);
+    // Signed-in users get `is_favorited` on each book, so cards do not need to look up the favorites
+    const headers = {};
+    if (localStorage.getItem('accessToken')) {
+      const accessToken = await checkAndRefreshAccessToken().catch(() => null);
+      if (accessToken) headers['Authorization'] = `Bearer ${accessToken}`;
+    }
+
+    const response = await fetch(url, { headers });
 
     if (!response.ok) {
       throw new Error('Failed to fetch books');
@@ -69,7 +79,15 @@ export const fetchBooks = async (page = 1, searchQuery = '', filters = {}, pageS
 export const fetchBookById = async (id) => {
   try {
     const url = `${API_BASE_URL}/public/books/${id}`;
-    const response = await fetch(url);
+
+    // Signed-in users get `is_favorited` on the book
+    const headers = {};
+    if (localStorage.getItem('accessToken')) {
+      const accessToken = await checkAndRefreshAccessToken().catch(() => null);
+      if (accessToken) headers['Authorization'] = `Bearer ${accessToken}`;
+    }
+
+    const response = await fetch(url, { headers });
 
     if (!response.ok) {
       throw new Error('Failed to fetch the book');
@@ -83,6 +101,23 @@ export const fetchBookById = async (id) => {
   }
 };
 
+// get the genres and languages that have books (for the filter dropdowns)
+export const fetchBookFacets = async () => {
+  try {
+    const url = `${API_BASE_URL}/public/books/facets/`;
+    const response = await fetch(url);
+
+    if (!response.ok) {
+      throw new Error('Failed to fetch the book facets');
+    }
+
+    const data = await response.json();
+    return data;
+  } catch (error) {
+    console.error('Error fetching the book facets:', error);
+    return null;
+  }
+};
 
 export const incrementViews = async (bookId) => {
   try {
@@ -8,7 +8,7 @@
  * @requires API_BASE_URL - Base URL for API requests.
  * @requires checkAndRefreshAccessToken - Utility function for handling token refresh.
  *
- * @function fetchFavBooks - Fetch a list of the user's favorite books.
+ * @function fetchFavBooks - Fetch one page of the user's favorite books (most recently favorited first).
  * @function addFavoriteBook - Add a book to the user's favorites.
  * @function removeFavoriteBook - Remove a book from the user's favorites.
  *
@@ -20,15 +20,19 @@
  * @created 2025-01-16
  */
 
-import { API_BASE_URL } from '../globals';
+import { API_BASE_URL, DEFAULT_PAGE_SIZE } from '../globals';
 import { checkAndRefreshAccessToken } from './tokenFetchAPI';  // Ensure this is the correct path
 
-// Function to fetch the favorite books
-export const fetchFavBooks = async () => {
+// Function to fetch a page of favorite books: returns { results, next_cursor, page_size }
+export const fetchFavBooks = async (cursor = null, pageSize = DEFAULT_PAGE_SIZE) => {
   try {
     const accessToken = await checkAndRefreshAccessToken();  // Ensure valid token
 
-    const response = await fetch(`${API_BASE_URL}/books/get_favorites/`, {
+    const queryParams = new URLSearchParams();
+    if (cursor) queryParams.append('cursor', cursor);
+    if (pageSize) queryParams.append('page_size', pageSize);
+
+    const response = await fetch(`${API_BASE_URL}/books/get_favorites/?${queryParams.toString()}`, {
       method: 'GET',
       headers: {
         'Authorization': `Bearer ${accessToken}`,
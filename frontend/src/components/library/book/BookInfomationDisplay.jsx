@@ -57,6 +57,7 @@ function BookInformationDisplay() {
                 bookTitle={book?.title}
                 large={true}
                 loading={loading}
+                isFavorited={book?.is_favorited}
               />
               <BookOwner
                 loading={loading}
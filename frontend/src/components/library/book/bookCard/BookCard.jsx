@@ -66,7 +66,7 @@ function BookCard({ book, loading }) {
             )}
             {!loading && (
               <div className="absolute top-2 right-2">
-                <SetFavBook id={book.id} bookTitle={book.title} />
+                <SetFavBook id={book.id} bookTitle={book.title} isFavorited={book.is_favorited} />
               </div>
             )}
           </div>
@@ -4,7 +4,7 @@
  * @file Filters.jsx
  * @author 
  * @date Created: January 11, 2025
- * @lastUpdated: January 11, 2025
+ * @lastUpdated: October 18, 2026
  * @description 
  *    This component provides filtering options for the Browse Page, allowing users
  *    to filter books by sort order, genre, language, and whether to include descriptions.
@@ -14,11 +14,13 @@
  * - React: For rendering the component
  * - useSearch: Context hook for managing filter-related state and actions
  * - browsePageData: Data configuration for filtering and sorting options
+ * - fetchBookFacets: API call for the genres and languages that have books
  */
 
-import React from "react";
+import React, { useEffect, useState } from "react";
 import { useSearch } from "@/context/SearchContext";
 import { browsePageData } from "@/data/browsePageData";
+import { fetchBookFacets } from "@/API/booksAPI";
 
 /**
  * FilterInput Component
@@ -44,12 +46,40 @@ const FilterInput = ({ type = "text", name, value, onChange, placeholder, classN
   />
 );
 
+/**
+ * FacetSelect Component
+ * 
+ * A dropdown of the values books are filed under (e.g. genres), with their book counts.
+ * 
+ * @param {string} name - The name of the filter field.
+ * @param {string} value - The selected value ("" for all).
+ * @param {function} onChange - Callback for handling selection changes.
+ * @param {string} placeholder - Label of the "all values" option.
+ * @param {Array<{name: string, count: number}>} options - The values and their book counts.
+ * @returns {JSX.Element} A styled select element.
+ */
+const FacetSelect = ({ name, value, onChange, placeholder, options }) => (
+  <select
+    name={name}
+    value={value}
+    onChange={onChange}
+    className="p-2 border rounded-md w-full"
+  >
+    <option value="">{placeholder}</option>
+    {options.map((option) => (
+      <option key={option.name} value={option.name}>
+        {option.name} ({option.count})
+      </option>
+    ))}
+  </select>
+);
+
 /**
  * Filters Component
  * 
  * Renders filtering options for the Browse Page. Includes:
  * - A dropdown for sorting books (e.g., by most recent, most viewed)
- * - Text inputs for filtering by genre and language
+ * - Dropdowns for filtering by genre and language (loaded from the facets endpoint)
  * - A checkbox to include/exclude book descriptions
  * 
  * Integrates with the `SearchContext` to synchronize the filter state across the app.
@@ -58,6 +88,13 @@ const FilterInput = ({ type = "text", name, value, onChange, placeholder, classN
  */
 const Filters = () => {
   const { filters, handleFilterChange } = useSearch(); // Access filter state and handler
+  const [facets, setFacets] = useState({ genres: [], languages: [] }); // Genres and languages with books
+
+  useEffect(() => {
+    fetchBookFacets().then((data) => {
+      if (data) setFacets(data);
+    });
+  }, []);
 
   return (
     <div className="flex flex-col items-center gap-4 p-4 card-background shadow rounded-lg">
@@ -81,21 +118,21 @@ const Filters = () => {
         </select>
       </div>
 
-      {/* Text Inputs */}
+      {/* Genre and Language */}
       <div className="flex flex-col gap-2 w-full md:flex-row">
-        <FilterInput
+        <FacetSelect
           name="genre"
           value={filters.genre}
           onChange={handleFilterChange}
-          placeholder="Genre"
-          className="w-full"
+          placeholder="All genres"
+          options={facets.genres}
         />
-        <FilterInput
+        <FacetSelect
           name="language"
           value={filters.language}
           onChange={handleFilterChange}
-          placeholder="Language"
-          className="w-full"
+          placeholder="All languages"
+          options={facets.languages}
         />
       </div>
 
@@ -4,7 +4,8 @@
  * @description
  * A React component that displays a list of the user's favorite books. 
  * Includes sorting functionality by title or author, and handles loading 
- * and error states with appropriate UI feedback.
+ * and error states with appropriate UI feedback. The first page is loaded when
+ * the component mounts and the next ones with the "Load more" button.
  *
  * @example
  * <FavBooks />
@@ -20,7 +21,7 @@
  *
  * @author Chace Nielson
  * @created 2025-01-14
- * @updated 2025-01-14
+ * @updated 2026-10-18
  */
 'use client'
 import React, { useState, useEffect } from 'react';
@@ -34,15 +35,19 @@ import { useProfileContext } from '@/context/ProfileContext';
 import LoginForm from '@/components/auth/LoginForm';
 
 function FavBooks() {
-  const { favBooks, loading, error, loadFavBooks } = useFavBooks();
+  const { favBooks, loading, loadingMore, hasMore, error, loadFavBooks, loadMoreFavBooks } = useFavBooks();
   const [localFavBooks, setLocalFavBooks] = useState([]);
   const [sortedBooks, setSortedBooks] = useState([]);
   const [sortOption, setSortOption] = useState('');
 
-  const { isLoggedIn } = useProfileContext();
+  const { isLoggedIn, isLoading: profileLoading } = useProfileContext();
     const router = useRouter();
   
-  
+  // Load the first page of favorites once signed in
+  useEffect(() => {
+    if (isLoggedIn) loadFavBooks();
+  }, [isLoggedIn]);
+
   useEffect(() => {
 
     setLocalFavBooks(favBooks);
@@ -62,7 +67,7 @@ function FavBooks() {
     setSortOption(e.target.value);
   };
 
-  if (!isLoggedIn && !loading){
+  if (!isLoggedIn && !profileLoading){
     return(
       <LoginForm
         isPopup
@@ -104,6 +109,19 @@ function FavBooks() {
         </ul>
       )}
 
+      {/* Next page of favorites, on demand */}
+      {!loading && hasMore && (
+        <div className="flex justify-center mt-6">
+          <button
+            onClick={loadMoreFavBooks}
+            disabled={loadingMore}
+            className="pagination-btn"
+          >
+            {loadingMore ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
+
     </div>
   );
 }
@@ -10,6 +10,7 @@
  * @param {string} [bookTitle=null] - Optional title of the book for notifications.
  * @param {boolean} [large=false] - Determines the size of the star icon.
  * @param {boolean} [loading=false] - Prevents toggling when set to true.
+ * @param {boolean} [isFavorited=false] - The favorite status sent with the book (`is_favorited`).
  *
  * @example
  * <SetFavBook id={book.id} bookTitle="The Great Book" large={true} loading={false} />
@@ -17,14 +18,14 @@
  * @requires react
  * @requires react-icons/fa - For rendering the star icon.
  * @requires react-hot-toast - For displaying toast notifications.
- * @requires useFavBooks - Context to manage favorite books.
+ * @requires useFavBooks - Context to drop removed books from the loaded favorites.
  * @requires useProfileContext - Context to manage user authentication state.
  *
  * @exports SetFavBook
  *
  * @author Chace Nielson
  * @created 2025-01-13
- * @updated 2025-01-13
+ * @updated 2026-10-18
  */
 
 import React, { useState, useEffect } from "react";
@@ -34,18 +35,15 @@ import { toast } from "react-hot-toast";
 import { useFavBooks } from "@/context/FavBooksContext";
 import { useProfileContext } from "@/context/ProfileContext";
 
-function SetFavBook({ id, bookTitle = null, large = false, loading = false }) {
+function SetFavBook({ id, bookTitle = null, large = false, loading = false, isFavorited = false }) {
   const { isLoggedIn } = useProfileContext(); // Access user authentication context
-  const { favBooks, loadFavBooks } = useFavBooks(); // Access favorites context
-  const [isLocalFav, setIsLocalFav] = useState(false); // Local state for favorite status
+  const { removeFromFavBooks } = useFavBooks(); // Access favorites context
+  const [isLocalFav, setIsLocalFav] = useState(isFavorited); // Local state for favorite status
 
-  // Sync local favorite state with context
+  // Use the favorite status sent with the book (only re-synced when new book data arrives, not after a toggle)
   useEffect(() => {
-    if (id) {
-      const isFav = favBooks.some((book) => book.id === id);
-      setIsLocalFav(isFav);
-    }
-  }, [favBooks, id]);
+    setIsLocalFav(isFavorited);
+  }, [isFavorited]);
 
   // Toggle favorite status
   const toggleFavorite = async (e) => {
@@ -58,13 +56,13 @@ function SetFavBook({ id, bookTitle = null, large = false, loading = false }) {
       if (isLocalFav) {
         await removeFavoriteBook(id); // Remove favorite
         setIsLocalFav(false);
+        removeFromFavBooks(id); // Drop it from the favorites page
         toast.success(`${bookTitle || "Book"} removed from favorites`);
       } else {
         await addFavoriteBook(id); // Add favorite
         setIsLocalFav(true);
         toast.success(`${bookTitle || "Book"} added to favorites`);
       }
-      loadFavBooks(); // Reload favorites
     } catch (error) {
       console.error("Error updating favorite status:", error);
       toast.error("An error occurred while updating favorites.");
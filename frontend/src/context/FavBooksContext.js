@@ -3,18 +3,20 @@
  * @module FavBooksContext
  * @description
  *   Provides a context and provider for managing the user's favorite books.
- *   Handles fetching, storing, and reloading the list of favorite books.
+ *   Handles fetching the favorites one page at a time and keeping the loaded pages in sync.
  *   Includes a custom hook for convenient access to the context.
  * 
  * @context FavBooksContext
  * 
  * @requires react
  * @requires createContext from "react" - For creating the context.
- * @requires fetchFavBooks from "@/API/favBooksAPI" - API function to fetch favorite books.
+ * @requires fetchFavBooks from "@/API/favBooksAPI" - API function to fetch a page of favorite books.
  * 
  * @description
- * - Maintains a list of favorite books and their loading status.
- * - Exposes functions to reload the list of favorite books.
+ * - Maintains the loaded pages of favorite books and their loading status.
+ * - Nothing is fetched until a component asks for it: the favorites page calls `loadFavBooks` for the
+ *   first page and `loadMoreFavBooks` for the next one. Whether a book is favorited comes with the book
+ *   itself (`is_favorited`), so other components do not need the list.
  * - Can be used across the application to provide a consistent favorites state.
  * 
  * @example
@@ -25,15 +27,15 @@
  * 
  * @example
  * // Access the context in a component:
- * const { favBooks, loading, loadFavBooks } = useFavBooks();
+ * const { favBooks, loading, hasMore, loadFavBooks, loadMoreFavBooks } = useFavBooks();
  * 
  * @author Chace Nielson
  * @created 2025-01-12
- * @updated 2025-01-12
+ * @updated 2026-10-18
  */
 
 "use client";
-import React, { createContext, useState, useEffect, useContext } from 'react';
+import React, { createContext, useState, useContext } from 'react';
 import { fetchFavBooks } from '@/API/favBooksAPI';  // Import the API to fetch favorites
 
 // Create the Favorite Books context
@@ -45,18 +47,21 @@ const FavBooksContext = createContext();
  * @returns {JSX.Element} The context provider for favorite books.
  */
 export const FavBooksProvider = ({ children }) => {
-  const [favBooks, setFavBooks] = useState([]); // List of favorite books
-  const [loading, setLoading] = useState(true); // Loading state for fetching favorites
-  const [error, setError] = useState(false); // Loading state for fetching favorites
+  const [favBooks, setFavBooks] = useState([]); // Loaded pages of favorite books
+  const [nextCursor, setNextCursor] = useState(null); // Cursor of the next page (null on the last one)
+  const [loading, setLoading] = useState(true); // Loading state for the first page
+  const [loadingMore, setLoadingMore] = useState(false); // Loading state for the next pages
+  const [error, setError] = useState(false); // Error state for fetching favorites
 
   /**
-   * Fetch and load the user's favorite books.
+   * Fetch the first page of the user's favorite books, replacing the loaded pages.
    */
   const loadFavBooks = async () => {
     try {
       setLoading(true); // Set loading state to true
-      const books = await fetchFavBooks(); // Fetch all favorite books
-      setFavBooks(books); // Update the list of favorite books
+      const page = await fetchFavBooks();
+      setFavBooks(page.results);
+      setNextCursor(page.next_cursor);
       setError(false)
     } catch (error) {
       // console.error("Failed to fetch favorite books:", error); // Log errors to the console
@@ -66,13 +71,44 @@ export const FavBooksProvider = ({ children }) => {
     }
   };
 
-  // Fetch favorite books when the provider is mounted
-  useEffect(() => {
-    loadFavBooks();
-  }, []);
+  /**
+   * Fetch the next page of the user's favorite books and add it to the loaded pages.
+   */
+  const loadMoreFavBooks = async () => {
+    if (!nextCursor || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const page = await fetchFavBooks(nextCursor);
+      setFavBooks((books) => [...books, ...page.results]);
+      setNextCursor(page.next_cursor);
+    } catch (error) {
+      setError(true)
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  /**
+   * Drop a book from the loaded pages after it is removed from the favorites.
+   * @param {number} id - The ID of the book.
+   */
+  const removeFromFavBooks = (id) => {
+    setFavBooks((books) => books.filter((book) => book.id !== id));
+  };
 
   return (
-    <FavBooksContext.Provider value={{ favBooks, loading, loadFavBooks, error }}>
+    <FavBooksContext.Provider
+      value={{
+        favBooks,
+        loading,
+        loadingMore,
+        hasMore: !!nextCursor,
+        loadFavBooks,
+        loadMoreFavBooks,
+        removeFromFavBooks,
+        error,
+      }}
+    >
       {children}
     </FavBooksContext.Provider>
   );